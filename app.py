@@ -1,25 +1,41 @@
-from flask import Flask, render_template, request, jsonify
+import time
+_startup_started = time.perf_counter()
+
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 from werkzeug.middleware.proxy_fix import ProxyFix
-import oracledb
+import hashlib
 import json
 import os
-from tecsql_translator import normalize_query_text, translate_tecsql, translate_sql_to_tecsql, update_mappings
+import re
+import threading
+import oracle_client
+from descriptor_choices import DescriptorChoices
+from dictionary_source import OracleSource
+from dictionary_export import iter_csv, iter_rows as iter_export_rows, iter_xlsx, parse_filters
+from dictionary_store import DictionaryStore
+from history_store import HistoryStore
+from index_advisor import advise
+from index_catalog import IndexCatalog
+from lazy_dictionary import LazyDictionary
+from load_jobs import LoadJobs, iter_events as iter_load_job_events
+from oracle_admission import AdmissionController, OracleBusy
+from schema_digest import SchemaDigest, diff as schema_diff, load_snapshot, save_snapshot
+from script_translator import MAX_STATEMENT_CHARS, iter_statements
+from search_index import TableSearchIndex
+from shared_dictionary import SharedDictionary
+from static_assets import StaticAssets
+from traffic_capture import TrafficCapture
+from translation_guard import QueryLimits, TranslationLimit, TranslatorPool
+from tecsql_translator import autocomplete, descriptor_choice_key, find_fields, normalize_query_text, translate_tecsql, translate_sql_to_tecsql, update_mappings
 from waitress import serve
 
-# Abilita thick mode per versioni Oracle più vecchie
-try:
-    # Prova prima il path Oracle 11 (più comune)
-    oracledb.init_oracle_client(lib_dir=r"C:\App\Oracle11\clix64\client\bin")
-    print("[OK] Thick mode attivo (Oracle 11 x64)")
-except Exception as e:
-    # Fallback: cerca automaticamente nel PATH
-    try:
-        oracledb.init_oracle_client()
-        print("[OK] Thick mode attivo (auto-detected)")
-    except:
-        print("[WARNING] Thin mode attivo (Oracle Client non trovato)")
-        print("          Per Oracle 11 o piu vecchi, installa Oracle Instant Client")
-        pass
+# Tempi di avvio (ms) per fase, stampati all'avvio del server
+STARTUP_TIMINGS = {'import moduli': (time.perf_counter() - _startup_started) * 1000}
+
+# Thick mode per versioni Oracle più vecchie: in fast start (default)
+# oracledb e init_oracle_client sono rinviati alla prima connessione
+if not oracle_client.FAST_START:
+    oracle_client.ensure_client()
 
 app = Flask(__name__)
 
@@ -64,21 +80,62 @@ DATA_FOLDER = 'Data'
 CONNECTION_FILE = os.path.join(DATA_FOLDER, 'connection_data.json')
 CONNECTION_HISTORY_FILE = os.path.join(DATA_FOLDER, 'connection_history.json')
 SEARCH_HISTORY_FILE = os.path.join(DATA_FOLDER, 'search_history.json')
+DESCRIPTOR_CHOICES_FILE = os.path.join(DATA_FOLDER, 'descriptor_choices.json')
+SNAPSHOT_FOLDER = os.path.join(DATA_FOLDER, 'snapshots')
 
 os.makedirs(DATA_FOLDER, exist_ok=True)
 
 # Connection pool (globale, riutilizzabile)
 connection_pool = None
 
+# Dizionario condiviso fra processi (mmap): JCTNT_SHARED_DICTIONARY=1 usa
+# Data/shared, altrimenti il valore e' la directory (comune a tutti i processi)
+SHARED_DICTIONARY_DIR = os.environ.get('JCTNT_SHARED_DICTIONARY', '')
+if SHARED_DICTIONARY_DIR == '1':
+    SHARED_DICTIONARY_DIR = os.path.join(DATA_FOLDER, 'shared')
+shared_dictionary = SharedDictionary(SHARED_DICTIONARY_DIR) if SHARED_DICTIONARY_DIR else None
+
+# Registrazione delle richieste di traduzione per il replay (JCTNT_CAPTURE_FILE)
+traffic_capture = TrafficCapture.from_env()
+
+# Limiti delle query da tradurre e tempo massimo per traduzione (processi worker)
+query_limits = QueryLimits.from_env()
+translator_pool = TranslatorPool.from_env()
+
 # Cache dizionario (evita reload continuo)
+# 'data' e' un DictionaryStore colonnare condiviso con il traduttore
 dictionary_cache = {
     'data': None,
     'indexes': None,
     'index_columns': None,
+    'table_search': None,
+    'index_catalog': None,
     'timestamp': None,
-    'connection_key': None
+    'connection_key': None,
+    'digest': None,
+    'version': None,
+    'lazy': None,
+    'response': None    # (store, chiave, JSON) dell'ultima risposta cached di /api/connect
 }
 
+# Modalita' lazy (solo nomi FW_TABLES alla connessione, campi al primo uso):
+# JCTNT_LAZY_DICTIONARY=1 come default, oppure 'lazy': true nel body di /api/connect
+LAZY_DICTIONARY = os.environ.get('JCTNT_LAZY_DICTIONARY', '0') == '1'
+
+# Admission control del lavoro Oracle: posti, coda e timeout per query
+# (JCTNT_ORACLE_CONCURRENCY, _QUEUE, _QUEUE_TIMEOUT, _CALL_TIMEOUT)
+oracle_admission = AdmissionController.from_env()
+
+# Caricamenti in background con avanzamento per fase (POST /api/connect con "job": true)
+load_jobs = LoadJobs()
+# Righe lette all'ultimo caricamento, per connection_key (totale atteso nell'avanzamento)
+dictionary_row_counts = {}
+FIELDS_PROGRESS_EVERY = 5000
+
+# Impronte degli ultimi dizionari caricati (per connection_key), per il diff fra ambienti
+MAX_CACHED_DIGESTS = 4
+dictionary_digests = {}
+
 # --- Utility JSON ---
 def read_json(filepath, default):
     if os.path.exists(filepath):
@@ -95,35 +152,42 @@ def write_json(filepath, data):
 
 
 # --- Connection History ---
+# Storici in memoria con scrittura differita su file (vedi history_store.py)
+connection_history = HistoryStore(CONNECTION_HISTORY_FILE, key_fields=('username',),
+                                  sort_field='username', max_entries=100)
+search_history = HistoryStore(SEARCH_HISTORY_FILE, key_fields=('fisico', 'logico'),
+                              sort_field='fisico', max_entries=1000)
+
+# Scelte di descrittore per le tabelle ambigue (per utente e globali)
+descriptor_choices = DescriptorChoices(DESCRIPTOR_CHOICES_FILE)
+
 def get_connection_history():
-    return read_json(CONNECTION_HISTORY_FILE, [])
+    return connection_history.items()
 
 def add_connection_to_history(conn_data):
-    history = get_connection_history()
-    # Controlla duplicati per username
-    existing = next((c for c in history if c['username'] == conn_data['username']), None)
-    if existing:
-        # Aggiorna i dati esistenti
-        existing.update(conn_data)
-    else:
-        history.append(conn_data)
-    # Ordina per username
-    history.sort(key=lambda x: x['username'].lower())
-    write_json(CONNECTION_HISTORY_FILE, history)
+    # Upsert per username (aggiorna i dati esistenti)
+    connection_history.add(conn_data)
 
 # --- Search History ---
 def get_search_history():
-    return read_json(SEARCH_HISTORY_FILE, [])
+    return search_history.items()
 
 def add_search_to_history(table_fisico, table_logico):
-    history = get_search_history()
-    entry = {'fisico': table_fisico, 'logico': table_logico}
-    # Controlla duplicati
-    if entry not in history:
-        history.append(entry)
-        # Ordina per nome fisico
-        history.sort(key=lambda x: x['fisico'].lower())
-        write_json(SEARCH_HISTORY_FILE, history)
+    # Duplicati: stessa entry, conta solo l'uso ('hits')
+    search_history.add({'fisico': table_fisico, 'logico': table_logico})
+
+# --- Asset statici con hash nel nome (cache immutabile) ---
+static_assets = StaticAssets(app.static_folder, enabled=os.environ.get('JCTNT_ASSET_PIPELINE', '1') != '0')
+if static_assets.ensure_built():
+    print(f"[INFO] Asset statici ricostruiti ({len(static_assets.manifest)} file)")
+app.jinja_env.globals['asset_url'] = static_assets.url
+
+@app.route('/static/dist/<path:filename>')
+def static_dist(filename):
+    response = static_assets.response(filename)
+    if response is None:
+        return jsonify({'error': 'Asset non trovato'}), 404
+    return response
 
 # --- API Endpoints ---
 @app.route('/')
@@ -148,226 +212,845 @@ def api_add_search_history():
     add_search_to_history(data.get('fisico', ''), data.get('logico', ''))
     return jsonify({'success': True})
 
-@app.route('/api/translate-query', methods=['POST'])
-def api_translate_query():
-    """Bidirectional translation: TecSQL ↔ SQL (auto-detect direction)"""
+@app.route('/api/search-tables', methods=['GET'])
+def api_search_tables():
+    """Ricerca fuzzy tabelle (stesso ranking di scoreTableMatch lato client)"""
+    search_index = dictionary_cache['table_search']
+    if search_index is None:
+        return jsonify({'error': 'Dizionario non caricato'}), 400
+
+    query = request.args.get('q', '')
+    limit = request.args.get('limit', 10, type=int)
+    min_score = request.args.get('min_score', 50, type=float)
+
+    started = time.perf_counter()
+    result = search_index.search(query, max_results=limit, min_score=min_score)
+    result['took_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return jsonify(result)
+
+@app.route('/api/search-fields', methods=['GET'])
+def api_search_fields():
+    """In quali tabelle/descrittori compare il campo X? (exact / prefix / fuzzy)"""
+    if dictionary_cache['data'] is None:
+        return jsonify({'error': 'Dizionario non caricato'}), 400
+
+    query = request.args.get('q', '')
+    mode = request.args.get('mode', 'exact')
+    limit = request.args.get('limit', 50, type=int)
+    max_distance = request.args.get('max_distance', type=int)
+
+    started = time.perf_counter()
+    try:
+        results = find_fields(query, mode=mode, limit=limit, max_distance=max_distance)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    return jsonify({
+        'results': results,
+        # Modalita' lazy: solo i descrittori gia' caricati
+        'partial': dictionary_cache['lazy'] is not None,
+        'took_ms': round((time.perf_counter() - started) * 1000, 2)
+    })
+
+@app.route('/api/table-fields', methods=['GET'])
+def api_table_fields():
+    """Campi della tabella fisica (in modalita' lazy letti da Oracle al primo uso)"""
+    rows = dictionary_cache['data']
+    if rows is None:
+        return jsonify({'error': 'Dizionario non caricato'}), 400
+
+    table = request.args.get('table', '')
+    if not table.strip():
+        return jsonify({'error': 'Parametro table mancante'}), 400
+    lazy = dictionary_cache['lazy']
+    if lazy is not None:
+        try:
+            return jsonify({'table': table, 'rows': lazy.table_rows(table)})
+        except OracleBusy as e:
+            return busy_response(e)
+        except Exception as e:
+            return jsonify({'error': f'Errore caricamento campi: {str(e)}'}), 400
+    return jsonify({'table': table, 'rows': [rows.row(row_id) for row_id in rows.rows_where('TABELLA_FISICA', table)]})
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+
+@app.route('/api/export', methods=['GET'])
+def api_export():
+    """Export CSV / XLSX del dizionario (filtri: table, descriptor, type), in streaming"""
+    rows = dictionary_cache['data']
+    if rows is None:
+        return jsonify({'error': 'Dizionario non caricato'}), 400
+
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f'Formato non supportato: {export_format}'}), 400
+    filters = parse_filters(request.args)
+
+    lazy = dictionary_cache['lazy']
+    if lazy is not None:
+        # Modalita' lazy: si esporta solo cio' che si puo' caricare per tabella/descrittore
+        if not filters.get('TABELLA_FISICA') and not filters.get('TABELLA_LOGICA'):
+            return jsonify({'error': 'Modalita\' lazy: filtra per tabella o descrittore'}), 400
+        wanted = [name for name in lazy.field_counts
+                  if name.lower() in filters.get('TABELLA_LOGICA', ())]
+        for table in filters.get('TABELLA_FISICA', ()):
+            wanted.extend(lazy.descriptors_for_table(table))
+        try:
+            lazy.ensure(wanted)
+        except OracleBusy as e:
+            return busy_response(e)
+        except Exception as e:
+            return jsonify({'error': f'Errore caricamento campi: {str(e)}'}), 400
+
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    selected = iter_export_rows(rows, filters, skip=lazy.placeholders if lazy is not None else 0)
+    if export_format == 'xlsx':
+        chunks = iter_xlsx(selected)
+    else:
+        chunks = iter_csv(selected, delimiter=';' if request.args.get('sep') == ';' else ',')
+    from datetime import datetime
+    filename = f"jctnt_dizionario_{datetime.now().strftime('%Y%m%d_%H%M')}.{extension}"
+    return Response(stream_with_context(chunks), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+@app.route('/api/table-indexes', methods=['GET'])
+def api_table_indexes():
+    """Indici della tabella (gia' deduplicati, owner risolto, colonne in ordine)"""
+    index_catalog = dictionary_cache['index_catalog']
+    if index_catalog is None:
+        return jsonify({'error': 'Dizionario non caricato'}), 400
+
+    table = request.args.get('table', '')
+    if not table.strip():
+        return jsonify({'error': 'Parametro table mancante'}), 400
+    return jsonify(index_catalog.for_table(table))
+
+@app.route('/api/autocomplete', methods=['POST'])
+def api_autocomplete():
+    """Completamenti TecSQL per la parola al cursore (descrittori, campi, alias)"""
+    if dictionary_cache['data'] is None:
+        return jsonify({'error': 'Dizionario non caricato'}), 400
+
     data = request.get_json(silent=True) or {}
+    text_before_cursor = data.get('text_before_cursor', '')
+    query = data.get('query')
+    try:
+        limit = max(1, min(int(data.get('limit', 20)), 20))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'limit non valido'}), 400
+
+    started = time.perf_counter()
+    lazy = dictionary_cache['lazy']
+    if lazy is not None:
+        try:
+            lazy.ensure_for_query(query or text_before_cursor)
+        except Exception:
+            pass  # Completamenti con i soli descrittori gia' caricati
+    result = autocomplete(text_before_cursor, query=query, limit=limit)
+    result['took_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    return jsonify(result)
+
+def index_advice_for(sql):
+    """Copertura indici delle colonne di predicato (None se indici non caricati)."""
+    index_catalog = dictionary_cache['index_catalog']
+    if index_catalog is None:
+        return None
+    return advise(sql, index_catalog)
+
+TRANSLATORS = {'tecsql': translate_tecsql, 'sql': translate_sql_to_tecsql}
+
+def run_translation(kind, *args):
+    """Traduzione nel pool di worker (con tempo massimo) o, se disattivato, nel thread corrente."""
+    if translator_pool is None:
+        return TRANSLATORS[kind](*args)
+    return translator_pool.translate(kind, *args)
+
+def translate_payload(data):
+    """
+    Bidirectional translation: TecSQL ↔ SQL (auto-detect direction).
+    Ritorna (body, status): condiviso fra la route Flask e async_server.
+    """
     query = data.get('query', '')
     chosen_descriptor = data.get('chosen_descriptor')
     strip_params = bool(data.get('strip_params', False))
+    index_advice = bool(data.get('index_advice', False))
+    # Traduzione live dall'editor: solo i segmenti cambiati vengono ritradotti
+    incremental = bool(data.get('incremental', False))
+    user = DescriptorChoices.user_id(data.get('user'))
+
+    try:
+        if isinstance(query, str):
+            query_limits.check(query)
+    except TranslationLimit as exc:
+        return {'error': str(exc), 'limit': exc.limit}, exc.status
 
     normalized = normalize_query_text(query)
     if not normalized:
-        return jsonify({'error': 'Query vuota'}), 400
+        return {'error': 'Query vuota'}, 400
 
     # Auto-detect direction (TecSQL has $, SQL doesn't)
     is_tecsql = '$' in normalized
 
     try:
+        # Modalita' lazy: campi dei descrittori/tabelle citati letti al primo uso
+        lazy = dictionary_cache['lazy']
+        if lazy is not None:
+            lazy.ensure_for_query(normalized)
+
         if is_tecsql:
             # TecSQL → SQL
-            sql = translate_tecsql(normalized, strip_params=strip_params)
-            return jsonify({
+            sql = run_translation('tecsql', normalized, strip_params, incremental)
+            body = {
                 'direction': 'tecsql_to_sql',
                 'normalized_query': normalized,
                 'sql': sql
-            })
+            }
+            if index_advice:
+                body['index_advice'] = index_advice_for(sql)
+            return body, 200
         else:
             # SQL → TecSQL
-            result = translate_sql_to_tecsql(normalized, chosen_descriptor)
+            remembered = descriptor_choices.for_user(user, normalized)
+            # Scelte ricordate passate dal client (replay di una cattura), solo per questa richiesta
+            for choice in data.get('remembered_choices') or []:
+                if not isinstance(choice, dict) or not {'table', 'fields_used', 'descriptor'} <= choice.keys():
+                    return {'error': 'remembered_choices non valido'}, 400
+                remembered[descriptor_choice_key(choice['table'], choice['fields_used'])] = choice['descriptor']
+            result = run_translation('sql', normalized, chosen_descriptor, remembered, incremental)
 
             if result.get('ambiguous'):
-                return jsonify({
+                return {
                     'direction': 'sql_to_tecsql',
                     'ambiguous': True,
                     'table': result['table'],
                     'candidates': result['candidates'],
                     'fields_used': result['fields_used']
-                }), 200
+                }, 200
 
             if not result['success']:
-                return jsonify({'error': result['error']}), 400
+                return {'error': result['error']}, 400
 
-            return jsonify({
+            # Scelte esplicite ricordate: la prossima volta niente richiesta 'ambiguous'
+            for choice in result.get('descriptor_choices', []):
+                if choice['source'] == 'chosen':
+                    descriptor_choices.remember(user, choice['table'], choice['fields_used'], choice['descriptor'])
+
+            body = {
                 'direction': 'sql_to_tecsql',
                 'normalized_query': normalized,
                 'tecsql': result['tecsql'],
                 'descriptors_used': result.get('descriptors_used', {}),
                 'partial_translation': result.get('partial_translation', False),
                 'untranslated_fields': result.get('untranslated_fields', [])
-            })
+            }
+            if result.get('descriptor_choices'):
+                body['descriptor_choices'] = result['descriptor_choices']
+            if index_advice:
+                body['index_advice'] = index_advice_for(normalized)
+            return body, 200
 
+    except OracleBusy as exc:
+        return {'error': str(exc), 'retry_after': exc.retry_after}, 503
+    except TranslationLimit as exc:
+        return {'error': str(exc), 'limit': exc.limit}, exc.status
     except Exception as exc:
-        return jsonify({'error': str(exc)}), 400
+        return {'error': str(exc)}, 400
 
-@app.route('/api/connect', methods=['POST'])
-def api_connect():
-    global connection_pool, dictionary_cache
+def retry_headers(body):
+    """Retry-After per le risposte 503 di translate_payload."""
+    return {'Retry-After': str(body['retry_after'])} if 'retry_after' in body else {}
 
-    data = request.json
-    host = data.get('host', '')
-    port = data.get('port', '1521')
-    sid = data.get('sid', '')
-    username = data.get('username', '')
-    password = data.get('password', '')
+def dictionary_version():
+    """Impronta del dizionario caricato (None se assente o in modalita' lazy)."""
+    digest = dictionary_cache['digest']
+    return digest.version if digest else None
+
+def translate_request(data):
+    """translate_payload + registrazione della richiesta se la cattura e' attiva."""
+    started = time.perf_counter()
+    body, status = translate_payload(data)
+    if traffic_capture is not None:
+        traffic_capture.record(data, body, status, (time.perf_counter() - started) * 1000, dictionary_version())
+    return body, status
+
+@app.route('/api/translate-query', methods=['POST'])
+def api_translate_query():
+    """Bidirectional translation: TecSQL ↔ SQL (auto-detect direction)"""
+    body, status = translate_request(request.get_json(silent=True) or {})
+    return jsonify(body), status, retry_headers(body)
+
+# --- Traduzione script (streaming) ---
+def script_options(args):
+    """Opzioni di traduzione dalla query string (?strip_params=1&index_advice=1)."""
+    return {
+        'strip_params': args.get('strip_params', '') in ('1', 'true'),
+        'index_advice': args.get('index_advice', '') in ('1', 'true')
+    }
+
+def script_record(index, line, text, options):
+    """Riga NDJSON di uno statement: risposta di translate_payload + posizione."""
+    if text is None:
+        return {'index': index, 'line': line, 'ok': False,
+                'error': f'Statement oltre {MAX_STATEMENT_CHARS} caratteri, non tradotto'}
+    body, status = translate_payload(dict(options, query=text))
+    return dict(body, index=index, line=line, ok=status == 200)
+
+def script_summary(statements, errors, started):
+    return {'done': True, 'statements': statements, 'errors': errors,
+            'took_ms': round((time.perf_counter() - started) * 1000, 1)}
+
+def translate_script_lines(stream, options):
+    started = time.perf_counter()
+    errors = 0
+    index = 0
+    for index, (line, text) in enumerate(iter_statements(stream), 1):
+        record = script_record(index, line, text, options)
+        errors += not record['ok']
+        yield json.dumps(record) + '\n'
+    yield json.dumps(script_summary(index, errors, started)) + '\n'
+
+@app.route('/api/translate-script', methods=['POST'])
+def api_translate_script():
+    """
+    Script multi-statement (corpo text/plain o multipart con campo 'file'):
+    una riga JSON per statement, inviata appena tradotto, poi il riepilogo.
+    """
+    upload = request.files.get('file') if request.mimetype == 'multipart/form-data' else None
+    stream = upload.stream if upload else request.stream
+    lines = translate_script_lines(stream, script_options(request.args))
+    return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+
+# --- Caricamento dizionario ---
+QUERY_FIELDS = """
+    SELECT 
+        TAB.TABLEDBNAME    AS TABELLA_FISICA, 
+        FIE.DBFIELDNAME    AS CAMPO_FISICO,
+        TAB.TABLENAME      AS TABELLA_LOGICA,
+        FIE.TABLEFIELDNAME AS CAMPO_LOGICO,
+        FIE.TYPE           AS TIPO, 
+        FIE.WIDTH          AS AMPIEZZA, 
+        FIE.DECIMALS       AS DECIMALI
+    FROM FW_TABLES TAB
+    JOIN FW_TABLE_FIELDS FIE ON (FIE.TABLENAME = TAB.TABLENAME)
+"""
+
+QUERY_INDEXES = """
+    SELECT table_owner, table_name, index_name, uniqueness, owner AS index_owner
+    FROM all_indexes
+"""
+
+QUERY_INDEX_COLUMNS = """
+    SELECT table_owner, table_name, index_owner, index_name, column_name, column_position
+    FROM all_ind_columns
+    ORDER BY index_name, column_position
+"""
 
+def index_row(row):
+    return {
+        'TABLE_OWNER': row[0] or '',
+        'TABLE_NAME': row[1] or '',
+        'INDEX_NAME': row[2] or '',
+        'UNIQUENESS': row[3] or '',
+        'INDEX_OWNER': row[4] or ''
+    }
+
+def index_column_row(row):
+    return {
+        'TABLE_OWNER': row[0] or '',
+        'TABLE_NAME': row[1] or '',
+        'INDEX_OWNER': row[2] or '',
+        'INDEX_NAME': row[3] or '',
+        'COLUMN_NAME': row[4] or '',
+        'COLUMN_POSITION': row[5] if row[5] is not None else ''
+    }
+
+def parse_connect_request(data):
+    """Ritorna (conn_data, connection_key) dal body di /api/connect."""
+    conn_data = {
+        'host': data.get('host', ''),
+        'port': data.get('port', '1521'),
+        'sid': data.get('sid', ''),
+        'username': data.get('username', ''),
+        'password': data.get('password', '')
+    }
     # Chiave univoca per cache
-    connection_key = f"{host}:{port}:{sid}:{username}"
+    connection_key = f"{conn_data['host']}:{conn_data['port']}:{conn_data['sid']}:{conn_data['username']}"
+    return conn_data, connection_key
+
+def wants_lazy(data):
+    """Modalita' lazy richiesta nel body di /api/connect (default: LAZY_DICTIONARY)."""
+    return bool(data.get('lazy', LAZY_DICTIONARY))
+
+def cache_version(digest, indexes, index_columns):
+    """
+    Versione del dizionario per la cache del browser (IndexedDB): impronta dei
+    campi + indici. None in modalita' lazy (il browser non tiene i campi).
+    """
+    if digest is None:
+        return None
+    h = hashlib.blake2b(digest.version.encode('utf-8'), digest_size=16)
+    h.update(json.dumps([indexes, index_columns], sort_keys=True, default=str).encode('utf-8'))
+    return h.hexdigest()
+
+def dictionary_response(message, known_version=None):
+    """
+    Body di /api/connect per il dizionario attivo. Se il browser ha gia' questa
+    versione (known_version) niente righe: 'unchanged' e usa la sua copia.
+    """
+    version = dictionary_cache['version']
+    body = {
+        'success': True,
+        'message': message,
+        'version': version,
+        'connection_key': dictionary_cache['connection_key']
+    }
+    if version is not None and known_version == version:
+        body['unchanged'] = True
+        return body
+    body['data'] = dictionary_cache['data'].to_records()
+    body['indexes'] = dictionary_cache['indexes']
+    body['index_columns'] = dictionary_cache['index_columns']
+    return body
 
+def dictionary_json(message, known_version=None):
+    """
+    dictionary_response codificato in JSON (bytes). Con le righe il JSON si
+    codifica una volta per dizionario e messaggio: in cache restano solo i
+    byte, i record sono temporanei.
+    """
+    store = dictionary_cache['data']
+    version = dictionary_cache['version']
+    if version is not None and known_version == version:
+        return app.json.dumps(dictionary_response(message, known_version)).encode('utf-8')
+    key = (version, message)
+    cached = dictionary_cache['response']
+    if cached is None or cached[0] is not store or cached[1] != key:
+        encoded = app.json.dumps(dictionary_response(message)).encode('utf-8')
+        cached = dictionary_cache['response'] = (store, key, encoded)
+    return cached[2]
+
+def cached_connect_response(connection_key, lazy=False, known_version=None):
+    """Risposta di /api/connect dalla cache (JSON, bytes), o None se la connessione e' diversa."""
     # Check cache (riutilizza dati se connessione uguale)
     if (dictionary_cache['data'] is not None and
-        dictionary_cache['connection_key'] == connection_key):
+        dictionary_cache['connection_key'] == connection_key and
+        (dictionary_cache['lazy'] is not None) == lazy):
         print("[INFO] Utilizzo cache dizionario (no query)")
-        return jsonify({
-            'success': True,
-            'message': f'Connessione riuscita (cached). {len(dictionary_cache["data"])} campi.',
-            'data': dictionary_cache['data'],
-            'indexes': dictionary_cache['indexes'],
-            'index_columns': dictionary_cache['index_columns']
+        if lazy:
+            return app.json.dumps(lazy_connect_response(dictionary_cache['lazy'], cached=True)).encode('utf-8')
+        return dictionary_json(
+            f'Connessione riuscita (cached). {len(dictionary_cache["data"])} campi.', known_version)
+    return None
+
+def no_progress(phase, **detail):
+    pass
+
+def activate_dictionary(rows, indexes, index_columns, connection_key, lazy=None, progress=no_progress):
+    """Rende attivo un dizionario: mapping del traduttore, indici di ricerca, cache."""
+    # Dizionario lazy precedente: fermato prima, cosi' un suo caricamento in corso
+    # non ripubblica i mapping vecchi sopra quelli nuovi
+    previous_lazy = dictionary_cache['lazy']
+    if previous_lazy is not None and previous_lazy is not lazy:
+        previous_lazy.close()
+
+    # Aggiorna mapping TecSql per il traduttore (e, in background, per i worker)
+    progress('mappings', rows=len(rows))
+    update_mappings(rows)
+    if translator_pool is not None:
+        translator_pool.prepare(rows)
+
+    # Indici di ricerca tabelle (prefix / trigrammi / BK-tree)
+    progress('search_index')
+    table_search = TableSearchIndex(rows, field_counts=lazy.field_counts if lazy else None)
+
+    # Indici Oracle raggruppati per tabella (dedup + owner + colonne ordinate)
+    index_catalog = IndexCatalog(indexes, index_columns)
+
+    # Impronte per descrittore / tabella fisica (diff fra dizionari): solo a dizionario completo
+    digest = None
+    if lazy is None:
+        progress('digest')
+        digest = SchemaDigest.from_store(rows, {'connection_key': connection_key})
+        dictionary_digests.pop(connection_key, None)
+        dictionary_digests[connection_key] = digest
+        while len(dictionary_digests) > MAX_CACHED_DIGESTS:
+            dictionary_digests.pop(next(iter(dictionary_digests)))
+
+    # Salva in cache (per ultima: chi vede 'data' trova gia' mapping e indici)
+    dictionary_cache['response'] = None
+    dictionary_cache['table_search'] = table_search
+    dictionary_cache['index_catalog'] = index_catalog
+    dictionary_cache['indexes'] = indexes
+    dictionary_cache['index_columns'] = index_columns
+    dictionary_cache['connection_key'] = connection_key
+    dictionary_cache['digest'] = digest
+    dictionary_cache['version'] = cache_version(digest, indexes, index_columns)
+    dictionary_cache['lazy'] = lazy
+    from datetime import datetime
+    dictionary_cache['timestamp'] = datetime.now()
+    dictionary_cache['data'] = rows
+
+def dictionary_source(conn_data):
+    """Sorgente del dizionario per una connessione (vedi dictionary_source.py)."""
+    return OracleSource(conn_data, admission=oracle_admission)
+
+def fetch_dictionary(conn_data, progress=no_progress, expected_rows=None, source=None):
+    """
+    Legge campi e indici dalla sorgente (default: Oracle, dictionary_source).
+    progress(fase, **dettagli) riceve l'avanzamento (load job, expected_rows:
+    righe attese se note); gli errori oracledb, OracleBusy (nessun posto in
+    oracle_admission) e OracleTimeout passano al chiamante.
+
+    Returns: (DictionaryStore, indexes, index_columns)
+    """
+    if source is None:
+        source = dictionary_source(conn_data)
+    # In coda (fase 'queued' del load job) finche' non c'e' un posto libero
+    with oracle_admission.slot():
+        conn = None
+        try:
+            progress('connect', host=conn_data['host'], port=conn_data['port'], sid=conn_data['sid'])
+            print(f"[INFO] Connessione a {source.describe()}...")
+            conn = source.connect()
+            print("[OK] Connessione stabilita")
+
+            # Query dizionario campi
+            progress('fields', rows=0, expected=expected_rows)
+            # Righe direttamente nello store colonnare (niente lista di dict)
+            rows = DictionaryStore()
+            count = 0
+            for batch in source.fetch(conn, QUERY_FIELDS):
+                for row in batch:
+                    rows.add_db_row(row)
+                previous, count = count, count + len(batch)
+                if count // FIELDS_PROGRESS_EVERY != previous // FIELDS_PROGRESS_EVERY:
+                    progress('fields', rows=count)
+            progress('fields', rows=count)
+
+            # Query indici
+            progress('indexes')
+            indexes = [index_row(row) for batch in source.fetch(conn, QUERY_INDEXES) for row in batch]
+            progress('indexes', indexes=len(indexes))
+
+            # Query colonne indici
+            progress('index_columns')
+            index_columns = [index_column_row(row)
+                             for batch in source.fetch(conn, QUERY_INDEX_COLUMNS) for row in batch]
+            progress('index_columns', index_columns=len(index_columns))
+            return rows, indexes, index_columns
+        finally:
+            # Chiudi connessione (anche in caso di errore)
+            if conn is not None:
+                source.close(conn)
+                print("[INFO] Connessione chiusa")
+
+def publish_dictionary(conn_data, connection_key, rows, indexes, index_columns, progress=no_progress):
+    """
+    Pubblica un dizionario appena letto: cache, storico connessioni, mapping
+    del traduttore e indici di ricerca.
+    """
+    activate_dictionary(rows, indexes, index_columns, connection_key, progress=progress)
+    progress('cache')
+    dictionary_row_counts[connection_key] = len(rows)
+
+    print(f"[INFO] Caricati {len(rows)} campi, {len(indexes)} indici")
+    print(f"[INFO] Dizionario salvato in cache")
+
+    # Salva connessione corrente e nella history
+    write_json(CONNECTION_FILE, conn_data)
+    add_connection_to_history(conn_data)
+
+    # Modalita' multi-processo: gli altri processi si agganciano alla nuova versione
+    if shared_dictionary is not None:
+        version = shared_dictionary.publish(rows, {
+            'connection_key': connection_key, 'indexes': indexes, 'index_columns': index_columns
         })
+        print(f"[INFO] Dizionario condiviso pubblicato (v{version})")
+
+def store_dictionary(conn_data, connection_key, rows, indexes, index_columns, known_version=None,
+                     progress=no_progress):
+    """publish_dictionary + body della risposta di /api/connect."""
+    publish_dictionary(conn_data, connection_key, rows, indexes, index_columns, progress)
+    progress('serialize')
+    return dictionary_response(
+        f'Connessione riuscita. Caricati {len(rows)} campi e {len(indexes)} indici.', known_version)
 
-    conn = None
-    cursor = None
+def lazy_connect_response(lazy, cached=False):
+    return {
+        'success': True,
+        'lazy': True,
+        'message': (f'Connessione riuscita{" (cached)" if cached else ""}. {len(lazy.field_counts)} descrittori '
+                    f'({len(lazy.loaded)} gia\' caricati, gli altri al primo uso).'),
+        'data': [],
+        'indexes': dictionary_cache['indexes'] or [],
+        'index_columns': dictionary_cache['index_columns'] or []
+    }
+
+def popular_descriptors(lazy):
+    """Descrittori dello storico ricerche, dal piu' usato ('hits')."""
+    entries = sorted(search_history.items(), key=lambda entry: -entry.get('hits', 1))
+    descriptors = []
+    for entry in entries:
+        logico = entry.get('logico')
+        if logico in lazy.field_counts:
+            descriptors.append(logico)
+        else:
+            descriptors.extend(lazy.descriptors_for_table(entry.get('fisico')))
+    return descriptors
 
+def load_lazy_background(lazy, connection_key):
+    """Dopo la connessione lazy: indici Oracle, poi prefetch dei descrittori piu' cercati."""
     try:
-        dsn = oracledb.makedsn(host, port, sid=sid)
-
-        print(f"[INFO] Connessione a {host}:{port}/{sid}...")
-
-        # Connessione diretta (pool temporaneamente disabilitato)
-        conn = oracledb.connect(
-            user=username,
-            password=password,
-            dsn=dsn
-        )
-        print("[OK] Connessione stabilita")
-
-        cursor = conn.cursor()
-        
-        # Query dizionario campi
-        query_fields = """
-            SELECT 
-                TAB.TABLEDBNAME    AS TABELLA_FISICA, 
-                FIE.DBFIELDNAME    AS CAMPO_FISICO,
-                TAB.TABLENAME      AS TABELLA_LOGICA,
-                FIE.TABLEFIELDNAME AS CAMPO_LOGICO,
-                FIE.TYPE           AS TIPO, 
-                FIE.WIDTH          AS AMPIEZZA, 
-                FIE.DECIMALS       AS DECIMALI
-            FROM FW_TABLES TAB
-            JOIN FW_TABLE_FIELDS FIE ON (FIE.TABLENAME = TAB.TABLENAME)
-        """
-        cursor.execute(query_fields)
-        
-        rows = []
-        for row in cursor:
-            rows.append({
-                'TABELLA_FISICA': row[0] or '',
-                'CAMPO_FISICO': row[1] or '',
-                'TABELLA_LOGICA': row[2] or '',
-                'CAMPO_LOGICO': row[3] or '',
-                'TIPO': row[4] or '',
-                'AMPIEZZA': row[5] if row[5] is not None else '',
-                'DECIMALI': row[6] if row[6] is not None else ''
-            })
-        
-        # Query indici
-        query_indexes = """
-            SELECT table_owner, table_name, index_name, uniqueness, owner AS index_owner
-            FROM all_indexes
-        """
-        cursor.execute(query_indexes)
-        
-        indexes = []
-        for row in cursor:
-            indexes.append({
-                'TABLE_OWNER': row[0] or '',
-                'TABLE_NAME': row[1] or '',
-                'INDEX_NAME': row[2] or '',
-                'UNIQUENESS': row[3] or '',
-                'INDEX_OWNER': row[4] or ''
-            })
-        
-        # Query colonne indici
-        query_index_cols = """
-            SELECT table_owner, table_name, index_owner, index_name, column_name, column_position
-            FROM all_ind_columns
-            ORDER BY index_name, column_position
-        """
-        cursor.execute(query_index_cols)
-        
-        index_columns = []
-        for row in cursor:
-            index_columns.append({
-                'TABLE_OWNER': row[0] or '',
-                'TABLE_NAME': row[1] or '',
-                'INDEX_OWNER': row[2] or '',
-                'INDEX_NAME': row[3] or '',
-                'COLUMN_NAME': row[4] or '',
-                'COLUMN_POSITION': row[5] if row[5] is not None else ''
-            })
-        
-        # Salva in cache
-        dictionary_cache['data'] = rows
-        dictionary_cache['indexes'] = indexes
-        dictionary_cache['index_columns'] = index_columns
-        dictionary_cache['connection_key'] = connection_key
-        from datetime import datetime
-        dictionary_cache['timestamp'] = datetime.now()
-
-        print(f"[INFO] Caricati {len(rows)} campi, {len(indexes)} indici")
-        print(f"[INFO] Dizionario salvato in cache")
-
-        # Chiudi connessione
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
-            print("[INFO] Connessione chiusa")
-
-        # Salva connessione corrente e nella history
-        conn_data = {'host': host, 'port': port, 'sid': sid, 'username': username, 'password': password}
-        write_json(CONNECTION_FILE, conn_data)
-        add_connection_to_history(conn_data)
-
-        # Aggiorna mapping TecSql per il traduttore
-        update_mappings(rows)
-
-        return jsonify({
-            'success': True,
-            'message': f'Connessione riuscita. Caricati {len(rows)} campi e {len(indexes)} indici.',
-            'data': rows,
-            'indexes': indexes,
-            'index_columns': index_columns
-        })
-        
-    except oracledb.DatabaseError as e:
-        error, = e.args
-        # Chiudi connessione anche in caso di errore
-        if cursor:
-            try:
-                cursor.close()
-            except:
-                pass
-        if conn:
-            try:
-                conn.close()
-            except:
-                pass
-        return jsonify({'success': False, 'message': f'Errore database: {error.message}'})
+        indexes = [index_row(row) for row in lazy.query(QUERY_INDEXES)]
+        index_columns = [index_column_row(row) for row in lazy.query(QUERY_INDEX_COLUMNS)]
+        if dictionary_cache['lazy'] is lazy:
+            dictionary_cache['index_catalog'] = IndexCatalog(indexes, index_columns)
+            dictionary_cache['indexes'] = indexes
+            dictionary_cache['index_columns'] = index_columns
+            print(f"[INFO] Caricati {len(indexes)} indici (lazy)")
+
+        descriptors = popular_descriptors(lazy)
+        lazy.prefetch(descriptors)
+        print(f"[INFO] Prefetch: {len(lazy.loaded)} descrittori caricati dallo storico ricerche")
     except Exception as e:
-        # Chiudi connessione anche in caso di errore
-        if cursor:
-            try:
-                cursor.close()
-            except:
-                pass
-        if conn:
-            try:
-                conn.close()
-            except:
-                pass
-        return jsonify({'success': False, 'message': f'Errore: {str(e)}'})
+        print(f"[WARN] Caricamento lazy in background interrotto ({connection_key}): {e}")
+
+def connect_lazy(conn_data, connection_key, progress=no_progress):
+    """Connessione lazy: solo i nomi FW_TABLES, campi e indici dopo."""
+    oracledb = oracle_client.get_oracledb()
+    progress('connect', host=conn_data['host'], port=conn_data['port'], sid=conn_data['sid'])
+    dsn = oracledb.makedsn(conn_data['host'], conn_data['port'], sid=conn_data['sid'])
+    print(f"[INFO] Connessione lazy a {conn_data['host']}:{conn_data['port']}/{conn_data['sid']}...")
+
+    def connect():
+        return oracledb.connect(user=conn_data['username'], password=conn_data['password'], dsn=dsn)
+
+    lazy = LazyDictionary(connect, QUERY_FIELDS, on_loaded=update_mappings, admission=oracle_admission)
+    try:
+        lazy.load_tables()
+    except Exception:
+        lazy.close()
+        raise
+    progress('mappings', descriptors=len(lazy.field_counts))
+    activate_dictionary(lazy.store, [], [], connection_key, lazy=lazy)
+    print(f"[INFO] Caricati {len(lazy.field_counts)} descrittori (campi su richiesta)")
+
+    write_json(CONNECTION_FILE, conn_data)
+    add_connection_to_history(conn_data)
+    threading.Thread(target=load_lazy_background, args=(lazy, connection_key),
+                     name='lazy-dictionary', daemon=True).start()
+    return lazy_connect_response(lazy)
+
+@app.route('/api/dictionary-version', methods=['GET'])
+def api_dictionary_version():
+    """Versione del dizionario attivo: il browser rivalida la sua copia senza scaricarla."""
+    return jsonify({
+        'connection_key': dictionary_cache['connection_key'] if dictionary_cache['data'] is not None else None,
+        'version': dictionary_cache['version'],
+        'lazy': dictionary_cache['lazy'] is not None
+    })
+
+def attach_shared_dictionary(store):
+    """Nuova versione pubblicata da un altro processo: nessuna query Oracle."""
+    meta = store.meta
+    activate_dictionary(store, meta['indexes'], meta['index_columns'], meta['connection_key'])
+    print(f"[INFO] Dizionario condiviso v{meta['version']} agganciato ({len(store)} campi)")
+
+if shared_dictionary is not None:
+    shared_dictionary.watch(attach_shared_dictionary)
+
+def busy_response(exc):
+    """503 + Retry-After: lavoro Oracle rifiutato dall'admission control."""
+    body = {'success': False, 'message': str(exc), 'error': str(exc), 'retry_after': exc.retry_after}
+    return jsonify(body), 503, {'Retry-After': str(exc.retry_after)}
+
+@app.errorhandler(OracleBusy)
+def handle_oracle_busy(exc):
+    return busy_response(exc)
+
+@app.route('/api/oracle-admission', methods=['GET'])
+def api_oracle_admission():
+    """Posti Oracle occupati, coda, attese (ms), rifiuti e timeout delle query."""
+    return jsonify(oracle_admission.metrics())
+
+def connect_failure(exc):
+    """Body di /api/connect per un caricamento fallito."""
+    oracledb = oracle_client.get_oracledb()
+    if isinstance(exc, oracledb.DatabaseError):
+        error, = exc.args
+        return {'success': False, 'message': f'Errore database: {error.message}'}
+    return {'success': False, 'message': f'Errore: {str(exc)}'}
+
+def run_load_job(job, conn_data, connection_key, lazy):
+    """Caricamento del load job: stesso percorso di /api/connect, con avanzamento."""
+    try:
+        if lazy:
+            return connect_lazy(conn_data, connection_key, progress=job.update)
+        rows, indexes, index_columns = fetch_dictionary(
+            conn_data, progress=job.update, expected_rows=dictionary_row_counts.get(connection_key))
+        publish_dictionary(conn_data, connection_key, rows, indexes, index_columns, progress=job.update)
+        return {'success': True,
+                'message': f'Connessione riuscita. Caricati {len(rows)} campi e {len(indexes)} indici.'}
+    except Exception as e:
+        return connect_failure(e)
+
+def load_job_response(job, created):
+    return {
+        'success': True,
+        'job_id': job.id,
+        'attached': not created,
+        'status': job.status,
+        'events': f'{APP_PREFIX}/api/load-jobs/{job.id}/events'
+    }
+
+@app.route('/api/connect', methods=['POST'])
+def api_connect():
+    global connection_pool, dictionary_cache
+
+    conn_data, connection_key = parse_connect_request(request.json)
+    lazy = wants_lazy(request.json)
+    known_version = request.json.get('known_version')
+
+    cached = cached_connect_response(connection_key, lazy, known_version)
+    if cached is not None:
+        return app.response_class(cached, mimetype=app.json.mimetype)
+
+    # Caricamento come job: risposta immediata, avanzamento via SSE
+    if request.json.get('job'):
+        # Coda piena: 503 subito invece di un job destinato a fallire
+        if load_jobs.running(connection_key, lazy) is None and oracle_admission.saturated():
+            return busy_response(oracle_admission.busy_error())
+        job, created = load_jobs.start(
+            connection_key, lambda job: run_load_job(job, conn_data, connection_key, lazy), lazy)
+        return jsonify(load_job_response(job, created)), 202
+
+    try:
+        if lazy:
+            return jsonify(connect_lazy(conn_data, connection_key))
+        rows, indexes, index_columns = fetch_dictionary(conn_data)
+        return jsonify(store_dictionary(conn_data, connection_key, rows, indexes, index_columns, known_version))
+    except OracleBusy as e:
+        return busy_response(e)
+    except Exception as e:
+        return jsonify(connect_failure(e))
+
+# --- Load jobs (avanzamento del caricamento) ---
+@app.route('/api/load-jobs', methods=['GET'])
+def api_load_jobs():
+    """Job in corso e conclusi di recente (per riagganciarsi dopo un reload)."""
+    return jsonify({'jobs': load_jobs.snapshots()})
+
+@app.route('/api/load-jobs/<job_id>', methods=['GET'])
+def api_load_job(job_id):
+    job = load_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job non trovato'}), 404
+    return jsonify(job.snapshot())
+
+def last_event_id():
+    """Ultimo evento ricevuto dal client (Last-Event-ID alla riconnessione, o ?since=)."""
+    value = request.headers.get('Last-Event-ID') or request.args.get('since') or 0
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+@app.route('/api/load-jobs/<job_id>/events', methods=['GET'])
+def api_load_job_events(job_id):
+    """Server-Sent Events: progress per fase, poi done / failed. Chiudere lo stream non ferma il job."""
+    job = load_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job non trovato'}), 404
+    events = iter_load_job_events(job, last_event_id())
+    return Response(stream_with_context(events), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# --- Schema diff (impronte per descrittore / tabella) ---
+def snapshot_path(name):
+    safe = re.sub(r'[^\w.-]', '_', str(name or '').strip())
+    return os.path.join(SNAPSHOT_FOLDER, f'{safe}.json') if safe else None
+
+def schema_source(spec):
+    """
+    Dizionario da confrontare: 'current' (default), 'connection:<connection_key>'
+    (uno degli ultimi caricati) o 'snapshot:<nome>'. Ritorna (digest, errore).
+    """
+    spec = spec or 'current'
+    if spec == 'current':
+        digest = dictionary_cache['digest']
+        if digest is None and dictionary_cache['lazy'] is not None:
+            return None, 'Dizionario caricato in modalita\' lazy: diff non disponibile'
+        return digest, None if digest else 'Nessun dizionario caricato'
+    kind, _, name = spec.partition(':')
+    if kind == 'connection':
+        digest = dictionary_digests.get(name)
+        return digest, None if digest else f'Dizionario {name} non in cache'
+    if kind == 'snapshot':
+        path = snapshot_path(name)
+        if not path or not os.path.exists(path):
+            return None, f'Snapshot {name} non trovato'
+        return load_snapshot(path), None
+    return None, f'Sorgente non valida: {spec}'
+
+@app.route('/api/schema-sources', methods=['GET'])
+def api_schema_sources():
+    """Dizionari confrontabili: quelli in cache e gli snapshot salvati"""
+    snapshots = []
+    if os.path.isdir(SNAPSHOT_FOLDER):
+        for filename in sorted(os.listdir(SNAPSHOT_FOLDER)):
+            if filename.endswith('.json'):
+                snapshots.append({'name': filename[:-len('.json')],
+                                  'modified': os.path.getmtime(os.path.join(SNAPSHOT_FOLDER, filename))})
+    return jsonify({
+        'current': dictionary_cache['connection_key'],
+        'current_version': dictionary_version(),
+        'connections': [
+            {'connection_key': key, 'version': digest.version, 'descriptors': len(digest.descriptors)}
+            for key, digest in dictionary_digests.items()
+        ],
+        'snapshots': snapshots
+    })
+
+@app.route('/api/schema-snapshot', methods=['POST'])
+def api_schema_snapshot():
+    """Salva il dizionario corrente (o 'source') come snapshot in Data/snapshots"""
+    data = request.get_json(silent=True) or {}
+    path = snapshot_path(data.get('name'))
+    if not path:
+        return jsonify({'error': 'Nome snapshot mancante'}), 400
+    digest, error = schema_source(data.get('source'))
+    if error:
+        return jsonify({'error': error}), 400
+    os.makedirs(SNAPSHOT_FOLDER, exist_ok=True)
+    from datetime import datetime
+    save_snapshot(digest, path, {'name': data.get('name'), 'created': datetime.now().isoformat(timespec='seconds')})
+    return jsonify({'name': os.path.basename(path)[:-len('.json')], 'version': digest.version,
+                    'descriptors': len(digest.descriptors)})
+
+@app.route('/api/schema-diff', methods=['POST'])
+def api_schema_diff():
+    """Differenze fra due dizionari ('from' / 'to', vedi schema_source)"""
+    data = request.get_json(silent=True) or {}
+    old, error = schema_source(data.get('from'))
+    if error:
+        return jsonify({'error': error}), 400
+    new, error = schema_source(data.get('to'))
+    if error:
+        return jsonify({'error': error}), 400
+    return jsonify(schema_diff(old, new))
+
+STARTUP_TIMINGS['setup app'] = (time.perf_counter() - _startup_started) * 1000 - STARTUP_TIMINGS['import moduli']
+
+def startup_report():
+    """Riga di log con i tempi di avvio (import, setup, client Oracle)."""
+    timings = dict(STARTUP_TIMINGS)
+    timings.update(oracle_client.TIMINGS)
+    parts = [f'{phase} {ms:.0f} ms' for phase, ms in timings.items()]
+    if oracle_client.FAST_START and 'init_oracle_client' not in timings:
+        parts.append('client Oracle rinviato')
+    return ', '.join(parts)
 
 if __name__ == '__main__':
     print('=' * 60)
@@ -378,5 +1061,9 @@ if __name__ == '__main__':
     print(' Network: http://0.0.0.0:5000')
     print('=' * 60)
     print(' Server is ready! Press CTRL+C to stop.')
+    print(f' Avvio: {startup_report()}')
     print('=' * 60)
-    serve(app, host="0.0.0.0", port=5000)
+    if oracle_client.FAST_START:
+        oracle_client.warm_up()
+    # Thread in piu' rispetto al default (4): ogni stream SSE aperto ne occupa uno
+    serve(app, host="0.0.0.0", port=5000, threads=int(os.environ.get('JCTNT_THREADS', 8)))
@@ -0,0 +1,409 @@
+"""
+Modalita' di servizio asincrona (alternativa a `serve(app)` di waitress).
+
+- /api/connect: I/O Oracle con l'API async di python-oracledb (thin mode),
+  quindi un caricamento lento non occupa un thread; in thick mode (Oracle 11)
+  l'API async non e' disponibile e il caricamento gira nell'executor dei
+  caricamenti, separato dagli altri. Solo i caricamenti veri occupano un
+  posto di --load-concurrency: risposte dalla cache e avvio dei load job no.
+- /api/translate-query: traduzione (CPU) in un executor dedicato e limitato.
+- /api/translate-script: lettura a blocchi dal socket e risposta NDJSON in
+  streaming, traduzioni nello stesso executor.
+- /api/load-jobs/<id>/events: stream SSE dell'avanzamento di un caricamento,
+  senza thread per client (polling dello stato del job sul loop).
+- admission control: i caricamenti async occupano un posto di
+  app.oracle_admission come quelli sincroni (503 + Retry-After se saturo) e
+  ogni query ha il timeout JCTNT_ORACLE_CALL_TIMEOUT.
+- tutte le altre route: l'app Flask esistente, chiamata come WSGI in un
+  executor a parte; il body passa al client a blocchi, quindi l'export resta
+  in streaming.
+
+Richiede aiohttp (opzionale, vedi requirements.txt).
+
+Uso:
+    python async_server.py [--port 5000] [--load-concurrency 2]
+                           [--translate-workers 4] [--wsgi-workers 8]
+
+I limiti si possono dare anche via env: JCTNT_LOAD_CONCURRENCY,
+JCTNT_TRANSLATE_WORKERS, JCTNT_WSGI_WORKERS.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from aiohttp import web
+except ImportError:  # pragma: no cover - dipendenza opzionale
+    web = None
+
+import app as jctnt
+import oracle_client
+from dictionary_source import FETCH_BATCH
+from dictionary_store import DictionaryStore
+from load_jobs import SSE_HEARTBEAT, event_name, format_event
+from oracle_admission import OracleBusy, OracleTimeout
+from script_translator import CHUNK_SIZE, StatementSplitter
+
+SSE_POLL_INTERVAL = 0.25
+WSGI_STREAM_BUFFER = 8   # blocchi WSGI in attesa di essere scritti sul socket
+
+
+class AsyncServer:
+
+    def __init__(self, load_concurrency=2, translate_workers=4, wsgi_workers=8):
+        self.load_concurrency = load_concurrency
+        self.load_executor = ThreadPoolExecutor(load_concurrency, thread_name_prefix='load')
+        self.translate_executor = ThreadPoolExecutor(translate_workers, thread_name_prefix='translate')
+        self.wsgi_executor = ThreadPoolExecutor(wsgi_workers, thread_name_prefix='wsgi')
+        self._load_slots = None
+
+    # --- Helpers ---
+    async def _run(self, executor, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+    async def _json(self, executor, body, status=200):
+        # Le risposte di /api/connect sono decine di MB: serializzazione fuori dal loop
+        text = await self._run(executor, json.dumps, body)
+        return web.Response(text=text, status=status, content_type='application/json')
+
+    # --- /api/connect ---
+    async def connect(self, request):
+        data = await request.json()
+        conn_data, connection_key = jctnt.parse_connect_request(data)
+
+        lazy = jctnt.wants_lazy(data)
+        known_version = data.get('known_version')
+
+        # Cache e load job rispondono subito: niente attesa dietro ai caricamenti in corso
+        cached = await self._run(self.wsgi_executor, jctnt.cached_connect_response,
+                                 connection_key, lazy, known_version)
+        if cached is not None:
+            return web.Response(body=cached, content_type='application/json')
+        if data.get('job'):
+            # Load job: l'app Flask lo avvia nel suo thread e risponde subito
+            return await self._wsgi(request, self.wsgi_executor, body=json.dumps(data).encode())
+
+        # Primo uso: import oracledb + init_oracle_client fuori dal loop
+        oracledb = await self._run(self.wsgi_executor, oracle_client.get_oracledb)
+
+        async with self._load_slots:
+            # Intanto un altro caricamento puo' aver messo in cache lo stesso dizionario
+            cached = await self._run(self.load_executor, jctnt.cached_connect_response,
+                                     connection_key, lazy, known_version)
+            if cached is not None:
+                return web.Response(body=cached, content_type='application/json')
+            if lazy or not oracledb.is_thin_mode():
+                # Lazy (una query, poi letture su richiesta) o thick mode (niente API async):
+                # il loader sincrono gira nell'executor dei caricamenti
+                return await self._wsgi(request, self.load_executor, body=json.dumps(data).encode())
+
+            try:
+                async with self._admitted():
+                    rows, indexes, index_columns = await self._fetch_dictionary(conn_data)
+            except OracleBusy as e:
+                return web.json_response({'success': False, 'message': str(e), 'error': str(e),
+                                          'retry_after': e.retry_after},
+                                         status=503, headers={'Retry-After': str(e.retry_after)})
+            except oracledb.DatabaseError as e:
+                error, = e.args
+                return web.json_response({'success': False, 'message': f'Errore database: {error.message}'})
+            except Exception as e:
+                return web.json_response({'success': False, 'message': f'Errore: {str(e)}'})
+
+            body = await self._run(self.load_executor, jctnt.store_dictionary,
+                                   conn_data, connection_key, rows, indexes, index_columns, known_version)
+            return await self._json(self.load_executor, body)
+
+    @contextlib.asynccontextmanager
+    async def _admitted(self):
+        """Posto in app.oracle_admission (l'attesa in coda gira nell'executor dei caricamenti)."""
+        admission = jctnt.oracle_admission
+        acquire = asyncio.ensure_future(self._run(self.load_executor, admission.acquire))
+        try:
+            await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            # Client disconnesso durante l'attesa: il posto, se arriva, va restituito
+            acquire.add_done_callback(lambda f: f.cancelled() or f.exception() or admission.release())
+            raise
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            admission.release((time.perf_counter() - started) * 1000)
+
+    async def _call(self, coro):
+        """Query con il timeout di oracle_admission (l'annullamento chiude la chiamata)."""
+        admission = jctnt.oracle_admission
+        try:
+            return await asyncio.wait_for(coro, admission.call_timeout or None)
+        except asyncio.TimeoutError:
+            admission.timed_out()
+            raise OracleTimeout(admission.call_timeout) from None
+
+    async def _fetch_dictionary(self, conn_data):
+        oracledb = oracle_client.get_oracledb()
+        dsn = oracledb.makedsn(conn_data['host'], conn_data['port'], sid=conn_data['sid'])
+        print(f"[INFO] Connessione async a {conn_data['host']}:{conn_data['port']}/{conn_data['sid']}...")
+        conn = await oracledb.connect_async(user=conn_data['username'], password=conn_data['password'], dsn=dsn)
+        try:
+            if jctnt.oracle_admission.call_timeout:
+                # Limite anche per singolo round trip, applicato dal driver
+                conn.call_timeout = int(jctnt.oracle_admission.call_timeout * 1000)
+            cursor = conn.cursor()
+            try:
+                rows = DictionaryStore()
+
+                async def fetch_fields():
+                    await cursor.execute(jctnt.QUERY_FIELDS)
+                    while True:
+                        batch = await cursor.fetchmany(FETCH_BATCH)
+                        if not batch:
+                            break
+                        for row in batch:
+                            rows.add_db_row(row)
+
+                await self._call(fetch_fields())
+                indexes = [jctnt.index_row(row)
+                           for row in await self._call(self._query(cursor, jctnt.QUERY_INDEXES))]
+                index_columns = [jctnt.index_column_row(row)
+                                 for row in await self._call(self._query(cursor, jctnt.QUERY_INDEX_COLUMNS))]
+            finally:
+                cursor.close()
+        finally:
+            try:
+                await conn.close()
+                print("[INFO] Connessione chiusa")
+            except Exception:
+                pass
+        return rows, indexes, index_columns
+
+    async def _query(self, cursor, sql):
+        await cursor.execute(sql)
+        result = []
+        while True:
+            batch = await cursor.fetchmany(FETCH_BATCH)
+            if not batch:
+                return result
+            result.extend(batch)
+
+    # --- /api/translate-query ---
+    async def translate(self, request):
+        try:
+            data = await request.json()
+        except ValueError:
+            data = {}
+        body, status = await self._run(self.translate_executor, jctnt.translate_request, data or {})
+        return web.json_response(body, status=status, headers=jctnt.retry_headers(body))
+
+    # --- /api/translate-script ---
+    async def translate_script(self, request):
+        started = time.perf_counter()
+        options = jctnt.script_options(request.query)
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+        await response.prepare(request)
+
+        splitter = StatementSplitter()
+        counts = {'statements': 0, 'errors': 0}
+
+        def translate(statements):
+            lines = []
+            for line, text in statements:
+                counts['statements'] += 1
+                record = jctnt.script_record(counts['statements'], line, text, options)
+                counts['errors'] += not record['ok']
+                lines.append(json.dumps(record) + '\n')
+            return ''.join(lines).encode()
+
+        async for chunk in self._script_chunks(request):
+            statements = splitter.feed_bytes(chunk)
+            if statements:
+                await response.write(await self._run(self.translate_executor, translate, statements))
+        payload = await self._run(self.translate_executor, translate, splitter.finish())
+        summary = jctnt.script_summary(counts['statements'], counts['errors'], started)
+        await response.write(payload + (json.dumps(summary) + '\n').encode())
+        await response.write_eof()
+        return response
+
+    async def _script_chunks(self, request):
+        if request.content_type == 'multipart/form-data':
+            async for part in await request.multipart():
+                if part.name == 'file':
+                    while True:
+                        chunk = await part.read_chunk(CHUNK_SIZE)
+                        if not chunk:
+                            return
+                        yield chunk
+            return
+        async for chunk in request.content.iter_chunked(CHUNK_SIZE):
+            yield chunk
+
+    # --- /api/load-jobs/<id>/events ---
+    async def load_job_events(self, request):
+        job = jctnt.load_jobs.get(request.match_info['job_id'])
+        if job is None:
+            return web.json_response({'error': 'Job non trovato'}, status=404)
+        try:
+            seq = int(request.headers.get('Last-Event-ID') or request.query.get('since') or 0)
+        except ValueError:
+            seq = 0
+        response = web.StreamResponse(headers={
+            'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+        await response.prepare(request)
+        await response.write(b'retry: 2000\n\n')
+        idle = 0.0
+        while True:
+            snapshot = job.snapshot()
+            if snapshot['seq'] != seq or snapshot['status'] != 'running':
+                seq = snapshot['seq']
+                await response.write(format_event(event_name(snapshot), snapshot, seq).encode())
+                if snapshot['status'] != 'running':
+                    break
+                idle = 0.0
+            elif idle >= SSE_HEARTBEAT:
+                await response.write(b': ping\n\n')
+                idle = 0.0
+            await asyncio.sleep(SSE_POLL_INTERVAL)
+            idle += SSE_POLL_INTERVAL
+        await response.write_eof()
+        return response
+
+    # --- Tutto il resto: app Flask via WSGI ---
+    async def fallback(self, request):
+        return await self._wsgi(request, self.wsgi_executor)
+
+    async def _wsgi(self, request, executor, body=None):
+        if body is None:
+            body = await request.read()
+        server_name, _, server_port = request.host.partition(':')
+        environ = {
+            'REQUEST_METHOD': request.method,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': request.path,
+            'QUERY_STRING': request.query_string,
+            'SERVER_NAME': server_name,
+            'SERVER_PORT': server_port or ('443' if request.scheme == 'https' else '80'),
+            'SERVER_PROTOCOL': f'HTTP/{request.version.major}.{request.version.minor}',
+            'REMOTE_ADDR': request.remote or '',
+            'CONTENT_TYPE': request.headers.get('Content-Type', ''),
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': request.scheme,
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in request.headers.items():
+            key = 'HTTP_' + name.upper().replace('-', '_')
+            if key not in ('HTTP_CONTENT_TYPE', 'HTTP_CONTENT_LENGTH'):
+                environ[key] = value
+
+        # Body in streaming (export, traduzione script): l'iteratore WSGI gira tutto
+        # in un thread dell'executor e passa i blocchi al loop attraverso una coda limitata
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue(WSGI_STREAM_BUFFER)
+        started = loop.create_future()
+        aborted = threading.Event()
+
+        def start_response(status, headers, exc_info=None):
+            def deliver():
+                if not started.done():
+                    started.set_result((int(status.split(' ', 1)[0]), headers))
+            loop.call_soon_threadsafe(deliver)
+
+        def put(chunk):
+            if aborted.is_set():
+                raise ConnectionAbortedError('client disconnesso')
+            asyncio.run_coroutine_threadsafe(chunks.put(chunk), loop).result()
+
+        def call():
+            result = jctnt.app.wsgi_app(environ, start_response)
+            try:
+                for chunk in result:
+                    if chunk:
+                        put(chunk)
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+                if not aborted.is_set():
+                    put(None)
+
+        task = asyncio.ensure_future(self._run(executor, call))
+        await asyncio.wait({started, task}, return_when=asyncio.FIRST_COMPLETED)
+        if not started.done():
+            task.result()  # errore prima di start_response
+        status, headers = started.result()
+        response = web.StreamResponse(status=status)
+        for name, value in headers:
+            response.headers.add(name, value)
+        try:
+            await response.prepare(request)
+            while True:
+                chunk = await chunks.get()
+                if chunk is None:
+                    break
+                await response.write(chunk)
+            await response.write_eof()
+        finally:
+            if not task.done():
+                # Client disconnesso: il thread dell'executor si ferma al prossimo blocco
+                aborted.set()
+                task.add_done_callback(lambda f: f.cancelled() or f.exception())
+                while not chunks.empty():
+                    chunks.get_nowait()
+        await task
+        return response
+
+    # --- App ---
+    async def _on_startup(self, _app):
+        self._load_slots = asyncio.Semaphore(self.load_concurrency)
+
+    def make_app(self):
+        if web is None:
+            raise RuntimeError('aiohttp non installato: pip install aiohttp')
+        application = web.Application(client_max_size=64 * 1024 * 1024)
+        application.on_startup.append(self._on_startup)
+        prefix = jctnt.APP_PREFIX
+        application.router.add_post(f'{prefix}/api/connect', self.connect)
+        application.router.add_post(f'{prefix}/api/translate-query', self.translate)
+        application.router.add_post(f'{prefix}/api/translate-script', self.translate_script)
+        application.router.add_get(f'{prefix}/api/load-jobs/{{job_id}}/events', self.load_job_events)
+        application.router.add_route('*', '/{tail:.*}', self.fallback)
+        return application
+
+
+def main():
+    parser = argparse.ArgumentParser(description='JCTNT - modalita\' asincrona')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--load-concurrency', type=int,
+                        default=int(os.environ.get('JCTNT_LOAD_CONCURRENCY', 2)))
+    parser.add_argument('--translate-workers', type=int,
+                        default=int(os.environ.get('JCTNT_TRANSLATE_WORKERS', 4)))
+    parser.add_argument('--wsgi-workers', type=int,
+                        default=int(os.environ.get('JCTNT_WSGI_WORKERS', 8)))
+    options = parser.parse_args()
+
+    server = AsyncServer(options.load_concurrency, options.translate_workers, options.wsgi_workers)
+    print('=' * 60)
+    print(' JCTNT Server Starting (async)...')
+    print(f' URL: http://localhost:{options.port}{jctnt.APP_PREFIX}')
+    print(f' Caricamenti concorrenti: {options.load_concurrency}, '
+          f'traduzioni: {options.translate_workers}, altre route: {options.wsgi_workers}')
+    print(f' Avvio: {jctnt.startup_report()}')
+    print('=' * 60)
+    if oracle_client.FAST_START:
+        oracle_client.warm_up()
+    web.run_app(server.make_app(), host=options.host, port=options.port, print=None)
+
+
+if __name__ == '__main__':
+    main()
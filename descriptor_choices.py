@@ -0,0 +1,138 @@
+"""
+Descriptor choices: scelte di descrittore ricordate per le tabelle ambigue.
+
+Quando una tabella fisica corrisponde a piu' descrittori con tutti i campi
+usati, la prima traduzione chiede quale usare (risposta `ambiguous`); la
+scelta viene ricordata per (tabella fisica, insieme dei campi usati) e le
+traduzioni successive la applicano senza chiedere, riportandola in
+`descriptor_choices`.
+
+- per utente (id del browser, campo `user` della richiesta): l'ultima scelta
+- globale: il descrittore scelto dal maggior numero di utenti (a parita', il
+  piu' recente), usato da chi non ha ancora scelto. Ogni utente vale un voto,
+  la sua scelta attuale: ripetere la stessa scelta non la rafforza. Le scelte
+  senza id utente contano come un solo utente
+
+Persistenza: HistoryStore (Data/descriptor_choices.json + log), un'entry per
+(scope, tabella, campi, descrittore) con 'last_used'; scope 'global' per le
+scelte senza id utente. Le entry scartate dallo store (max_entries) escono
+anche dalle mappe in memoria.
+"""
+import re
+import threading
+
+from history_store import HistoryStore
+from tecsql_translator import descriptor_choice_key
+
+GLOBAL_SCOPE = 'global'
+MAX_USER_ID = 64
+
+_NAME_RE = re.compile(r'[\w$#]+(?:\.[\w$#]+)*')
+
+
+def _user_scope(user):
+    return f'user:{user}'
+
+
+def _query_names(query):
+    """Identificatori della query in minuscolo, con e senza prefisso di schema."""
+    names = set()
+    for name in _NAME_RE.findall(query.lower()):
+        names.add(name)
+        names.update(name.split('.'))
+    return names
+
+
+class DescriptorChoices:
+
+    def __init__(self, filepath, max_entries=5000):
+        self._lock = threading.Lock()
+        self._users = {}     # user → {chiave → descrittore}
+        self._voters = {}    # chiave → {user (None = senza id): (descrittore, last_used)}
+        self._global = {}    # chiave → descrittore scelto da piu' utenti
+        self._store = HistoryStore(filepath, key_fields=('scope', 'table', 'fields', 'descriptor'),
+                                   sort_field='table', max_entries=max_entries, on_evict=self._forget)
+        for entry in sorted(self._store.items(), key=lambda entry: entry.get('last_used', 0)):
+            self._apply(entry)
+
+    @staticmethod
+    def user_id(value):
+        """Id utente dalla richiesta (stringa breve) o None."""
+        if not isinstance(value, str) or not value.strip():
+            return None
+        return value.strip()[:MAX_USER_ID]
+
+    @staticmethod
+    def _parse(entry):
+        """(chiave, utente, descrittore) di un'entry; utente None = senza id, False = scope ignoto."""
+        key = descriptor_choice_key(entry['table'], entry['fields'].split(',') if entry['fields'] else [])
+        if entry['scope'] == GLOBAL_SCOPE:
+            user = None
+        elif entry['scope'].startswith('user:'):
+            user = entry['scope'][len('user:'):]
+        else:
+            user = False
+        return key, user, entry['descriptor']
+
+    def _apply(self, entry):
+        key, user, descriptor = self._parse(entry)
+        if user is False:
+            return
+        if user is not None:
+            self._users.setdefault(user, {})[key] = descriptor
+        self._voters.setdefault(key, {})[user] = (descriptor, entry.get('last_used', 0))
+        self._elect(key)
+
+    def _forget(self, entry):
+        """Entry scartata dallo store: toglie la scelta se e' ancora quella attuale."""
+        key, user, descriptor = self._parse(entry)
+        with self._lock:
+            voters = self._voters.get(key, {})
+            if user is False or voters.get(user, (None,))[0] != descriptor:
+                return
+            del voters[user]
+            if user is not None:
+                choices = self._users[user]
+                del choices[key]
+                if not choices:
+                    del self._users[user]
+            self._elect(key)
+
+    def _elect(self, key):
+        voters = self._voters.get(key)
+        if not voters:
+            self._voters.pop(key, None)
+            self._global.pop(key, None)
+            return
+        # Voti per descrittore: (utenti, scelta piu' recente)
+        votes = {}
+        for choice, last_used in voters.values():
+            count, latest = votes.get(choice, (0, 0))
+            votes[choice] = (count + 1, max(latest, last_used))
+        self._global[key] = max(votes, key=votes.get)
+
+    def remember(self, user, table, fields_used, descriptor):
+        """Registra una scelta esplicita: scelta dell'utente (o senza id) e suo voto globale."""
+        key = descriptor_choice_key(table, fields_used)
+        scope = _user_scope(user) if user else GLOBAL_SCOPE
+        entry = self._store.add({'scope': scope, 'table': key[0], 'fields': ','.join(key[1]),
+                                 'descriptor': descriptor})
+        with self._lock:
+            self._apply(entry)
+
+    def flush(self):
+        """Scrive su file le scelte in sospeso (di norma in background e all'uscita)."""
+        self._store.flush()
+
+    def for_user(self, user, query=None):
+        """
+        Scelte valide per l'utente: le sue, poi quelle globali. Dict chiave →
+        descrittore; con `query` solo quelle delle tabelle che la query nomina.
+        """
+        names = None if query is None else _query_names(query)
+        with self._lock:
+            choices = {key: descriptor for key, descriptor in self._global.items()
+                       if names is None or key[0] in names}
+            choices.update((key, descriptor) for key, descriptor in self._users.get(user, {}).items()
+                           if names is None or key[0] in names)
+        return choices
@@ -0,0 +1,174 @@
+"""
+Dictionary export: CSV / XLSX del dizionario in cache, generati a blocchi.
+
+Le righe vengono lette dallo store colonnare e scritte in un buffer che viene
+svuotato ogni EXPORT_BATCH righe: la memoria resta costante e il download
+parte subito anche per l'intero schema.
+
+XLSX: zip scritto in streaming (zipfile su un writer non seekable) con celle
+inline string, quindi senza sharedStrings.xml (che richiederebbe tutte le
+stringhe in memoria prima di scrivere il foglio).
+"""
+import csv
+import io
+import itertools
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from dictionary_store import COLUMNS, NUMERIC_COLUMNS
+
+EXPORT_BATCH = 2000
+
+# Caratteri non ammessi in XML 1.0 (controllo tranne tab/a capo, U+FFFE/U+FFFF)
+_XML_INVALID_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+FILTER_COLUMNS = {
+    'table': 'TABELLA_FISICA',
+    'descriptor': 'TABELLA_LOGICA',
+    'type': 'TIPO',
+}
+
+
+def parse_filters(args):
+    """
+    {colonna: set di valori minuscoli} dai parametri table / descriptor / type
+    (ripetibili o separati da virgola).
+    """
+    filters = {}
+    for param, column in FILTER_COLUMNS.items():
+        values = set()
+        for raw in args.getlist(param):
+            values.update(value.strip().lower() for value in raw.split(',') if value.strip())
+        if values:
+            filters[column] = values
+    return filters
+
+
+def iter_rows(store, filters, skip=0):
+    """
+    Tuple di valori (ordine COLUMNS) delle righe che passano i filtri. `skip`:
+    righe iniziali da saltare (segnaposto dei descrittori in modalita' lazy).
+    """
+    positions = [(COLUMNS.index(column), values) for column, values in filters.items()]
+    for row in itertools.islice(store.iter_values(*COLUMNS), skip, None):
+        if all(str(row[pos]).strip().lower() in values for pos, values in positions):
+            yield row
+
+
+# --- CSV ---
+def iter_csv(rows, delimiter=','):
+    buffer = io.StringIO()
+    buffer.write('\ufeff')  # BOM: Excel riconosce l'UTF-8
+    writer = csv.writer(buffer, delimiter=delimiter, lineterminator='\r\n')
+    writer.writerow(COLUMNS)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count % EXPORT_BATCH == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+# --- XLSX ---
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Dizionario" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetData>'
+)
+_SHEET_TAIL = '</sheetData></worksheet>'
+
+_NUMERIC_POSITIONS = {COLUMNS.index(column) for column in NUMERIC_COLUMNS}
+
+
+def _cell(value, numeric):
+    if numeric and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    text = escape(_XML_INVALID_RE.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _sheet_row(values, numeric_positions=_NUMERIC_POSITIONS):
+    cells = ''.join(_cell(value, pos in numeric_positions) for pos, value in enumerate(values))
+    return f'<row>{cells}</row>'
+
+
+class _Sink:
+    """File non seekable per zipfile: accumula i byte fino al prossimo yield."""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.position = 0
+
+    def write(self, data):
+        self.data += data
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = bytes(self.data)
+        self.data.clear()
+        return data
+
+
+def iter_xlsx(rows):
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        archive.writestr('_rels/.rels', _ROOT_RELS)
+        archive.writestr('xl/workbook.xml', _WORKBOOK)
+        archive.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((_SHEET_HEAD + _sheet_row(COLUMNS, ())).encode('utf-8'))
+            batch = []
+            for row in rows:
+                batch.append(_sheet_row(row))
+                if len(batch) >= EXPORT_BATCH:
+                    sheet.write(''.join(batch).encode('utf-8'))
+                    batch = []
+                    yield sink.take()
+            sheet.write((''.join(batch) + _SHEET_TAIL).encode('utf-8'))
+    yield sink.take()
@@ -0,0 +1,60 @@
+"""
+Dictionary source: da dove arrivano le righe del dizionario (FW_TABLES,
+FW_TABLE_FIELDS, indici) lette da fetch_dictionary.
+
+Interfaccia (duck typing):
+    source.describe()          testo per i log ('host:port/sid')
+    source.connect()           apre una connessione
+    source.fetch(conn, sql)    risultato di `sql` a batch (liste di tuple)
+    source.close(conn)         chiude la connessione (errori ignorati)
+
+OracleSource e' il percorso reale (oracledb, timeout per query di
+oracle_admission); tools/fake_oracle.py ha SimulatedSource, con righe
+sintetiche e latenze configurabili, per i benchmark senza Oracle.
+"""
+from contextlib import nullcontext
+
+import oracle_client
+
+# Righe per round trip (cursor.arraysize): 36k campi in 8 fetch invece di 360
+FETCH_BATCH = 5000
+
+
+class OracleSource:
+
+    def __init__(self, conn_data, admission=None, batch_size=FETCH_BATCH):
+        self.conn_data = conn_data
+        self.admission = admission
+        self.batch_size = batch_size
+
+    def describe(self):
+        return f"{self.conn_data['host']}:{self.conn_data['port']}/{self.conn_data['sid']}"
+
+    def connect(self):
+        oracledb = oracle_client.get_oracledb()
+        dsn = oracledb.makedsn(self.conn_data['host'], self.conn_data['port'], sid=self.conn_data['sid'])
+        return oracledb.connect(user=self.conn_data['username'], password=self.conn_data['password'], dsn=dsn)
+
+    def fetch(self, conn, sql):
+        """Batch del risultato; execute + fetch entro il timeout di oracle_admission."""
+        cursor = conn.cursor()
+        cursor.arraysize = self.batch_size
+        try:
+            with self.admission.call(conn) if self.admission else nullcontext():
+                cursor.execute(sql)
+                while True:
+                    batch = cursor.fetchmany()
+                    if not batch:
+                        return
+                    yield batch
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+    def close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
@@ -0,0 +1,141 @@
+"""
+Dictionary store: dizionario FW_TABLES/FW_TABLE_FIELDS in formato colonnare.
+
+Ogni valore distinto (nomi tabella, nomi campo, tipi, ampiezze...) viene
+internato una sola volta in un pool; le righe sono memorizzate come colonne
+di id interi (array 'I'), quindi 36k righe non sono piu' 36k dict da 7 chiavi
+con stringhe duplicate. Il traduttore TecSQL costruisce le sue mappe a partire
+dagli stessi oggetti stringa del pool (vedi update_mappings).
+"""
+import sys
+from array import array
+
+# Ordine delle colonne = ordine della SELECT in api_connect
+COLUMNS = (
+    'TABELLA_FISICA',
+    'CAMPO_FISICO',
+    'TABELLA_LOGICA',
+    'CAMPO_LOGICO',
+    'TIPO',
+    'AMPIEZZA',
+    'DECIMALI',
+)
+COLUMN_INDEX = {name: pos for pos, name in enumerate(COLUMNS)}
+
+# Colonne numeriche: None diventa '' (come nel vecchio formato JSON)
+NUMERIC_COLUMNS = {'AMPIEZZA', 'DECIMALI'}
+
+
+class DictionaryStore:
+    """
+    Dizionario colonnare con stringhe internate e id di riga interi.
+
+    - value id 0 e' sempre '' (valore vuoto)
+    - row id = posizione nelle colonne (0..len-1)
+    """
+
+    def __init__(self):
+        self._values = ['']
+        self._value_ids = {('', str): 0}
+        self._columns = tuple(array('I') for _ in COLUMNS)
+
+    # --- Costruzione ---
+    @classmethod
+    def from_rows(cls, rows):
+        """Costruisce lo store da una lista di dict nel vecchio formato."""
+        store = cls()
+        for row in rows:
+            store.append(tuple(row.get(col, '') for col in COLUMNS))
+        return store
+
+    def intern(self, value):
+        """Ritorna l'id del valore, aggiungendolo al pool se nuovo."""
+        if value is None:
+            return 0
+        # Chiave (valore, tipo): evita che 1, 1.0 e True collassino nello stesso id
+        key = (value, type(value))
+        value_id = self._value_ids.get(key)
+        if value_id is None:
+            if isinstance(value, str):
+                value = sys.intern(value)
+            value_id = len(self._values)
+            self._values.append(value)
+            self._value_ids[key] = value_id
+        return value_id
+
+    def append(self, values):
+        """Aggiunge una riga (sequenza di valori in ordine COLUMNS). Ritorna il row id."""
+        row_id = len(self._columns[0])
+        for column, value in zip(self._columns, values):
+            column.append(self.intern(value))
+        return row_id
+
+    def add_db_row(self, row):
+        """
+        Aggiunge una riga cosi' come arriva dal cursore Oracle, applicando la
+        stessa normalizzazione del vecchio formato (None → '').
+        """
+        return self.append(tuple('' if value is None else value for value in row))
+
+    # --- Accesso ---
+    def __len__(self):
+        return len(self._columns[0])
+
+    def value(self, row_id, column):
+        return self._values[self._columns[COLUMN_INDEX[column]][row_id]]
+
+    def value_id(self, row_id, column):
+        return self._columns[COLUMN_INDEX[column]][row_id]
+
+    def resolve(self, value_id):
+        return self._values[value_id]
+
+    def column_ids(self, column):
+        """Array degli id della colonna (nessuna copia)."""
+        return self._columns[COLUMN_INDEX[column]]
+
+    def row(self, row_id):
+        """Materializza una riga nel formato dict usato dal frontend."""
+        values = self._values
+        return {
+            name: values[column[row_id]]
+            for name, column in zip(COLUMNS, self._columns)
+        }
+
+    def iter_values(self, *columns, start=0, end=None):
+        """Itera tuple di valori per le colonne richieste (senza creare dict), righe start..end."""
+        values = self._values
+        selected = [self._columns[COLUMN_INDEX[c]] for c in columns]
+        if start or end is not None:
+            selected = [column[start:end] for column in selected]
+        for ids in zip(*selected):
+            yield tuple(values[value_id] for value_id in ids)
+
+    def __iter__(self):
+        for row_id in range(len(self)):
+            yield self.row(row_id)
+
+    def to_records(self):
+        """Lista di dict per la risposta JSON di /api/connect."""
+        return list(self)
+
+    def rows_where(self, column, value):
+        """Row id delle righe con column == value (confronto sull'id internato)."""
+        value_id = self._value_ids.get((value, type(value)))
+        if value_id is None:
+            return []
+        ids = self._columns[COLUMN_INDEX[column]]
+        return [row_id for row_id, current in enumerate(ids) if current == value_id]
+
+    # --- Diagnostica ---
+    @property
+    def distinct_values(self):
+        return len(self._values)
+
+    def memory_usage(self):
+        """Stima in byte di pool + colonne (stringhe incluse, contate una volta)."""
+        total = sys.getsizeof(self._values) + sys.getsizeof(self._value_ids)
+        total += sum(sys.getsizeof(value) for value in self._values)
+        total += sum(sys.getsizeof(key) for key in self._value_ids)
+        total += sum(column.buffer_info()[1] * column.itemsize for column in self._columns)
+        return total
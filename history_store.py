@@ -0,0 +1,247 @@
+"""
+History store: storico connessioni/ricerche in memoria con scrittura differita.
+
+- le richieste leggono e aggiornano solo la copia in memoria (sotto lock)
+- ogni aggiornamento viene accodato; un thread di background lo appende a
+  `<file>.log` (una riga JSON per entry, stato completo → replay idempotente)
+- quando il log supera `compact_every` righe, lo stato viene riscritto nel
+  file JSON principale (tmp + os.replace) e il log azzerato
+- il numero di entry e' limitato a `max_entries` (si scartano le meno usate
+  di recente; `on_evict(entry)` viene chiamato per ognuna, sotto il lock)
+- piu' processi possono condividere gli stessi file (dizionario condiviso):
+  append e compattazione avvengono sotto un lock di file (`<file>.lock`) e la
+  compattazione fonde prima lo stato su disco, cosi' le entry scritte dagli
+  altri processi non si perdono. Ogni riga del log e' un uso: per chiave,
+  hits = hits del file principale + righe del log di tutti i processi,
+  last_used = il piu' recente
+
+Il file JSON principale resta una lista di dict, compatibile con il formato
+precedente (le entry hanno in piu' 'hits' e 'last_used').
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
+@contextmanager
+def file_lock(path):
+    """Lock esclusivo fra processi sul file `path` (creato se manca)."""
+    with open(path, 'a+b') as f:
+        if os.name == 'nt':
+            # LK_LOCK riprova per ~10 s, poi OSError
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == 'nt':
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class HistoryStore:
+
+    def __init__(self, filepath, key_fields, sort_field, max_entries=500,
+                 flush_interval=1.0, compact_every=200, on_evict=None):
+        self.filepath = filepath
+        self.log_path = filepath + '.log'
+        self.lock_path = filepath + '.lock'
+        self.key_fields = tuple(key_fields)
+        self.sort_field = sort_field
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self.compact_every = compact_every
+        self.on_evict = on_evict
+
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._entries = {}  # key → entry (dict non mutato dopo l'inserimento)
+        self._pending = []
+        self._log_lines = 0
+        self._sorted = None
+        self._wakeup = threading.Event()
+        self._thread = None
+
+        self._load()
+        atexit.register(self.flush)
+
+    # --- Caricamento ---
+    def _key(self, entry):
+        return tuple(entry.get(field, '') for field in self.key_fields)
+
+    def _read_files(self):
+        """Entry del file principale (in ordine d'uso) ed entry del log."""
+        entries = []
+        logged = []
+        if os.path.exists(self.filepath):
+            try:
+                with open(self.filepath, 'r', encoding='utf-8') as f:
+                    entries = json.load(f)
+            except (OSError, ValueError):
+                entries = []
+        # Le entry del file principale sono ordinate per nome: ripristina l'ordine d'uso
+        entries = sorted(
+            (entry for entry in entries if isinstance(entry, dict)),
+            key=lambda entry: entry.get('last_used', 0)
+        )
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        logged.append(json.loads(line))
+                    except ValueError:
+                        continue  # riga troncata da un arresto brusco
+        return entries, logged
+
+    def _count(self, state, entry):
+        """Un uso registrato (riga del log o add in sospeso): +1 hit, campi dell'uso piu' recente."""
+        key = self._key(entry)
+        current = state.pop(key, None)
+        if current is None:
+            state[key] = dict(entry, hits=1)
+            return
+        latest = entry if entry.get('last_used', 0) >= current.get('last_used', 0) else current
+        state[key] = dict(latest, hits=current.get('hits', 0) + 1,
+                          last_used=max(entry.get('last_used', 0), current.get('last_used', 0)))
+
+    def _replay(self):
+        """Stato su disco (di tutti i processi) in ordine d'uso, e righe del log."""
+        entries, logged = self._read_files()
+        state = {}
+        for entry in entries:
+            state[self._key(entry)] = entry
+        for entry in logged:
+            self._count(state, entry)
+        return dict(sorted(state.items(), key=lambda item: item[1].get('last_used', 0))), len(logged)
+
+    def _load(self):
+        self._entries, self._log_lines = self._replay()
+        self._evict()
+
+    def _evict(self):
+        # dict preserva l'ordine di inserimento: il primo e' il meno recente
+        while len(self._entries) > self.max_entries:
+            entry = self._entries.pop(next(iter(self._entries)))
+            if self.on_evict is not None:
+                self.on_evict(entry)
+
+    # --- Lettura ---
+    def items(self):
+        """Lista ordinata per sort_field (cache invalidata a ogni modifica)."""
+        with self._lock:
+            if self._sorted is None:
+                self._sorted = sorted(
+                    self._entries.values(),
+                    key=lambda entry: str(entry.get(self.sort_field, '')).lower()
+                )
+            return self._sorted
+
+    def get(self, **key_values):
+        with self._lock:
+            return self._entries.get(tuple(key_values.get(f, '') for f in self.key_fields))
+
+    def __len__(self):
+        return len(self._entries)
+
+    # --- Scrittura ---
+    def add(self, entry):
+        """Inserisce o aggiorna (per chiave) un'entry. Non fa I/O sul thread chiamante."""
+        key = self._key(entry)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            merged = dict(previous or {})
+            merged.update(entry)
+            merged['hits'] = (previous or {}).get('hits', 0) + 1
+            merged['last_used'] = round(time.time(), 3)
+            self._entries[key] = merged
+            self._evict()
+            self._sorted = None
+            self._pending.append(merged)
+        self._ensure_flusher()
+        self._wakeup.set()
+        return merged
+
+    def _ensure_flusher(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name=f'history-{os.path.basename(self.filepath)}', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            # Raggruppa le scritture ravvicinate in un solo append
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError as exc:
+                print(f"[WARN] Salvataggio storico {self.filepath} fallito: {exc}")
+
+    def flush(self):
+        """Scrive il log in sospeso ed eventualmente compatta. Thread-safe."""
+        with self._io_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending and self._log_lines < self.compact_every:
+                return
+            with file_lock(self.lock_path):
+                self._append(pending)
+                if self._log_lines >= self.compact_every:
+                    self._compact()
+
+    def _append(self, pending):
+        if pending:
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                for entry in pending:
+                    f.write(json.dumps(entry) + '\n')
+            self._log_lines += len(pending)
+
+    def _merge_files(self):
+        """
+        Sostituisce lo stato in memoria con quello su disco (che contiene gli usi
+        di questo processo gia' scritti e quelli degli altri), piu' gli add in
+        sospeso non ancora nel log.
+        """
+        state, _ = self._replay()
+        with self._lock:
+            for entry in self._pending:
+                self._count(state, entry)
+            self._entries = state
+            self._evict()
+            self._sorted = None
+
+    def _compact(self):
+        # Chiamato sotto file_lock: nessun altro processo scrive log o file principale
+        self._merge_files()
+        snapshot = self.items()
+        tmp_path = self.filepath + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, indent=4)
+        os.replace(tmp_path, self.filepath)
+        # Le entry gia' nel file principale possono sparire dal log
+        with open(self.log_path, 'w', encoding='utf-8'):
+            pass
+        self._log_lines = 0
+
+    def compact(self):
+        """Flush + riscrittura del file principale (es. allo shutdown)."""
+        with self._io_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            with file_lock(self.lock_path):
+                self._append(pending)
+                self._compact()
@@ -0,0 +1,163 @@
+"""
+Index advisor: per ogni tabella di una query SQL, quali colonne usate nei
+predicati (WHERE / ON) sono coperte da un prefisso iniziale di un indice
+esistente e quali no.
+
+Analisi leggera a token (niente sqlparse): le tabelle e gli alias vengono da
+FROM/JOIN, le colonne da confronti tipo `col = ...`, `a.col IN (...)`,
+`x.col LIKE ...`. Le colonne senza prefisso sono attribuite alla tabella che
+le contiene nel dizionario (REVERSE_FIELD_MAP). La copertura usa il lookup
+per prefisso precalcolato in IndexCatalog.
+"""
+import re
+import time
+
+import tecsql_translator
+
+_TOKEN_RE = re.compile(r"""
+      '(?:[^']|'')*'                                   # stringa
+    | [A-Za-z_$#][\w$#]*(?:\.[A-Za-z_$#][\w$#]*)*      # identificatore (anche owner.tabella.colonna)
+    | :\w+ | \?!?\w*                                   # bind / parametri JAS
+    | \d+(?:\.\d+)?
+    | <>|!=|<=|>=|\|\||[=<>(),*+\-/;]
+""", re.VERBOSE)
+
+_COMPARISON = {'=', '<>', '!=', '<', '>', '<=', '>=', 'LIKE', 'IN', 'BETWEEN', 'IS', 'NOT'}
+
+_KEYWORDS = {
+    'SELECT', 'FROM', 'WHERE', 'JOIN', 'LEFT', 'RIGHT', 'FULL', 'INNER', 'OUTER',
+    'CROSS', 'ON', 'ORDER', 'BY', 'GROUP', 'HAVING', 'AS', 'AND', 'OR', 'NOT',
+    'IN', 'EXISTS', 'LIKE', 'BETWEEN', 'IS', 'NULL', 'DISTINCT', 'UNION', 'ALL',
+    'INTERSECT', 'MINUS', 'EXCEPT', 'LIMIT', 'CASE', 'WHEN', 'THEN', 'ELSE', 'END',
+    'ASC', 'DESC', 'FETCH', 'FIRST', 'ROWS', 'ONLY', 'OFFSET', 'PRIOR', 'ESCAPE',
+}
+
+# Clausole dopo le quali i predicati finiscono
+_CLAUSE_END = {'GROUP', 'ORDER', 'HAVING', 'UNION', 'INTERSECT', 'MINUS', 'EXCEPT', 'FETCH', 'LIMIT'}
+_JOIN_WORDS = {'JOIN', 'LEFT', 'RIGHT', 'FULL', 'INNER', 'CROSS'}
+
+
+def _is_identifier(token):
+    return bool(token) and (token[0].isalpha() or token[0] in '_$#') and token.upper() not in _KEYWORDS
+
+
+def extract_predicates(sql):
+    """
+    Returns: (tables, aliases, predicates)
+        tables: ['MD_ARTI', 'OWN.MD_DOCU', ...] (ordine di apparizione)
+        aliases: {'a': 'MD_ARTI'}
+        predicates: [(qualificatore o None, 'COLONNA'), ...]
+    """
+    tokens = _TOKEN_RE.findall(sql or '')
+    tables = []
+    aliases = {}
+    predicates = []
+    stack = []
+    clause = None
+    expect_table = False
+    expect_alias = False
+    last_table = None
+
+    for i, token in enumerate(tokens):
+        upper = token.upper()
+        prev = tokens[i - 1].upper() if i > 0 else ''
+        nxt = tokens[i + 1].upper() if i + 1 < len(tokens) else ''
+
+        if token == '(':
+            stack.append(clause)
+            expect_table = expect_alias = False
+            continue
+        if token == ')':
+            clause = stack.pop() if stack else None
+            continue
+
+        if expect_alias:
+            expect_alias = False
+            if upper == 'AS':
+                expect_alias = True
+                continue
+            if _is_identifier(token) and '.' not in token:
+                aliases[token.lower()] = last_table
+                continue
+
+        if upper == 'SELECT':
+            clause = 'SELECT'
+            continue
+        if upper == 'FROM':
+            clause, expect_table = 'FROM', True
+            continue
+        if upper in _JOIN_WORDS or upper == 'OUTER':
+            clause = 'JOIN'
+            expect_table = upper == 'JOIN'
+            continue
+        if upper in ('WHERE', 'ON'):
+            clause = 'PREDICATE'
+            continue
+        if upper in _CLAUSE_END:
+            clause = None
+            continue
+        if token == ',' and clause == 'FROM':
+            expect_table = True
+            continue
+
+        if expect_table:
+            expect_table = False
+            if _is_identifier(token):
+                last_table = token.upper()
+                if last_table not in tables:
+                    tables.append(last_table)
+                expect_alias = True
+            continue
+
+        if clause == 'PREDICATE' and _is_identifier(token) and nxt != '(':
+            if nxt in _COMPARISON or prev in _COMPARISON:
+                qualifier, _, column = token.rpartition('.')
+                predicates.append((qualifier or None, column.upper()))
+
+    return tables, aliases, predicates
+
+
+def _table_has_column(table, column):
+    physical = table.rpartition('.')[2].lower()
+    return column.lower() in tecsql_translator.REVERSE_FIELD_MAP.get(physical, {})
+
+
+def _resolve(qualifier, column, tables, aliases):
+    if qualifier:
+        table = aliases.get(qualifier.lower())
+        if table:
+            return table
+        upper = qualifier.upper()
+        for table in tables:
+            if table == upper or table.rpartition('.')[2] == upper:
+                return table
+        return None
+    candidates = [table for table in tables if _table_has_column(table, column)]
+    if len(candidates) == 1:
+        return candidates[0]
+    if not candidates and len(tables) == 1 and not tecsql_translator.REVERSE_FIELD_MAP:
+        return tables[0]
+    # Nome ambiguo o costante (es. parametro JAS in maiuscolo): non attribuibile
+    return None
+
+
+def advise(sql, index_catalog):
+    """
+    Returns: {'tables': [{'table', 'predicate_columns', 'covered', 'uncovered', 'best_index'}],
+              'took_ms': ...}
+    """
+    started = time.perf_counter()
+    tables, aliases, predicates = extract_predicates(sql)
+
+    columns_by_table = {table: [] for table in tables}
+    for qualifier, column in predicates:
+        table = _resolve(qualifier, column, tables, aliases)
+        if table in columns_by_table and column not in columns_by_table[table]:
+            columns_by_table[table].append(column)
+
+    result = []
+    for table, columns in columns_by_table.items():
+        entry = {'table': table, 'predicate_columns': columns}
+        entry.update(index_catalog.coverage(table, columns))
+        result.append(entry)
+    return {'tables': result, 'took_ms': round((time.perf_counter() - started) * 1000, 3)}
@@ -0,0 +1,165 @@
+"""
+Index catalog: indici e colonne indice (all_indexes / all_ind_columns)
+raggruppati per tabella al caricamento del dizionario.
+
+Porta lato server di matchesTableEntry / pickIndexOwner / dedupeIndexes /
+dedupeIndexColumns di static/js/app.js: il client riceve per la tabella
+corrente gli indici gia' deduplicati, con owner risolto e colonne ordinate.
+"""
+import re
+import sys
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_table_name(value):
+    """Come normalizeTableName (JS): niente spazi, maiuscolo."""
+    return _WHITESPACE_RE.sub('', str(value or '')).upper()
+
+
+def split_owner_and_name(value):
+    normalized = normalize_table_name(value)
+    owner, dot, name = normalized.rpartition('.')
+    return (owner, name) if dot else ('', normalized)
+
+
+def index_key(entry):
+    """Come getIndexKey (JS): OWNER.INDICE oppure INDICE."""
+    name = normalize_table_name(entry.get('INDEX_NAME'))
+    owner = normalize_table_name(entry.get('INDEX_OWNER'))
+    return f'{owner}.{name}' if owner else name
+
+
+def _matches_owner(entry, owner):
+    entry_owner = normalize_table_name(entry.get('TABLE_OWNER'))
+    return not owner or not entry_owner or entry_owner == owner
+
+
+def pick_index_owner(indexes, columns):
+    """Owner con piu' indici (poi piu' colonne, poi alfabetico)."""
+    stats = {}
+    for row in indexes:
+        stats.setdefault(normalize_table_name(row.get('TABLE_OWNER')), [0, 0])[0] += 1
+    for row in columns:
+        stats.setdefault(normalize_table_name(row.get('TABLE_OWNER')), [0, 0])[1] += 1
+    if len(stats) <= 1:
+        return next(iter(stats), '')
+    return min(stats.items(), key=lambda item: (-item[1][0], -item[1][1], item[0]))[0]
+
+
+class IndexCatalog:
+    """
+    Indici per tabella. `for_table(tabella)` ritorna:
+        {'table': 'MD_ARTI', 'owner': 'OWN', 'indexes': [
+            {'INDEX_NAME', 'INDEX_OWNER', 'UNIQUENESS', 'key',
+             'columns': [{'COLUMN_NAME', 'COLUMN_POSITION'}, ...]}, ...]}
+    """
+
+    def __init__(self, indexes, index_columns):
+        self._indexes = {}  # TABLE_NAME normalizzato → righe all_indexes
+        self._columns = {}  # TABLE_NAME normalizzato → righe all_ind_columns (ordine della query)
+        for row in indexes or []:
+            self._indexes.setdefault(sys.intern(normalize_table_name(row.get('TABLE_NAME'))), []).append(row)
+        for row in index_columns or []:
+            self._columns.setdefault(sys.intern(normalize_table_name(row.get('TABLE_NAME'))), []).append(row)
+        # Le tabelle senza owner esplicito (il caso normale) sono calcolate una volta
+        self._resolved = {
+            name: self._build(name, '')
+            for name in set(self._indexes) | set(self._columns)
+        }
+        # Lookup per prefisso: tabella → prima colonna → [(indice, colonne in ordine)]
+        self._prefixes = {name: self._prefix_lookup(entry) for name, entry in self._resolved.items()}
+
+    def __len__(self):
+        return len(self._resolved)
+
+    def for_table(self, table_value):
+        owner, name = split_owner_and_name(table_value)
+        if not name:
+            return {'table': '', 'owner': '', 'indexes': []}
+        if not owner:
+            return self._resolved.get(name) or {'table': name, 'owner': '', 'indexes': []}
+        return self._build(name, owner)
+
+    @staticmethod
+    def _prefix_lookup(entry):
+        lookup = {}
+        for index in entry['indexes']:
+            columns = tuple(normalize_table_name(c['COLUMN_NAME']) for c in index['columns'])
+            if columns:
+                lookup.setdefault(columns[0], []).append((index, columns))
+        return lookup
+
+    def coverage(self, table_value, columns):
+        """
+        Quali colonne di predicato sono coperte da un prefisso iniziale di un indice.
+
+        Returns: {'covered': {colonna: [indici]}, 'uncovered': [...],
+                  'best_index': {'INDEX_NAME', 'UNIQUENESS', 'matched_columns', 'columns'} | None}
+        """
+        owner, name = split_owner_and_name(table_value)
+        lookup = self._prefixes.get(name) if not owner else self._prefix_lookup(self._build(name, owner))
+        wanted = {normalize_table_name(column) for column in columns}
+        covered = {}
+        best = None
+        for first in sorted(wanted):
+            for index, index_columns in (lookup or {}).get(first, []):
+                matched = []
+                for column in index_columns:
+                    if column not in wanted:
+                        break
+                    matched.append(column)
+                for column in matched:
+                    covered.setdefault(column, []).append(index['INDEX_NAME'])
+                rank = (len(matched), index['UNIQUENESS'] == 'UNIQUE')
+                if best is None or rank > best[0]:
+                    best = (rank, index, matched, index_columns)
+        return {
+            'covered': covered,
+            'uncovered': sorted(wanted - set(covered)),
+            'best_index': best and {
+                'INDEX_NAME': best[1]['INDEX_NAME'],
+                'UNIQUENESS': best[1]['UNIQUENESS'],
+                'matched_columns': best[2],
+                'columns': list(best[3])
+            }
+        }
+
+    def _build(self, name, owner):
+        indexes = [row for row in self._indexes.get(name, []) if _matches_owner(row, owner)]
+        columns = [row for row in self._columns.get(name, []) if _matches_owner(row, owner)]
+        preferred = pick_index_owner(indexes, columns)
+        if preferred:
+            indexes = [row for row in indexes if normalize_table_name(row.get('TABLE_OWNER')) == preferred]
+            columns = [row for row in columns if normalize_table_name(row.get('TABLE_OWNER')) == preferred]
+
+        columns_by_index = {}
+        seen = set()
+        for row in columns:
+            key = index_key(row)
+            column = normalize_table_name(row.get('COLUMN_NAME'))
+            dedupe_key = (key, column, row.get('COLUMN_POSITION') or '')
+            if dedupe_key in seen:
+                continue
+            seen.add(dedupe_key)
+            columns_by_index.setdefault(key, []).append({
+                'COLUMN_NAME': row.get('COLUMN_NAME', ''),
+                'COLUMN_POSITION': row.get('COLUMN_POSITION', '')
+            })
+
+        result = []
+        seen = set()
+        for row in indexes:
+            key = index_key(row)
+            dedupe_key = (key, row.get('UNIQUENESS') or '')
+            if dedupe_key in seen:
+                continue
+            seen.add(dedupe_key)
+            result.append({
+                'INDEX_NAME': row.get('INDEX_NAME', ''),
+                'INDEX_OWNER': row.get('INDEX_OWNER', ''),
+                'UNIQUENESS': row.get('UNIQUENESS', ''),
+                'key': key,
+                'columns': columns_by_index.get(key, [])
+            })
+        return {'table': name, 'owner': preferred, 'indexes': result}
@@ -0,0 +1,229 @@
+"""
+Lazy dictionary: caricamento del dizionario su richiesta.
+
+Alla connessione si leggono solo i nomi di FW_TABLES (una query, poche
+migliaia di righe): ricerca tabelle e descrittori sono subito disponibili. I
+campi di un descrittore (FW_TABLE_FIELDS) vengono letti al primo uso -
+ricerca, traduzione, autocompletamento - e aggiunti allo stesso
+DictionaryStore; un thread in background precarica i descrittori piu' usati
+dello storico ricerche.
+
+Nello store ogni descrittore ha una riga segnaposto senza campo (TABELLA_FISICA,
+TABELLA_LOGICA): update_mappings la usa per TABLE_MAP / PHYSICAL_TABLE_MAP e
+non crea campi. I segnaposto sono le prime `placeholders` righe dello store.
+"""
+import re
+import threading
+from contextlib import nullcontext
+
+from dictionary_store import DictionaryStore
+
+QUERY_TABLES = """
+    SELECT
+        TAB.TABLEDBNAME AS TABELLA_FISICA,
+        TAB.TABLENAME   AS TABELLA_LOGICA,
+        (SELECT COUNT(*) FROM FW_TABLE_FIELDS FIE WHERE FIE.TABLENAME = TAB.TABLENAME) AS CAMPI
+    FROM FW_TABLES TAB
+"""
+
+# Oracle: massimo 1000 elementi in una IN (...)
+FIELDS_BATCH = 500
+PREFETCH_BATCH = 20
+
+_WORD_RE = re.compile(r'\$?[\w#]+')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _descriptor_key(name):
+    return _WHITESPACE_RE.sub('', str(name or '')).lstrip('$').lower()
+
+
+class LazyDictionary:
+    """
+    `connect()` apre una connessione oracledb; `fields_query` e' la SELECT dei
+    campi (QUERY_FIELDS), filtrata qui per TABLENAME. `on_loaded(store, start,
+    end)` viene chiamato una volta per ogni chiamata a `ensure` che ha caricato
+    campi, con le righe nuove start..end (es. update_mappings incrementale). `admission` (AdmissionController, opzionale) limita le
+    query contemporanee e ne interrompe quelle troppo lunghe.
+
+    Query Oracle e on_loaded girano fuori da `_lock` (che protegge solo store e
+    stato): una richiesta in primo piano non aspetta il prefetch, se non per i
+    descrittori che il prefetch sta gia' leggendo.
+    """
+
+    def __init__(self, connect, fields_query, on_loaded=None, admission=None):
+        self._connect = connect
+        self._admission = admission
+        self._fields_query = fields_query
+        self.on_loaded = on_loaded
+        self._lock = threading.RLock()
+        self._publish_lock = threading.Lock()  # una ricostruzione delle mappe alla volta
+        self._published = 0                    # righe dello store gia' passate a on_loaded
+        self._conns = []                       # connessioni libere (una per query in corso)
+        self._closed = False
+        self.store = DictionaryStore()
+        self.field_counts = {}            # descrittore → campi in FW_TABLE_FIELDS
+        self._by_key = {}                 # descrittore normalizzato → descrittore
+        self._by_table = {}               # tabella fisica minuscola → [descrittori]
+        self.loaded = set()
+        self.placeholders = 0             # righe segnaposto: le prime dello store
+        self._loading = {}                # descrittore → Event del caricamento in corso
+        self.round_trips = 0
+
+    # --- Connessione ---
+    def _take_connection(self):
+        with self._lock:
+            self.round_trips += 1
+            if self._conns:
+                return self._conns.pop()
+        return self._connect()
+
+    def _give_back(self, conn):
+        with self._lock:
+            if not self._closed:
+                self._conns.append(conn)
+                return
+        self._close_connection(conn)
+
+    @staticmethod
+    def _close_connection(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def query(self, sql, params=None):
+        """Esegue una query su una connessione del dizionario. Ritorna le righe."""
+        with self._slot():
+            conn = self._take_connection()
+            cursor = None
+            try:
+                cursor = conn.cursor()
+                with self._call(conn):
+                    if params:
+                        cursor.execute(sql, params)
+                    else:
+                        cursor.execute(sql)
+                    rows = list(cursor)
+            except Exception:
+                # Connessione forse non piu' valida: la prossima query ne apre una nuova
+                self._close_connection(conn)
+                raise
+            finally:
+                if cursor is not None:
+                    try:
+                        cursor.close()
+                    except Exception:
+                        pass
+            self._give_back(conn)
+            return rows
+
+    def _slot(self):
+        return self._admission.slot() if self._admission else nullcontext()
+
+    def _call(self, conn):
+        return self._admission.call(conn) if self._admission else nullcontext()
+
+    def close(self):
+        """Dizionario sostituito: ferma il prefetch e chiude le connessioni."""
+        with self._lock:
+            self._closed = True
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            self._close_connection(conn)
+
+    # --- Nomi (FW_TABLES) ---
+    def load_tables(self):
+        for physical, descriptor, count in self.query(QUERY_TABLES):
+            if not descriptor:
+                continue
+            self.store.add_db_row((physical, '', descriptor, '', '', None, None))
+            self.field_counts[descriptor] = count or 0
+            self._by_key.setdefault(_descriptor_key(descriptor), descriptor)
+            self._by_table.setdefault(str(physical or '').strip().lower(), []).append(descriptor)
+        # I segnaposto li mappa il caricamento completo (activate_dictionary)
+        self.placeholders = self._published = len(self.store)
+        return len(self.field_counts)
+
+    def descriptors_for_table(self, table):
+        return list(self._by_table.get(str(table or '').strip().lower(), ()))
+
+    def descriptors_for_query(self, text):
+        """Descrittori citati in una query: $Descrittore (TecSQL) o nome tabella fisica (SQL)."""
+        found = []
+        for word in _WORD_RE.findall(text or ''):
+            if word.startswith('$'):
+                descriptor = self._by_key.get(_descriptor_key(word))
+                if descriptor:
+                    found.append(descriptor)
+            else:
+                found.extend(self._by_table.get(word.lower(), ()))
+        return found
+
+    # --- Campi (FW_TABLE_FIELDS) ---
+    def ensure(self, descriptors):
+        """Carica i campi dei descrittori non ancora letti. Ritorna quanti ne ha caricati."""
+        with self._lock:
+            if self._closed:
+                return 0
+            missing = [name for name in dict.fromkeys(descriptors)
+                       if name not in self.loaded and name in self.field_counts]
+            # Descrittori gia' in lettura in un altro thread (prefetch): si attende quel caricamento
+            pending = {self._loading[name] for name in missing if name in self._loading}
+            missing = [name for name in missing if name not in self._loading]
+            done = threading.Event()
+            for name in missing:
+                self._loading[name] = done
+        try:
+            for start in range(0, len(missing), FIELDS_BATCH):
+                batch = missing[start:start + FIELDS_BATCH]
+                binds = ', '.join(f':d{i}' for i in range(len(batch)))
+                rows = self.query(f'{self._fields_query} WHERE TAB.TABLENAME IN ({binds})',
+                                  {f'd{i}': name for i, name in enumerate(batch)})
+                with self._lock:
+                    if self._closed:
+                        return 0
+                    for row in rows:
+                        self.store.add_db_row(row)
+                    self.loaded.update(batch)
+            if missing:
+                self._publish()
+        finally:
+            with self._lock:
+                for name in missing:
+                    self._loading.pop(name, None)
+            done.set()
+        for event in pending:
+            event.wait()
+        return len(missing)
+
+    def _publish(self):
+        """on_loaded sulle righe non ancora pubblicate (nessuna se un altro thread l'ha gia' fatto)."""
+        if self.on_loaded is None:
+            return
+        with self._publish_lock:
+            with self._lock:
+                count = len(self.store)
+            if count == self._published:
+                return
+            self.on_loaded(self.store, self._published, count)
+            self._published = count
+
+    def ensure_for_query(self, text):
+        return self.ensure(self.descriptors_for_query(text))
+
+    def table_rows(self, table):
+        """Righe (dict) dei campi della tabella fisica, caricandoli se serve."""
+        self.ensure(self.descriptors_for_table(table))
+        with self._lock:
+            store = self.store
+            return [store.row(row_id) for row_id in store.rows_where('TABELLA_FISICA', table)
+                    if row_id >= self.placeholders]
+
+    def prefetch(self, descriptors, batch=PREFETCH_BATCH):
+        """Carica i descrittori in ordine, a gruppi, in parallelo alle richieste in primo piano."""
+        pending = [name for name in dict.fromkeys(descriptors) if name in self.field_counts]
+        for start in range(0, len(pending), batch):
+            if self._closed:
+                return
+            self.ensure(pending[start:start + batch])
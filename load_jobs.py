@@ -0,0 +1,182 @@
+"""
+Load jobs: caricamenti del dizionario in background, con avanzamento per fase.
+
+POST /api/connect con "job": true ritorna subito l'id del job; l'avanzamento
+si segue con GET /api/load-jobs/<id>/events (Server-Sent Events). Il job non
+dipende dal client: chiudere lo stream (detach) non lo ferma e ci si
+riaggancia con lo stesso id (Last-Event-ID: si riparte dallo stato corrente).
+Un secondo Connetti sulla stessa connessione si aggancia al job in corso
+invece di lanciare un altro caricamento Oracle.
+
+Fasi: queued, connect, fields, indexes, index_columns, mappings.
+"""
+import json
+import threading
+import time
+import uuid
+
+JOB_TTL = 600            # secondi in cui un job finito resta consultabile
+MAX_FINISHED_JOBS = 20
+SSE_HEARTBEAT = 15       # secondi fra due commenti keep-alive sullo stream
+
+
+class LoadJob:
+
+    def __init__(self, connection_key, lazy=False):
+        self.id = uuid.uuid4().hex[:12]
+        self.connection_key = connection_key
+        self.lazy = lazy
+        self.status = 'running'       # running | done | failed
+        self.phase = 'queued'
+        self.detail = {}
+        self.message = ''
+        self.started = time.time()
+        self.finished = None
+        self.phase_ms = {}            # durata delle fasi concluse
+        self.seq = 0                  # id dell'ultimo evento (SSE)
+        self._phase_started = time.perf_counter()
+        self._cond = threading.Condition()
+
+    def _close_phase(self, now):
+        self.phase_ms[self.phase] = round((now - self._phase_started) * 1000, 1)
+        self._phase_started = now
+
+    def update(self, phase, **detail):
+        """Avanzamento: nuova fase (dettagli azzerati) o dettagli della fase corrente."""
+        with self._cond:
+            if phase != self.phase:
+                self._close_phase(time.perf_counter())
+                self.phase = phase
+                self.detail = {}
+            self.detail.update(detail)
+            self.seq += 1
+            self._cond.notify_all()
+
+    def _end(self, status, message):
+        with self._cond:
+            self._close_phase(time.perf_counter())
+            self.status = status
+            self.message = message
+            self.finished = time.time()
+            self.seq += 1
+            self._cond.notify_all()
+
+    def finish(self, message=''):
+        self._end('done', message)
+
+    def fail(self, message):
+        self._end('failed', message)
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                'job_id': self.id,
+                'connection_key': self.connection_key,
+                'lazy': self.lazy,
+                'status': self.status,
+                'phase': self.phase,
+                'detail': dict(self.detail),
+                'message': self.message,
+                'phase_ms': dict(self.phase_ms),
+                'elapsed_ms': round(((self.finished or time.time()) - self.started) * 1000, 1),
+                'seq': self.seq
+            }
+
+    def wait(self, seq, timeout):
+        """Stato appena cambia rispetto all'evento `seq` (o allo scadere del timeout)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.seq > seq, timeout)
+        return self.snapshot()
+
+
+class LoadJobs:
+    """Registro dei job: uno in corso per connessione, i finiti tenuti JOB_TTL secondi."""
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def start(self, connection_key, target, lazy=False):
+        """
+        Avvia target(job) in un thread, o ritorna il job gia' in corso per la
+        stessa connessione. target ritorna il body di /api/connect.
+
+        Returns: (job, created)
+        """
+        with self._lock:
+            self._expire()
+            job = self._running(connection_key, lazy)
+            if job is not None:
+                return job, False
+            job = LoadJob(connection_key, lazy)
+            self._jobs[job.id] = job
+        threading.Thread(target=self._run, args=(job, target),
+                         name=f'load-job-{job.id}', daemon=True).start()
+        return job, True
+
+    @staticmethod
+    def _run(job, target):
+        try:
+            body = target(job)
+        except Exception as e:
+            job.fail(f'Errore: {str(e)}')
+            return
+        if body.get('success'):
+            job.finish(body.get('message', ''))
+        else:
+            job.fail(body.get('message', ''))
+
+    def _running(self, connection_key, lazy):
+        for job in self._jobs.values():
+            if job.status == 'running' and job.connection_key == connection_key and job.lazy == lazy:
+                return job
+        return None
+
+    def running(self, connection_key, lazy=False):
+        """Job in corso per la connessione (a cui start() si aggancerebbe), o None."""
+        with self._lock:
+            return self._running(connection_key, lazy)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def snapshots(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.snapshot() for job in jobs]
+
+    def _expire(self):
+        now = time.time()
+        finished = sorted((job for job in self._jobs.values() if job.finished is not None),
+                          key=lambda job: job.finished, reverse=True)
+        for position, job in enumerate(finished):
+            if position >= MAX_FINISHED_JOBS or now - job.finished > JOB_TTL:
+                del self._jobs[job.id]
+
+
+# --- Server-Sent Events ---
+def format_event(event, data, event_id=None):
+    lines = [] if event_id is None else [f'id: {event_id}']
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def event_name(snapshot):
+    return 'progress' if snapshot['status'] == 'running' else snapshot['status']
+
+
+def iter_events(job, last_seq=0, heartbeat=SSE_HEARTBEAT):
+    """Stream SSE del job: stato corrente, poi un evento per cambiamento (coalescendo), fino a done/failed."""
+    seq = last_seq
+    yield 'retry: 2000\n\n'
+    while True:
+        snapshot = job.wait(seq, heartbeat)
+        if snapshot['seq'] == seq and snapshot['status'] == 'running':
+            yield ': ping\n\n'
+            continue
+        seq = snapshot['seq']
+        yield format_event(event_name(snapshot), snapshot, seq)
+        if snapshot['status'] != 'running':
+            return
@@ -0,0 +1,219 @@
+"""
+Admission control per il lavoro che va su Oracle (caricamenti del dizionario,
+query lazy): al massimo `limit` operazioni insieme, le altre in coda (FIFO)
+fino a `queue_depth`. Coda piena, o attesa oltre `queue_timeout`: OracleBusy,
+che le route trasformano in 503 con Retry-After (nessun thread waitress resta
+appeso in attesa di Oracle).
+
+Ogni query ha poi un tempo massimo (`call_timeout`): allo scadere un watchdog
+chiama connection.cancel(), che interrompe la chiamata in corso (thick e thin
+mode); il chiamante riceve OracleTimeout e chiude cursore e connessione nei
+suoi finally.
+
+Configurazione via env:
+    JCTNT_ORACLE_CONCURRENCY    operazioni Oracle contemporanee (default 2)
+    JCTNT_ORACLE_QUEUE          richieste in coda oltre quelle attive (default 4)
+    JCTNT_ORACLE_QUEUE_TIMEOUT  secondi massimi di attesa in coda (default 30)
+    JCTNT_ORACLE_CALL_TIMEOUT   secondi massimi per query, 0 = nessuno (default 120)
+"""
+import collections
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+RECENT_SAMPLES = 500       # attese / durate recenti per le percentili
+DEFAULT_RETRY_AFTER = 5    # secondi, finche' non ci sono durate misurate
+MAX_RETRY_AFTER = 300
+BUSY_MESSAGE = 'Server occupato: troppi caricamenti Oracle in corso, riprovare piu\' tardi'
+
+
+class OracleBusy(Exception):
+    """Troppe operazioni Oracle in corso o in coda: riprovare dopo retry_after secondi."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class OracleTimeout(Exception):
+    """Query Oracle interrotta dal watchdog dopo `seconds` secondi."""
+
+    def __init__(self, seconds):
+        super().__init__(f'Timeout Oracle: query interrotta dopo {seconds:g} s')
+        self.seconds = seconds
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class AdmissionController:
+
+    def __init__(self, limit=2, queue_depth=4, queue_timeout=30.0, call_timeout=120.0):
+        self.limit = max(1, limit)
+        self.queue_depth = max(0, queue_depth)
+        self.queue_timeout = queue_timeout
+        self.call_timeout = call_timeout
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiters = collections.deque()   # Event dei thread in coda, in ordine di arrivo
+        self._waits_ms = collections.deque(maxlen=RECENT_SAMPLES)
+        self._holds_ms = collections.deque(maxlen=RECENT_SAMPLES)
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_queue_timeout = 0
+        self.call_timeouts = 0
+        self.max_wait_ms = 0.0
+
+    @classmethod
+    def from_env(cls):
+        return cls(limit=int(os.environ.get('JCTNT_ORACLE_CONCURRENCY', 2)),
+                   queue_depth=int(os.environ.get('JCTNT_ORACLE_QUEUE', 4)),
+                   queue_timeout=float(os.environ.get('JCTNT_ORACLE_QUEUE_TIMEOUT', 30)),
+                   call_timeout=float(os.environ.get('JCTNT_ORACLE_CALL_TIMEOUT', 120)))
+
+    # --- Coda ---
+    def retry_after(self):
+        """Secondi stimati prima che si liberi un posto (durata media × coda / limite)."""
+        if not self._holds_ms:
+            return DEFAULT_RETRY_AFTER
+        average = sum(self._holds_ms) / len(self._holds_ms) / 1000
+        estimate = average * (len(self._waiters) + 1) / self.limit
+        return max(1, min(MAX_RETRY_AFTER, math.ceil(estimate)))
+
+    def saturated(self):
+        """Una nuova richiesta verrebbe rifiutata subito (coda piena)?"""
+        with self._lock:
+            return self._active >= self.limit and len(self._waiters) >= self.queue_depth
+
+    def busy_error(self):
+        with self._lock:
+            return OracleBusy(BUSY_MESSAGE, self.retry_after())
+
+    def acquire(self):
+        """Occupa un posto (attendendo in coda). Ritorna i ms di attesa; OracleBusy se saturo."""
+        started = time.perf_counter()
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                self._admit(0.0)
+                return 0.0
+            if len(self._waiters) >= self.queue_depth:
+                self.rejected_queue_full += 1
+                raise OracleBusy(BUSY_MESSAGE, self.retry_after())
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+
+        waiter.wait(self.queue_timeout)
+        with self._lock:
+            # Il posto puo' arrivare fra lo scadere dell'attesa e il lock: vale is_set()
+            if not waiter.is_set():
+                self._waiters.remove(waiter)
+                self.rejected_queue_timeout += 1
+                raise OracleBusy(f'Server occupato: nessun posto libero per Oracle dopo '
+                                 f'{self.queue_timeout:g} s di attesa', self.retry_after())
+            waited = (time.perf_counter() - started) * 1000
+            self._admit(waited)
+            return waited
+
+    def _admit(self, waited_ms):
+        self.admitted += 1
+        self._waits_ms.append(waited_ms)
+        self.max_wait_ms = max(self.max_wait_ms, waited_ms)
+
+    def release(self, held_ms=None):
+        with self._lock:
+            if held_ms is not None:
+                self._holds_ms.append(held_ms)
+            if self._waiters:
+                # Il posto passa direttamente al primo in coda (active invariato)
+                self._waiters.popleft().set()
+            else:
+                self._active -= 1
+
+    @contextmanager
+    def slot(self):
+        """with admission.slot(): ... lavoro Oracle ..."""
+        self.acquire()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release((time.perf_counter() - started) * 1000)
+
+    # --- Timeout per query ---
+    @contextmanager
+    def call(self, conn, seconds=None):
+        """
+        Tempo massimo per una query (execute + fetch) su `conn`: allo scadere
+        conn.cancel() interrompe la chiamata e l'errore oracledb diventa
+        OracleTimeout. La chiusura di cursore e connessione resta al chiamante.
+        """
+        seconds = self.call_timeout if seconds is None else seconds
+        if not seconds or seconds <= 0:
+            yield
+            return
+        fired = threading.Event()
+
+        def cancel():
+            fired.set()
+            try:
+                conn.cancel()
+            except Exception:
+                pass
+
+        watchdog = threading.Timer(seconds, cancel)
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            yield
+        except Exception as e:
+            if fired.is_set():
+                self.timed_out()
+                raise OracleTimeout(seconds) from e
+            raise
+        finally:
+            watchdog.cancel()
+
+    def timed_out(self):
+        """Conta un timeout (anche quelli misurati altrove, es. asyncio.wait_for)."""
+        with self._lock:
+            self.call_timeouts += 1
+
+    # --- Metriche ---
+    def metrics(self):
+        with self._lock:
+            waits = list(self._waits_ms)
+            holds = list(self._holds_ms)
+            return {
+                'limit': self.limit,
+                'queue_depth': self.queue_depth,
+                'queue_timeout_s': self.queue_timeout,
+                'call_timeout_s': self.call_timeout,
+                'active': self._active,
+                'waiting': len(self._waiters),
+                'admitted': self.admitted,
+                'rejected': {
+                    'queue_full': self.rejected_queue_full,
+                    'queue_timeout': self.rejected_queue_timeout
+                },
+                'call_timeouts': self.call_timeouts,
+                'queue_wait_ms': {
+                    'samples': len(waits),
+                    'avg': round(sum(waits) / len(waits), 1) if waits else 0.0,
+                    'p50': round(_percentile(waits, 0.5), 1),
+                    'p95': round(_percentile(waits, 0.95), 1),
+                    'max': round(self.max_wait_ms, 1)
+                },
+                'hold_ms': {
+                    'samples': len(holds),
+                    'avg': round(sum(holds) / len(holds), 1) if holds else 0.0,
+                    'p95': round(_percentile(holds, 0.95), 1)
+                },
+                'retry_after_s': self.retry_after()
+            }
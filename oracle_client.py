@@ -0,0 +1,70 @@
+"""
+Oracle client: import di oracledb e init_oracle_client (thick mode) rinviati
+al primo uso.
+
+oracledb costa ~50 ms di import e init_oracle_client puo' richiedere secondi
+(caricamento delle DLL dell'Instant Client): in fast start (default) l'app
+risponde subito alla pagina iniziale e il client viene inizializzato alla
+prima connessione, o in background subito dopo l'avvio (warm_up).
+
+JCTNT_FAST_START=0 ripristina l'inizializzazione all'import di app.py.
+"""
+import os
+import threading
+import time
+
+FAST_START = os.environ.get('JCTNT_FAST_START', '1') != '0'
+
+# Path Oracle 11 (più comune), poi ricerca automatica nel PATH
+ORACLE_CLIENT_LIB_DIR = os.environ.get('JCTNT_ORACLE_CLIENT', r"C:\App\Oracle11\clix64\client\bin")
+
+_lock = threading.Lock()
+_client_ready = False
+TIMINGS = {}  # fase → millisecondi (import oracledb, init client)
+
+
+def get_oracledb():
+    """Modulo oracledb, con il client Oracle gia' inizializzato."""
+    ensure_client()
+    import oracledb
+    return oracledb
+
+
+def ensure_client():
+    """init_oracle_client una sola volta (thread-safe); thin mode se il client manca."""
+    global _client_ready
+    if _client_ready:
+        return
+    with _lock:
+        if _client_ready:
+            return
+        started = time.perf_counter()
+        import oracledb
+        TIMINGS['import oracledb'] = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        # Abilita thick mode per versioni Oracle più vecchie
+        try:
+            oracledb.init_oracle_client(lib_dir=ORACLE_CLIENT_LIB_DIR)
+            print("[OK] Thick mode attivo (Oracle 11 x64)")
+        except Exception:
+            # Fallback: cerca automaticamente nel PATH
+            try:
+                oracledb.init_oracle_client()
+                print("[OK] Thick mode attivo (auto-detected)")
+            except Exception:
+                print("[WARNING] Thin mode attivo (Oracle Client non trovato)")
+                print("          Per Oracle 11 o piu vecchi, installa Oracle Instant Client")
+        TIMINGS['init_oracle_client'] = (time.perf_counter() - started) * 1000
+        _client_ready = True
+
+
+def warm_up():
+    """Inizializza client e traduttore in background (l'app risponde gia')."""
+    def run():
+        ensure_client()
+        started = time.perf_counter()
+        import sqlparse  # noqa: F401 - usato dal traduttore SQL → TecSQL
+        TIMINGS['import sqlparse'] = (time.perf_counter() - started) * 1000
+
+    threading.Thread(target=run, name='oracle-warm-up', daemon=True).start()
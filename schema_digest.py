@@ -0,0 +1,212 @@
+"""
+Schema digest: impronte (blake2b) del dizionario FW_TABLES per descrittore e
+per tabella fisica, calcolate al caricamento, e diff fra due dizionari.
+
+Il diff confronta prima la versione (impronta dell'intero dizionario), poi le
+impronte delle tabelle fisiche, e scende ai campi solo per i descrittori delle
+tabelle cambiate: fra due ambienti quasi uguali si leggono poche decine di
+descrittori invece di 36k righe.
+
+Un dizionario si puo' salvare come snapshot JSON (Data/snapshots) e
+confrontare in seguito con quello caricato.
+"""
+import hashlib
+import json
+import os
+import time
+from array import array
+
+FIELD_COLUMNS = ('CAMPO_LOGICO', 'CAMPO_FISICO', 'TIPO', 'AMPIEZZA', 'DECIMALI')
+
+
+def _hash(parts):
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x1e')
+    return digest.hexdigest()
+
+
+def _field_key(field):
+    return '\x1f'.join(str(value) for value in field)
+
+
+def _field_id(field):
+    """Identita' di un campo (riga FIELD_COLUMNS): campo fisico + campo logico."""
+    return (field[1], field[0])
+
+
+class SchemaDigest:
+    """
+    Impronte di un dizionario:
+        version             impronta complessiva
+        tables              {tabella fisica: impronta}
+        descriptors         {descrittore: (tabella fisica, impronta)}
+        fields(descrittore) {(campo fisico, campo logico): riga FIELD_COLUMNS}
+
+    I campi sono identificati dalla coppia (campo fisico, campo logico): due
+    campi logici sullo stesso campo fisico, o righe senza campo fisico, restano
+    distinti.
+    """
+
+    def __init__(self, descriptors, fields_source, meta=None):
+        self.descriptors = descriptors
+        self.meta = dict(meta or {})
+        self._fields_source = fields_source
+
+        self.table_descriptors = {}
+        for name, (table, _) in descriptors.items():
+            self.table_descriptors.setdefault(table, []).append(name)
+        self.tables = {
+            table: _hash(f'{name}={descriptors[name][1]}' for name in sorted(names))
+            for table, names in self.table_descriptors.items()
+        }
+        self.version = _hash(f'{table}={digest}' for table, digest in sorted(self.tables.items()))
+
+    @classmethod
+    def from_store(cls, store, meta=None):
+        """Impronte di un DictionaryStore (le righe restano nello store, qui solo i row id)."""
+        rows_by_descriptor = {}
+        tables = {}
+        digests = {}
+        columns = ('TABELLA_FISICA', 'TABELLA_LOGICA') + FIELD_COLUMNS
+        for row_id, (table, descriptor, *field) in enumerate(store.iter_values(*columns)):
+            rows = rows_by_descriptor.get(descriptor)
+            if rows is None:
+                rows = rows_by_descriptor[descriptor] = array('I')
+                tables[descriptor] = table
+                digests[descriptor] = {}
+            rows.append(row_id)
+            digests[descriptor][_field_id(field)] = tuple(field)
+
+        def fields(descriptor):
+            return {
+                _field_id(row): row
+                for row in (tuple(store.value(row_id, column) for column in FIELD_COLUMNS)
+                            for row_id in rows_by_descriptor.get(descriptor, ()))
+            }
+
+        descriptors = {
+            descriptor: (tables[descriptor], cls._descriptor_digest(descriptor_fields))
+            for descriptor, descriptor_fields in digests.items()
+        }
+        return cls(descriptors, fields, meta)
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Impronte da uno snapshot JSON (vedi to_snapshot)."""
+        entries = snapshot['descriptors']
+
+        def fields(descriptor):
+            entry = entries.get(descriptor)
+            return {_field_id(field): tuple(field) for field in entry['fields']} if entry else {}
+
+        descriptors = {name: (entry['table'], entry['digest']) for name, entry in entries.items()}
+        return cls(descriptors, fields, snapshot.get('meta'))
+
+    @staticmethod
+    def _descriptor_digest(fields):
+        # Righe ordinate per campo logico: stessa impronta degli snapshot precedenti
+        return _hash(_field_key(row) for row in sorted(fields.values()))
+
+    def fields(self, descriptor):
+        return self._fields_source(descriptor)
+
+    def to_snapshot(self, meta=None):
+        return {
+            'version': self.version,
+            'meta': dict(self.meta, **(meta or {})),
+            'descriptors': {
+                name: {
+                    'table': table,
+                    'digest': digest,
+                    'fields': [list(row) for row in sorted(self.fields(name).values())]
+                }
+                for name, (table, digest) in self.descriptors.items()
+            }
+        }
+
+
+# --- Snapshot su file ---
+def save_snapshot(digest, path, meta=None):
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(digest.to_snapshot(meta), f)
+    os.replace(path + '.tmp', path)
+
+
+def load_snapshot(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return SchemaDigest.from_snapshot(json.load(f))
+
+
+# --- Diff ---
+def _field_dict(row):
+    return dict(zip(FIELD_COLUMNS, row))
+
+
+def _sorted_ids(ids):
+    # Per campo logico, poi fisico (ordine di lettura del diff)
+    return sorted(ids, key=lambda field_id: (str(field_id[1]), str(field_id[0])))
+
+
+def _diff_fields(old_fields, new_fields):
+    added = [_field_dict(new_fields[key]) for key in _sorted_ids(new_fields.keys() - old_fields.keys())]
+    removed = [_field_dict(old_fields[key]) for key in _sorted_ids(old_fields.keys() - new_fields.keys())]
+    changed = [
+        {'CAMPO_LOGICO': key[1],
+         'CAMPO_FISICO': key[0],
+         'from': _field_dict(old_fields[key]),
+         'to': _field_dict(new_fields[key])}
+        for key in _sorted_ids(old_fields.keys() & new_fields.keys())
+        if _field_key(old_fields[key]) != _field_key(new_fields[key])
+    ]
+    return added, removed, changed
+
+
+def diff(old, new):
+    """
+    Differenze fra due SchemaDigest.
+
+    Returns: {'identical', 'from_version', 'to_version', 'tables_compared', 'tables_changed',
+              'added_descriptors', 'removed_descriptors', 'changed_descriptors', 'took_ms'}
+    """
+    started = time.perf_counter()
+    result = {
+        'identical': old.version == new.version,
+        'from_version': old.version,
+        'to_version': new.version,
+        'tables_compared': len(old.tables.keys() | new.tables.keys()),
+        'tables_changed': 0,
+        'added_descriptors': [],
+        'removed_descriptors': [],
+        'changed_descriptors': []
+    }
+    if not result['identical']:
+        changed_tables = [table for table in old.tables.keys() | new.tables.keys()
+                          if old.tables.get(table) != new.tables.get(table)]
+        result['tables_changed'] = len(changed_tables)
+
+        # Solo i descrittori delle tabelle cambiate (da entrambi i lati: un descrittore puo' cambiare tabella)
+        names = set()
+        for table in changed_tables:
+            names.update(old.table_descriptors.get(table, ()))
+            names.update(new.table_descriptors.get(table, ()))
+
+        for name in sorted(names):
+            before, after = old.descriptors.get(name), new.descriptors.get(name)
+            if before is None:
+                result['added_descriptors'].append(
+                    {'descriptor': name, 'table': after[0], 'fields': len(new.fields(name))})
+            elif after is None:
+                result['removed_descriptors'].append(
+                    {'descriptor': name, 'table': before[0], 'fields': len(old.fields(name))})
+            elif before != after:
+                added, removed, changed = _diff_fields(old.fields(name), new.fields(name))
+                entry = {'descriptor': name, 'table': after[0],
+                         'added_fields': added, 'removed_fields': removed, 'changed_fields': changed}
+                if before[0] != after[0]:
+                    entry['previous_table'] = before[0]
+                result['changed_descriptors'].append(entry)
+
+    result['took_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    return result
@@ -0,0 +1,259 @@
+"""
+Script translator: divide uno script SQL / TecSQL in statement mentre viene
+letto, a blocchi, senza caricarlo tutto in memoria.
+
+- separatori: `;` e una riga con solo `/` (stile SQL*Plus)
+- `;` dentro stringhe '...' (anche con '' escape), identificatori "..." e
+  commenti non separa
+- i commenti `--` e `/* */` vengono tolti (il traduttore lavora su una riga
+  sola, un `--` si mangerebbe il resto della query); gli hint `/*+ */` restano
+
+In memoria resta solo lo statement corrente (piu' il blocco in lettura).
+"""
+import codecs
+import re
+
+CHUNK_SIZE = 64 * 1024
+MAX_STATEMENT_CHARS = 1024 * 1024
+
+_NORMAL, _STRING, _QUOTED, _LINE_COMMENT, _BLOCK_COMMENT, _HINT = range(6)
+
+_NORMAL_RE = re.compile(r"[;'\"\n]|--|/\*")
+
+
+class StatementSplitter:
+    """
+    `feed(testo)` ritorna gli statement completati da quel blocco,
+    `finish()` l'ultimo. Ogni statement e' (riga iniziale, testo) oppure
+    (riga iniziale, None) se supera max_chars (testo scartato).
+    """
+
+    def __init__(self, max_chars=MAX_STATEMENT_CHARS):
+        self.max_chars = max_chars
+        self._decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+        self._buf = ''
+        self._pos = 0
+        self._state = _NORMAL
+        self._stmt_start = 0      # inizio del pezzo corrente dello statement nel buffer
+        self._parts = []          # pezzi gia' chiusi (prima di un commento)
+        self._parts_len = 0
+        self._line_start = 0      # inizio della riga corrente nel buffer
+        # Riga '/': il testo da controllare parte da _line_from; quello gia' scartato
+        # dal buffer e' riassunto in _line_head ('' o '/' se ancora possibile)
+        self._line_from = 0
+        self._line_head = ''
+        self._line = 1            # numero di riga di _buf[0]
+        self._region_line = 1     # riga in cui inizia lo statement corrente
+        self._comment_newlines = 0  # a capo del commento /* */ corrente gia' scartati dal buffer
+        self._oversized = False
+        self._oversized_line = 1
+
+    def feed(self, text):
+        self._buf += text
+        statements = self._scan(final=False)
+        self._compact()
+        return statements
+
+    def feed_bytes(self, chunk):
+        """Come feed, per blocchi binari UTF-8 (anche spezzati a meta' carattere)."""
+        return self.feed(self._decoder.decode(chunk))
+
+    def finish(self):
+        self._buf += self._decoder.decode(b'', final=True)
+        statements = self._scan(final=True)
+        slash_line = self._check_slash_line(len(self._buf))
+        last = self._emit(self._line_start if slash_line else len(self._buf), slash_line)
+        if last:
+            statements.append(last)
+        self._buf = ''
+        return statements
+
+    # --- Scansione ---
+    def _scan(self, final):
+        buf = self._buf
+        # Senza final l'ultimo carattere resta da leggere: serve per '--', '/*', "''", '*/'
+        limit = len(buf) if final else len(buf) - 1
+        statements = []
+        pos = self._pos
+        while pos < limit:
+            state = self._state
+            if state == _NORMAL:
+                match = _NORMAL_RE.search(buf, pos)
+                if not match or match.start() >= limit:
+                    pos = limit
+                    break
+                token, start, end = match.group(), match.start(), match.end()
+                if token == '/*' and end >= len(buf) and not final:
+                    # Serve il carattere dopo '/*' per distinguere un hint
+                    pos = start
+                    break
+                if token == ';':
+                    statement = self._emit(start, False)
+                    if statement:
+                        statements.append(statement)
+                    self._new_region(end)
+                elif token == "'":
+                    self._state = _STRING
+                elif token == '"':
+                    self._state = _QUOTED
+                elif token == '\n':
+                    if self._check_slash_line(start):
+                        statement = self._emit(self._line_start, True)
+                        if statement:
+                            statements.append(statement)
+                        self._new_region(end)
+                    self._line_start = end
+                    self._reset_line(end)
+                elif token == '--':
+                    self._close_part(start)
+                    self._state = _LINE_COMMENT
+                elif buf.startswith('+', end):
+                    self._state = _HINT
+                else:
+                    self._close_part(start)
+                    self._comment_newlines = 0
+                    self._state = _BLOCK_COMMENT
+                pos = end
+            elif state == _STRING:
+                i = buf.find("'", pos, limit)
+                if i < 0:
+                    pos = limit
+                elif buf.startswith("'", i + 1):
+                    pos = i + 2
+                else:
+                    self._state = _NORMAL
+                    pos = i + 1
+            elif state == _QUOTED:
+                i = buf.find('"', pos, limit)
+                if i < 0:
+                    pos = limit
+                else:
+                    self._state = _NORMAL
+                    pos = i + 1
+            elif state == _LINE_COMMENT:
+                i = buf.find('\n', pos, limit)
+                if i < 0:
+                    pos = limit
+                else:
+                    # Il newline resta nello statement (conta righe, fine riga per '/')
+                    self._stmt_start = i
+                    self._state = _NORMAL
+                    pos = i
+            else:
+                i = buf.find('*/', pos)
+                if i < 0 or i >= limit:
+                    pos = max(pos, limit - 1)
+                    break
+                if state == _BLOCK_COMMENT:
+                    # Al posto del commento: spazio, o i suoi a capo (numeri di riga corretti)
+                    newlines = self._comment_newlines + buf.count('\n', self._stmt_start, i)
+                    self._add_part('\n' * newlines or ' ')
+                    self._stmt_start = i + 2
+                    self._reset_line(i + 2)
+                self._state = _NORMAL
+                pos = i + 2
+
+            self._check_size(pos)
+        self._check_size(pos)
+        self._pos = pos
+        return statements
+
+    def _check_size(self, pos):
+        # Statement troppo lungo: il testo letto fin qui si scarta (resta solo la riga iniziale)
+        if self._current_len(pos) > self.max_chars:
+            if not self._oversized:
+                end = self._stmt_start if self._state in (_LINE_COMMENT, _BLOCK_COMMENT) else pos
+                self._oversized_line = self._start_line(''.join(self._parts) + self._buf[self._stmt_start:end])
+                self._oversized = True
+            self._parts, self._parts_len = [], 0
+            self._stmt_start = pos
+
+    def _check_slash_line(self, end):
+        if self._state != _NORMAL:
+            return False
+        return (self._line_head + self._buf[self._line_from:end]).strip() == '/'
+
+    def _reset_line(self, start):
+        # Controllo della riga '/' da `start` (inizio riga, statement o fine commento)
+        self._line_from = start
+        self._line_head = ''
+
+    def _fold_line(self, end):
+        # Riassume il testo della riga prima di `end` (che sta per uscire dal buffer)
+        if end > self._line_from:
+            head = (self._line_head + self._buf[self._line_from:end]).strip()
+            self._line_head = head if len(head) < 2 else '//'
+            self._line_from = end
+
+    def _current_len(self, pos):
+        if self._state in (_LINE_COMMENT, _BLOCK_COMMENT):
+            return self._parts_len
+        return self._parts_len + pos - self._stmt_start
+
+    def _close_part(self, end):
+        self._add_part(self._buf[self._stmt_start:end])
+        self._stmt_start = end
+
+    def _add_part(self, text):
+        if not self._oversized:
+            self._parts.append(text)
+            self._parts_len += len(text)
+
+    def _emit(self, end, slash_line):
+        if slash_line:
+            end = max(end, self._stmt_start)
+        if self._state in (_LINE_COMMENT, _BLOCK_COMMENT):
+            end = self._stmt_start
+        text = ''.join(self._parts) + self._buf[self._stmt_start:end]
+        if self._oversized:
+            return (self._oversized_line, None)
+        line = self._start_line(text)
+        if len(text) > self.max_chars:
+            return (line, None)
+        text = text.strip()
+        return (line, text) if text else None
+
+    def _start_line(self, text):
+        # Riga del primo carattere non bianco dello statement
+        leading = len(text) - len(text.lstrip())
+        return self._region_line + text.count('\n', 0, leading)
+
+    def _new_region(self, start):
+        self._region_line = self._line + self._buf.count('\n', 0, start)
+        self._stmt_start = start
+        self._reset_line(start)
+        self._parts, self._parts_len = [], 0
+        self._oversized = False
+
+    def _compact(self):
+        # Scarta il testo gia' consumato: tutto fino a _pos, tranne lo statement
+        # corrente (al massimo max_chars, o nulla se e' gia' troppo lungo). Dentro
+        # un commento il testo si scarta comunque, contando solo gli a capo.
+        if self._state in (_LINE_COMMENT, _BLOCK_COMMENT):
+            if self._state == _BLOCK_COMMENT:
+                self._comment_newlines += self._buf.count('\n', self._stmt_start, self._pos)
+            self._stmt_start = self._pos
+        cut = min(self._stmt_start, self._pos)
+        if cut <= 0:
+            return
+        self._fold_line(cut)
+        self._line += self._buf.count('\n', 0, cut)
+        self._buf = self._buf[cut:]
+        self._pos -= cut
+        self._stmt_start -= cut
+        self._line_start = max(0, self._line_start - cut)
+        self._line_from -= cut
+
+
+def iter_statements(stream, chunk_size=CHUNK_SIZE, max_chars=MAX_STATEMENT_CHARS):
+    """
+    Statement di uno stream binario (UTF-8) letto a blocchi.
+    Yields: (riga, testo o None se troppo lungo)
+    """
+    splitter = StatementSplitter(max_chars)
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        yield from splitter.feed_bytes(chunk)
+    yield from splitter.finish()
@@ -0,0 +1,523 @@
+"""
+Indici di ricerca server-side sul dizionario (costruiti al caricamento).
+
+TableSearchIndex replica il ranking di scoreTableMatch / findBestTableMatches
+(static/js/fuzzy-search.js): exact > starts with > contains > fuzzy, con gli
+stessi punteggi. Invece di calcolare la matrice di Levenshtein su ogni tabella
+usa:
+- PrefixIndex (lista ordinata + bisect) per "starts with"
+- TrigramIndex (posting list di trigrammi) per "contains"
+- BKTree (distanza di Levenshtein bit-parallela) per i match fuzzy
+"""
+import re
+from bisect import bisect_left
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Punteggi identici a scoreTableMatch
+SCORE_EXACT = 1000
+FUZZY_MIN_SIMILARITY = 0.5
+
+
+def normalize_search_input(value):
+    """Come normalizeTableName + toLowerCase lato client."""
+    return _WHITESPACE_RE.sub('', value or '').strip().lower()
+
+
+# --- Levenshtein ---
+def _pattern_bits(pattern):
+    bits = {}
+    bit = 1
+    for ch in pattern:
+        bits[ch] = bits.get(ch, 0) | bit
+        bit <<= 1
+    return bits
+
+
+def _myers_distance(pattern_bits, pattern_len, text):
+    """Distanza di Levenshtein (Myers/Hyyro, bit-parallela sugli int Python)."""
+    if pattern_len == 0:
+        return len(text)
+    mask = (1 << pattern_len) - 1
+    high = 1 << (pattern_len - 1)
+    pv = mask
+    mv = 0
+    score = pattern_len
+    for ch in text:
+        eq = pattern_bits.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = (ph << 1) | 1
+        mh <<= 1
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv & mask
+    return score
+
+
+def levenshtein_distance(s1, s2):
+    s1 = s1.lower()
+    s2 = s2.lower()
+    return _myers_distance(_pattern_bits(s1), len(s1), s2)
+
+
+def similarity_ratio(s1, s2, distance=None):
+    max_len = max(len(s1), len(s2))
+    if max_len == 0:
+        return 1.0
+    if distance is None:
+        distance = levenshtein_distance(s1, s2)
+    return 1 - (distance / max_len)
+
+
+class QueryDistance:
+    """Distanze da una query fissa, con pattern bit-parallelo e memo per nome."""
+
+    def __init__(self, query):
+        self.query = query
+        self.length = len(query)
+        self._bits = _pattern_bits(query)
+        self._memo = {}
+
+    def __call__(self, text):
+        distance = self._memo.get(text)
+        if distance is None:
+            distance = self._memo[text] = _myers_distance(self._bits, self.length, text)
+        return distance
+
+    def similarity(self, text):
+        return similarity_ratio(text, self.query, self(text))
+
+
+def score_table_match(fisico, logico, search_input, distance=None):
+    """Porting 1:1 di scoreTableMatch (input gia' normalizzato)."""
+    search = search_input.lower().strip()
+    fisico = (fisico or '').lower().strip()
+    logico = (logico or '').lower().strip()
+    if distance is None or distance.query != search:
+        distance = QueryDistance(search)
+    similarity_of = distance.similarity
+
+    if fisico == search or logico == search:
+        return {'score': SCORE_EXACT, 'type': 'exact', 'match': 'fisico' if fisico == search else 'logico'}
+
+    if fisico.startswith(search) or logico.startswith(search):
+        similarity = max(similarity_of(fisico), similarity_of(logico))
+        return {
+            'score': 500 + similarity * 400,
+            'type': 'starts_with',
+            'match': 'fisico' if fisico.startswith(search) else 'logico',
+            'similarity': similarity
+        }
+
+    compact = _WHITESPACE_RE.sub('', search)
+    fisico_contains = compact in _WHITESPACE_RE.sub('', fisico)
+    if fisico_contains or compact in _WHITESPACE_RE.sub('', logico):
+        similarity = max(similarity_of(fisico), similarity_of(logico))
+        return {
+            'score': 200 + similarity * 300,
+            'type': 'contains',
+            'match': 'fisico' if fisico_contains else 'logico',
+            'similarity': similarity
+        }
+
+    sim_fisico = similarity_of(fisico)
+    sim_logico = similarity_of(logico)
+    similarity = max(sim_fisico, sim_logico)
+    if similarity > FUZZY_MIN_SIMILARITY:
+        return {
+            'score': similarity * 100,
+            'type': 'fuzzy',
+            'match': 'fisico' if sim_fisico > sim_logico else 'logico',
+            'similarity': similarity
+        }
+
+    return {'score': 0, 'type': 'no_match', 'similarity': 0}
+
+
+# --- Strutture di indice ---
+class PrefixIndex:
+    """Chiavi ordinate → id; range di prefisso via bisect."""
+
+    def __init__(self, items=()):
+        self._entries = sorted(items)
+        self._keys = [key for key, _ in self._entries]
+
+    def iter_prefix(self, prefix):
+        pos = bisect_left(self._keys, prefix)
+        keys = self._keys
+        while pos < len(keys) and keys[pos].startswith(prefix):
+            yield self._entries[pos][1]
+            pos += 1
+
+    def get(self, key):
+        pos = bisect_left(self._keys, key)
+        result = []
+        while pos < len(self._keys) and self._keys[pos] == key:
+            result.append(self._entries[pos][1])
+            pos += 1
+        return result
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class TrigramIndex:
+    """Posting list trigramma → id; candidati per "contains" verificati a valle."""
+
+    def __init__(self):
+        self._postings = {}
+        self._texts = {}
+
+    def add(self, item_id, text):
+        self._texts.setdefault(item_id, []).append(text)
+        for pos in range(len(text) - 2):
+            self._postings.setdefault(text[pos:pos + 3], set()).add(item_id)
+
+    def iter_containing(self, needle):
+        if len(needle) < 3:
+            # Trigrammi non applicabili: scansione delle sole stringhe indicizzate
+            candidates = self._texts.keys()
+        else:
+            grams = sorted(
+                {needle[pos:pos + 3] for pos in range(len(needle) - 2)},
+                key=lambda gram: len(self._postings.get(gram, ()))
+            )
+            candidates = set(self._postings.get(grams[0], ()))
+            for gram in grams[1:]:
+                if not candidates:
+                    break
+                candidates &= self._postings.get(gram, set())
+        for item_id in candidates:
+            if any(needle in text for text in self._texts[item_id]):
+                yield item_id
+
+
+class BKTree:
+    """BK-tree sulla distanza di Levenshtein per ricerche con tolleranza typo."""
+
+    def __init__(self):
+        self._root = None
+
+    def add(self, word, item_id):
+        if self._root is None:
+            self._root = [word, _pattern_bits(word), {item_id}, {}]
+            return
+        node = self._root
+        while True:
+            distance = _myers_distance(node[1], len(node[0]), word)
+            if distance == 0:
+                node[2].add(item_id)
+                return
+            child = node[3].get(distance)
+            if child is None:
+                node[3][distance] = [word, _pattern_bits(word), {item_id}, {}]
+                return
+            node = child
+
+    def search(self, word, max_distance):
+        """
+        Ritorna [(distanza, parola, ids)] con distanza <= max_distance.
+        `word` puo' essere una QueryDistance gia' pronta (memo condivisa).
+        """
+        if self._root is None:
+            return []
+        distance_to = word if isinstance(word, QueryDistance) else QueryDistance(word)
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = distance_to(node[0])
+            if distance <= max_distance:
+                found.append((distance, node[0], node[2]))
+            low = distance - max_distance
+            high = distance + max_distance
+            for edge, child in node[3].items():
+                if low <= edge <= high:
+                    stack.append(child)
+        return found
+
+
+class TableSearchIndex:
+    """
+    Indice delle tabelle del dizionario per la ricerca fuzzy.
+
+    Come findBestTableMatches, una tabella fisica entra nei risultati con la
+    prima coppia (fisico, logico) del dizionario che supera min_score, e
+    fieldsCount conta le righe di quella tabella da quel record in poi.
+    """
+
+    def __init__(self, store, field_counts=None):
+        # field_counts: {logico: numero campi} quando lo store non ha ancora i campi (lazy_dictionary)
+        # table_id → (fisico, [(logico, fieldsCount, fisico_lower, logico_lower, first_row), ...])
+        self.tables = []
+        by_physical = {}
+        variants_seen = []
+        rows_seen = []
+        values = store.iter_values('TABELLA_FISICA', 'TABELLA_LOGICA')
+        for row_id, (fisico, logico) in enumerate(values):
+            if not fisico:
+                continue
+            logico = logico or ''
+            table_id = by_physical.get(fisico)
+            if table_id is None:
+                table_id = by_physical[fisico] = len(self.tables)
+                self.tables.append((fisico, []))
+                variants_seen.append(set())
+                rows_seen.append(0)
+            if logico not in variants_seen[table_id]:
+                variants_seen[table_id].add(logico)
+                # Per ora: righe gia' viste prima di questo descrittore
+                self.tables[table_id][1].append([logico, rows_seen[table_id], row_id])
+            rows_seen[table_id] += 1
+
+        self._exact = {}
+        prefix_items = []
+        self._contains = TrigramIndex()
+        self._fuzzy = {}  # lunghezza nome → BKTree
+        for table_id, (fisico, variants) in enumerate(self.tables):
+            fisico_lower = fisico.lower().strip()
+            names = {fisico_lower}
+            for pos, (logico, rows_before, first_row) in enumerate(variants):
+                logico_lower = logico.lower().strip()
+                fields_count = (rows_seen[table_id] - rows_before if field_counts is None
+                                else field_counts.get(logico, 0))
+                variants[pos] = (logico, fields_count, fisico_lower, logico_lower, first_row)
+                names.add(logico_lower)
+            for name in names:
+                if not name:
+                    continue
+                self._exact.setdefault(name, []).append(table_id)
+                prefix_items.append((name, table_id))
+                self._contains.add(table_id, _WHITESPACE_RE.sub('', name))
+                self._fuzzy.setdefault(len(name), BKTree()).add(name, table_id)
+        self._prefix = PrefixIndex(prefix_items)
+
+    def __len__(self):
+        return len(self.tables)
+
+    def _score(self, table_id, distance, min_score):
+        fisico, variants = self.tables[table_id]
+        for logico, fields_count, fisico_lower, logico_lower, first_row in variants:
+            score_data = score_table_match(fisico_lower, logico_lower, distance.query, distance)
+            if score_data['score'] >= min_score:
+                return first_row, {
+                    'fisico': fisico,
+                    'logico': logico,
+                    'score': score_data['score'],
+                    'type': score_data['type'],
+                    'match': score_data.get('match'),
+                    'similarity': score_data.get('similarity', 0),
+                    'fieldsCount': fields_count
+                }
+        return None, None
+
+    def _fuzzy_radius(self, name_length, query_length, threshold):
+        """Distanza massima per similarity > 0.5 e >= threshold (soglia del k-esimo)."""
+        max_len = max(name_length, query_length)
+        radius = (max_len + 1) // 2 - 1
+        if threshold is not None:
+            radius = min(radius, int(max_len * (1 - threshold) + 1e-9))
+        return radius
+
+    def _search_fuzzy(self, distance, needed, scored, seen, min_score):
+        """
+        Riempie `scored` con i migliori `needed` match fuzzy. Visita i BK-tree per
+        lunghezza partendo da quella della query; il raggio si stringe man mano
+        che la soglia (similarity del k-esimo fuzzy trovato) sale.
+        """
+        query_length = distance.length
+        fuzzy_scores = []
+        threshold = None
+        for name_length in sorted(self._fuzzy, key=lambda length: abs(length - query_length)):
+            radius = self._fuzzy_radius(name_length, query_length, threshold)
+            if radius < abs(name_length - query_length):
+                continue
+            for _, _, ids in self._fuzzy[name_length].search(distance, radius):
+                for table_id in ids - seen:
+                    seen.add(table_id)
+                    first_row, entry = self._score(table_id, distance, min_score)
+                    if entry:
+                        scored[first_row] = entry
+                        if entry['type'] == 'fuzzy':
+                            fuzzy_scores.append(entry['similarity'])
+            if len(fuzzy_scores) >= needed:
+                fuzzy_scores.sort(reverse=True)
+                del fuzzy_scores[needed:]
+                threshold = fuzzy_scores[-1]
+
+    def search(self, search_input, max_results=10, min_score=50):
+        """Stesso risultato di findBestTableMatches: {'exact': [...], 'suggestions': [...]}."""
+        query = normalize_search_input(search_input)
+        if not query or not self.tables:
+            return {'exact': [], 'suggestions': []}
+        distance = QueryDistance(query)
+
+        candidates = set(self._exact.get(query, ()))
+        candidates.update(self._prefix.iter_prefix(query))
+        candidates.update(self._contains.iter_containing(query))
+        scored = {}
+        for table_id in candidates:
+            first_row, entry = self._score(table_id, distance, min_score)
+            if entry:
+                scored[first_row] = entry
+
+        # I fuzzy valgono al massimo 100 punti, sotto qualsiasi starts with/contains:
+        # servono solo se i livelli superiori non riempiono i suggerimenti.
+        higher_tier = sum(1 for entry in scored.values() if entry['type'] in ('starts_with', 'contains'))
+        if higher_tier < max_results:
+            self._search_fuzzy(distance, max_results - higher_tier, scored, candidates, min_score)
+
+        # Ordine: score, fieldsCount, poi riga del primo record valido (sort stabile in JS)
+        ranked = sorted(scored.items(), key=lambda item: (-item[1]['score'], -item[1]['fieldsCount'], item[0]))
+        exact = [entry for _, entry in ranked if entry['type'] == 'exact']
+        suggestions = [entry for _, entry in ranked if entry['type'] != 'exact']
+        return {'exact': exact, 'suggestions': suggestions[:max_results]}
+
+
+class FieldIndex:
+    """
+    Indice invertito globale: nome campo normalizzato (fisico o logico) →
+    posting (tabella fisica, descrittore, campo logico, campo fisico).
+    Popolato da update_mappings; lookup exact / prefix / fuzzy su tutto lo schema.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._postings = {}
+        self._prefix = PrefixIndex()
+        self._fuzzy = None
+        self._new_keys = []
+
+    def add(self, key, posting):
+        postings = self._postings.get(key)
+        if postings is None:
+            self._postings[key] = [posting]
+            self._new_keys.append(key)
+        elif postings[-1] is not posting:
+            postings.append(posting)
+
+    def freeze(self):
+        """
+        Da chiamare a fine caricamento (anche dopo add incrementali): aggiunge
+        le chiavi nuove all'indice dei prefissi.
+        """
+        if self._new_keys:
+            # Due sequenze gia' ordinate: il sort le fonde in tempo lineare
+            self._prefix = PrefixIndex(self._prefix._entries + sorted((key, key) for key in self._new_keys))
+            self._fuzzy = None
+            self._new_keys = []
+
+    def __len__(self):
+        return len(self._postings)
+
+    def _fuzzy_trees(self):
+        # BK-tree per lunghezza, costruiti al primo lookup fuzzy
+        if self._fuzzy is None:
+            trees = {}
+            for key in list(self._postings):  # copia: add() incrementali da altri thread
+                trees.setdefault(len(key), BKTree()).add(key, key)
+            self._fuzzy = trees
+        return self._fuzzy
+
+    def exact(self, key):
+        return [(key, 0)] if key in self._postings else []
+
+    def prefix(self, prefix, limit=None):
+        keys = []
+        for key in self._prefix.iter_prefix(prefix):
+            keys.append((key, len(key) - len(prefix)))
+            if limit and len(keys) >= limit:
+                break
+        return keys
+
+    def fuzzy(self, key, max_distance):
+        distance = QueryDistance(key)
+        found = []
+        for length, tree in self._fuzzy_trees().items():
+            if abs(length - len(key)) > max_distance:
+                continue
+            found.extend((word, dist) for dist, word, _ in tree.search(distance, max_distance))
+        found.sort(key=lambda item: (item[1], item[0]))
+        return found
+
+    def postings(self, key):
+        return self._postings.get(key, [])
+
+    def lookup(self, key, mode='exact', limit=50, max_distance=None):
+        """
+        Ritorna [(chiave, distanza, postings)] ordinati per rilevanza.
+        mode: 'exact' | 'prefix' | 'fuzzy' (distanza di edit <= max_distance).
+        """
+        if not key:
+            return []
+        if mode == 'exact':
+            keys = self.exact(key)
+        elif mode == 'prefix':
+            keys = sorted(self.prefix(key), key=lambda item: (item[1], item[0]))
+        elif mode == 'fuzzy':
+            if max_distance is None:
+                max_distance = max(1, len(key) // 4)
+            keys = self.fuzzy(key, max_distance)
+        else:
+            raise ValueError(f'Modalita di ricerca non valida: {mode}')
+        return [(found, dist, self._postings[found]) for found, dist in keys[:limit]]
+
+
+class CompletionTrie:
+    """
+    Trie di prefissi per l'autocompletamento: ogni nodo conserva gia' i
+    migliori `top_k` completamenti del proprio sottoalbero, quindi un lookup
+    costa O(len(prefisso)) indipendentemente da quante chiavi condividono
+    il prefisso.
+    """
+
+    def __init__(self, top_k=20):
+        self.top_k = top_k
+        self._root = [{}, []]  # [figli, entry terminali → poi top-k del sottoalbero]
+        self._size = 0
+
+    def insert(self, key, entry, rank=None):
+        """key gia' normalizzata (minuscolo); rank ordina i completamenti (default: lunghezza, chiave)."""
+        node = self._root
+        for ch in key:
+            child = node[0].get(ch)
+            if child is None:
+                child = node[0][ch] = [{}, []]
+            node = child
+        node[1].append((rank if rank is not None else (len(key), key), entry))
+        self._size += 1
+
+    def freeze(self):
+        """Calcola i top-k per ogni nodo (post-order, iterativo)."""
+        stack = [(self._root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node[0].values())
+                continue
+            merged = list(node[1])
+            for child in node[0].values():
+                merged.extend(child[1])
+            merged.sort(key=lambda item: item[0])
+            node[1] = merged[:self.top_k]
+        return self
+
+    def complete(self, prefix, limit=None):
+        node = self._root
+        for ch in prefix:
+            node = node[0].get(ch)
+            if node is None:
+                return []
+        return [entry for _, entry in node[1][:limit or self.top_k]]
+
+    def __len__(self):
+        return self._size
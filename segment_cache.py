@@ -0,0 +1,58 @@
+"""
+Segment cache per la traduzione incrementale (traduzione live nell'editor).
+
+Una query viene tradotta per segmenti: rami UNION/INTERSECT/MINUS di primo
+livello e subquery (SELECT ...). Ogni segmento tradotto e' memorizzato con
+l'hash del suo testo: mentre l'utente scrive cambia di solito un solo
+segmento, gli altri si riusano senza ritradurli.
+
+Il contenuto dipende dal dizionario: update_mappings() svuota la cache a ogni
+nuovo dizionario (non per i campi aggiunti in modalita' lazy: i descrittori di
+una query sono caricati prima di tradurla). LRU con `max_entries` voci;
+thread-safe (traduzione nel thread della richiesta con JCTNT_TRANSLATE_TIMEOUT=0).
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def segment_key(kind, text):
+    """Hash del contenuto di un segmento, per direzione di traduzione."""
+    return hashlib.blake2b(f'{kind}\0{text}'.encode('utf-8'), digest_size=16).digest()
+
+
+class SegmentCache:
+
+    def __init__(self, max_entries=2000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind, text):
+        """Segmento gia' tradotto o None."""
+        key = segment_key(kind, text)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, kind, text, value):
+        key = segment_key(kind, text)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,254 @@
+"""
+Shared dictionary: un DictionaryStore pubblicato come file memory-mapped,
+condiviso in sola lettura fra piu' processi JCTNT dietro lo stesso proxy.
+
+- il processo che carica da Oracle scrive `dictionary-<versione>.bin` e poi
+  aggiorna `current.json` (os.replace, atomico)
+- gli altri processi fanno mmap del file: le colonne di id sono memoryview
+  sul segmento (zero copy), le stringhe del pool vengono decodificate solo
+  quando servono
+- un thread di polling su `current.json` notifica le nuove versioni
+
+Condivise sono solo le righe: le strutture derivate (mappe del traduttore,
+indici di ricerca, impronte) restano per processo e, costruendole, ogni
+processo decodifica l'intero pool in memoria privata (vedi README).
+
+Si usano file versionati (mai riscritti) perche' su Windows un file mappato
+non puo' essere sostituito.
+
+Formato (little endian, sezioni allineate a 4 byte):
+    header  '<4sIIII'  magic, formato, n_valori, n_righe, len(meta)
+    meta    JSON (indexes, index_columns, connection_key, ...)
+    tipi    1 byte per valore: s=str, i=int, f=float
+    offset  uint32 * (n_valori + 1) nel blob
+    blob    valori in UTF-8 (numeri come testo)
+    colonne uint32 * n_righe per ogni colonna di COLUMNS
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+
+from dictionary_store import COLUMNS, DictionaryStore
+
+MAGIC = b'JCTD'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sIIII')
+CURRENT_FILE = 'current.json'
+
+_DECODERS = {ord('s'): str, ord('i'): int, ord('f'): float}
+
+
+def _pad(data):
+    return data + b'\0' * (-len(data) % 4)
+
+
+def _to_le(values):
+    if array('I').itemsize != 4:
+        raise RuntimeError('array("I") non a 32 bit su questa piattaforma')
+    if struct.pack('=I', 1) != struct.pack('<I', 1):
+        values = array('I', values)
+        values.byteswap()
+    return values.tobytes()
+
+
+# --- Serializzazione ---
+def encode_store(store, meta):
+    """Serializza store + meta (dict JSON) nel formato condiviso."""
+    values = store._values
+    tags = bytearray()
+    offsets = array('I', [0])
+    blob = bytearray()
+    for value in values:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            tags.append(ord('s'))
+            text = str(value)
+        else:
+            tags.append(ord('i') if isinstance(value, int) else ord('f'))
+            text = repr(value)
+        blob += text.encode('utf-8')
+        offsets.append(len(blob))
+
+    meta_bytes = json.dumps(meta).encode('utf-8')
+    parts = [
+        HEADER.pack(MAGIC, FORMAT_VERSION, len(values), len(store), len(meta_bytes)),
+        _pad(meta_bytes),
+        _pad(bytes(tags)),
+        _to_le(offsets),
+        _pad(bytes(blob)),
+    ]
+    parts.extend(_to_le(store.column_ids(column)) for column in COLUMNS)
+    return b''.join(parts)
+
+
+class _LazyValues:
+    """Pool dei valori letto dal segmento condiviso, decodificato al primo accesso."""
+
+    def __init__(self, tags, offsets, blob):
+        self._tags = tags
+        self._offsets = offsets
+        self._blob = blob
+        self._cache = [None] * len(tags)
+        self._cache[0] = ''
+
+    def __len__(self):
+        return len(self._tags)
+
+    def __getitem__(self, value_id):
+        value = self._cache[value_id]
+        if value is None:
+            text = str(self._blob[self._offsets[value_id]:self._offsets[value_id + 1]], 'utf-8')
+            value = _DECODERS[self._tags[value_id]](text)
+            self._cache[value_id] = value
+        return value
+
+    def __iter__(self):
+        return (self[value_id] for value_id in range(len(self)))
+
+
+class SharedDictionaryStore(DictionaryStore):
+    """
+    DictionaryStore in sola lettura sopra un buffer (mmap). Stessa API di
+    lettura di DictionaryStore: to_records, iter_values, rows_where...
+    """
+
+    def __init__(self, buffer):
+        view = memoryview(buffer)
+        magic, fmt, n_values, n_rows, meta_len = HEADER.unpack_from(view, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise ValueError('Segmento dizionario non valido')
+        pos = HEADER.size
+        self.meta = json.loads(bytes(view[pos:pos + meta_len]))
+        pos += meta_len + (-meta_len % 4)
+        tags = view[pos:pos + n_values]
+        pos += n_values + (-n_values % 4)
+        offsets = view[pos:pos + 4 * (n_values + 1)].cast('I')
+        pos += 4 * (n_values + 1)
+        blob_len = offsets[n_values]
+        blob = view[pos:pos + blob_len]
+        pos += blob_len + (-blob_len % 4)
+        columns = []
+        for _ in COLUMNS:
+            columns.append(view[pos:pos + 4 * n_rows].cast('I'))
+            pos += 4 * n_rows
+
+        self._buffer = buffer
+        self._values = _LazyValues(tags, offsets, blob)
+        self._columns = tuple(columns)
+        self._value_ids_cache = None
+
+    @property
+    def _value_ids(self):
+        # Serve solo a rows_where: costruito alla prima richiesta
+        if self._value_ids_cache is None:
+            self._value_ids_cache = {(value, type(value)): value_id for value_id, value in enumerate(self._values)}
+        return self._value_ids_cache
+
+    def intern(self, value):
+        raise TypeError('SharedDictionaryStore e\' in sola lettura')
+
+    def append(self, values):
+        raise TypeError('SharedDictionaryStore e\' in sola lettura')
+
+    def memory_usage(self):
+        """Solo la memoria privata del processo (stringhe gia' decodificate)."""
+        return sum(64 + len(value) for value in self._values._cache if isinstance(value, str))
+
+
+# --- Pubblicazione / attach ---
+class SharedDictionary:
+    """
+    Directory condivisa fra i processi. `publish` scrive una nuova versione,
+    `attach` mappa la versione corrente, `watch` chiama on_version(store) a
+    ogni nuova versione pubblicata da un altro processo.
+    """
+
+    def __init__(self, directory, keep_versions=2):
+        self.directory = directory
+        self.keep_versions = keep_versions
+        self.version = None  # versione in uso in questo processo
+        self._lock = threading.Lock()
+        self._thread = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _current(self):
+        try:
+            with open(os.path.join(self.directory, CURRENT_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def current_version(self):
+        current = self._current()
+        return current['version'] if current else None
+
+    def publish(self, store, meta):
+        """Scrive store + meta come nuova versione. Ritorna la versione."""
+        with self._lock:
+            version = time.time_ns()
+            filename = f'dictionary-{version}.bin'
+            path = os.path.join(self.directory, filename)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(encode_store(store, dict(meta, version=version)))
+            os.replace(path + '.tmp', path)
+
+            # Prima di aggiornare current.json: il watcher di questo processo non la ricarica
+            self.version = version
+            current_path = os.path.join(self.directory, CURRENT_FILE)
+            with open(current_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump({'version': version, 'file': filename, 'pid': os.getpid()}, f)
+            os.replace(current_path + '.tmp', current_path)
+            self._cleanup()
+            return version
+
+    def _cleanup(self):
+        files = sorted(name for name in os.listdir(self.directory)
+                       if name.startswith('dictionary-') and name.endswith('.bin'))
+        for name in files[:-self.keep_versions]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass  # ancora mappato da un altro processo (Windows)
+
+    def attach(self):
+        """
+        (store, versione) della versione corrente, o (None, None). Non cambia
+        `self.version`: la versione e' in uso solo dopo l'attivazione.
+        """
+        current = self._current()
+        if not current:
+            return None, None
+        with open(os.path.join(self.directory, current['file']), 'rb') as f:
+            segment = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return SharedDictionaryStore(segment), current['version']
+
+    def watch(self, on_version, interval=1.0):
+        """
+        Thread di polling: on_version(store) per ogni versione nuova. Se
+        on_version fallisce la versione non e' considerata in uso e viene
+        riprovata al giro successivo (l'errore si logga una volta).
+        """
+        def run():
+            failed = None
+            while True:
+                version = None
+                try:
+                    version = self.current_version()
+                    if version is not None and version != self.version:
+                        store, version = self.attach()
+                        if store is not None:
+                            on_version(store)
+                            self.version = version
+                except Exception as exc:
+                    # Anche un errore di on_version non deve fermare il polling
+                    if failed != (version, repr(exc)):
+                        failed = (version, repr(exc))
+                        print(f"[WARN] Dizionario condiviso v{version} non caricato: {exc!r}")
+                time.sleep(interval)
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=run, name='shared-dictionary', daemon=True)
+            self._thread.start()
@@ -5,6 +5,7 @@
 
 // --- State ---
 let dictionary = [];
+let dictionaryLazy = false;  // campi caricati dal server al primo uso (vedi /api/table-fields)
 let indexes = [];
 let indexColumns = [];
 let connectionHistory = [];
@@ -12,7 +13,6 @@ let searchHistory = [];
 let currentTablePhysical = '';
 let currentTableLogical = '';
 let currentIndexes = [];
-let currentIndexColumns = [];
 let hasSearchResults = false;
 let isTranslating = false;
 let currentResults = [];
@@ -29,6 +29,7 @@ const btnTranslate = $('btn-translate');
 const btnBack = $('btn-back');
 const btnCopyFields = $('btn-copy-fields');
 const btnCopyIndexes = $('btn-copy-indexes');
+const btnExportFields = $('btn-export-fields');
 const connStatus = $('conn-status');
 const resultsCard = $('results-card');
 const searchCard = $('search-card');
@@ -291,6 +292,85 @@ async function loadSearchHistory() {
     } catch (e) { console.log('No search history'); }
 }
 
+// Ricerca tabelle: nel worker se il dizionario e' in memoria, altrimenti lato
+// server (indici costruiti al caricamento). Una nuova ricerca sullo stesso
+// `channel` annulla la precedente, che ritorna null (risultato superato).
+const searchAborts = {};
+
+async function searchTables(tableInput, maxResults = 10, minScore = 50, channel = 'search') {
+    if (searchClient.ready) {
+        return searchClient.searchTables(tableInput, maxResults, minScore, channel);
+    }
+    if (searchAborts[channel]) searchAborts[channel].abort();
+    const controller = searchAborts[channel] = new AbortController();
+    try {
+        const params = new URLSearchParams({ q: tableInput, limit: maxResults, min_score: minScore });
+        const res = await fetch(`${BASE}/api/search-tables?${params}`, { signal: controller.signal });
+        if (res.ok) {
+            const data = await res.json();
+            return { exact: data.exact || [], suggestions: data.suggestions || [] };
+        }
+    } catch (e) {
+        if (e.name === 'AbortError') return null;
+    } finally {
+        if (searchAborts[channel] === controller) delete searchAborts[channel];
+    }
+    return { exact: [], suggestions: [] };
+}
+
+// Righe della tabella: dal dizionario locale, o dal server in modalita' lazy
+// (il server legge i campi da Oracle al primo uso).
+async function getTableRows(fisico) {
+    if (!dictionaryLazy) {
+        return searchClient.tableRows(fisico);
+    }
+    try {
+        const res = await fetch(`${BASE}/api/table-fields?${new URLSearchParams({ table: fisico })}`);
+        if (res.ok) {
+            const data = await res.json();
+            return data.rows || [];
+        }
+    } catch (e) { /* fall through */ }
+    return [];
+}
+
+// Indici della tabella gia' pronti dal server (dedup, owner, colonne ordinate).
+// Fallback sul calcolo locale se il server non risponde.
+async function fetchTableIndexes(table) {
+    try {
+        const res = await fetch(`${BASE}/api/table-indexes?${new URLSearchParams({ table })}`);
+        if (res.ok) {
+            const data = await res.json();
+            return data.indexes || [];
+        }
+    } catch (e) { /* fall through */ }
+    return buildTableIndexesLocal(table);
+}
+
+function buildTableIndexesLocal(table) {
+    const tableIndexes = indexes.filter(i => matchesTableEntry(i, table));
+    const tableIndexColumns = indexColumns.filter(c => matchesTableEntry(c, table));
+    const preferredOwner = pickIndexOwner(tableIndexes, tableIndexColumns);
+    const ownerFilteredIndexes = preferredOwner
+        ? tableIndexes.filter(i => normalizeTableName(i.TABLE_OWNER || '') === preferredOwner)
+        : tableIndexes;
+    const ownerFilteredColumns = preferredOwner
+        ? tableIndexColumns.filter(c => normalizeTableName(c.TABLE_OWNER || '') === preferredOwner)
+        : tableIndexColumns;
+
+    const columns = dedupeIndexColumns(ownerFilteredColumns);
+    return dedupeIndexes(ownerFilteredIndexes).map(idx => {
+        const key = getIndexKey(idx);
+        return {
+            INDEX_NAME: idx.INDEX_NAME,
+            INDEX_OWNER: idx.INDEX_OWNER,
+            UNIQUENESS: idx.UNIQUENESS,
+            key,
+            columns: columns.filter(c => getIndexKey(c) === key)
+        };
+    });
+}
+
 async function loadConnectionData() {
     try {
         const res = await fetch(`${BASE}/api/connection-data`);
@@ -343,6 +423,7 @@ if (inputTecsql) {
 
     // Enter on empty left textarea → clear right textarea too
     inputTecsql.addEventListener('keydown', (e) => {
+        if (handleAutocompleteKey(e)) return;
         if (e.key === 'Enter' && inputTecsql.value.trim() === '') {
             e.preventDefault();
             if (outputSql) outputSql.value = '';
@@ -353,15 +434,117 @@ if (inputTecsql) {
     });
 }
 
+// --- TecSQL Autocomplete (server-side, trie) ---
+const autocompleteList = $('tecsql-autocomplete');
+let autocompleteItems = [];
+let autocompleteActive = 0;
+let autocompleteReplace = 0;
+let autocompleteSeq = 0;
+let autocompleteTimer = null;
+
+function hideAutocomplete() {
+    autocompleteItems = [];
+    if (autocompleteList) autocompleteList.style.display = 'none';
+}
+
+function renderAutocomplete() {
+    if (!autocompleteList || autocompleteItems.length === 0) {
+        hideAutocomplete();
+        return;
+    }
+    autocompleteList.innerHTML = '';
+    autocompleteItems.forEach((item, i) => {
+        const row = document.createElement('div');
+        row.className = 'autocomplete-item' + (i === autocompleteActive ? ' active' : '');
+        const text = document.createElement('span');
+        text.textContent = item.text;
+        const detail = document.createElement('span');
+        detail.className = 'autocomplete-detail';
+        detail.textContent = item.detail || item.kind;
+        row.append(text, detail);
+        row.addEventListener('mousedown', (e) => {
+            e.preventDefault();
+            applyAutocomplete(i);
+        });
+        autocompleteList.appendChild(row);
+    });
+    autocompleteList.style.display = 'block';
+}
+
+function applyAutocomplete(i) {
+    const item = autocompleteItems[i];
+    if (!item) return;
+    const pos = inputTecsql.selectionStart;
+    const before = inputTecsql.value.slice(0, pos - autocompleteReplace);
+    inputTecsql.value = before + item.text + inputTecsql.value.slice(pos);
+    const caret = before.length + item.text.length;
+    inputTecsql.setSelectionRange(caret, caret);
+    hideAutocomplete();
+    updateTranslateButtonState();
+}
+
+function handleAutocompleteKey(e) {
+    if (autocompleteItems.length === 0) return false;
+    if (e.key === 'ArrowDown' || e.key === 'ArrowUp') {
+        const step = e.key === 'ArrowDown' ? 1 : -1;
+        autocompleteActive = (autocompleteActive + step + autocompleteItems.length) % autocompleteItems.length;
+        renderAutocomplete();
+    } else if (e.key === 'Tab' || e.key === 'Enter') {
+        applyAutocomplete(autocompleteActive);
+    } else if (e.key === 'Escape') {
+        hideAutocomplete();
+    } else {
+        return false;
+    }
+    e.preventDefault();
+    return true;
+}
+
+async function requestAutocomplete() {
+    const pos = inputTecsql.selectionStart;
+    const textBefore = inputTecsql.value.slice(0, pos);
+    // Solo se il cursore e' alla fine di una parola (non dopo spazi/simboli)
+    if ((dictionary.length === 0 && !dictionaryLazy) || !/[\w$.]$/.test(textBefore)) {
+        hideAutocomplete();
+        return;
+    }
+    const seq = ++autocompleteSeq;
+    try {
+        const res = await fetch(`${BASE}/api/autocomplete`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ text_before_cursor: textBefore, query: inputTecsql.value, limit: 10 })
+        });
+        if (!res.ok || seq !== autocompleteSeq) return;  // risposta superata da una richiesta piu' recente
+        const data = await res.json();
+        autocompleteItems = data.completions || [];
+        autocompleteReplace = data.replace || 0;
+        autocompleteActive = 0;
+        renderAutocomplete();
+    } catch (e) {
+        hideAutocomplete();
+    }
+}
+
+if (inputTecsql) {
+    inputTecsql.addEventListener('input', () => {
+        clearTimeout(autocompleteTimer);
+        autocompleteTimer = setTimeout(requestAutocomplete, 40);
+    });
+    inputTecsql.addEventListener('blur', hideAutocomplete);
+}
+
 // --- Event: Translate Query ---
 if (btnTranslateQuery) {
     btnTranslateQuery.addEventListener('click', async () => {
         const rawQuery = inputTecsql ? inputTecsql.value.trim() : '';
         if (!rawQuery) return;
 
+        cancelLiveTranslate();
         clearTranslateStatus();
         hideDescriptorChoice();
         hidePartialWarning();
+        hideIndexAdvice();
         setTranslateLoading(true);
         if (outputSql) outputSql.value = '';
 
@@ -371,37 +554,10 @@ if (btnTranslateQuery) {
             const res = await fetch(`${BASE}/api/translate-query`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ query: rawQuery, strip_params: stripParams })
+                body: JSON.stringify({ query: rawQuery, strip_params: stripParams, index_advice: indexAdviceEnabled(), user: getUserId() })
             });
             const data = await res.json();
-
-            // Handle descriptor disambiguation
-            if (data.ambiguous) {
-                setTranslateStatus('info', 'Multiple descriptors available. Choose one.');
-                showDescriptorChoice(data.table, data.candidates, data.fields_used);
-                setTranslateLoading(false);
-                return;
-            }
-
-            if (!res.ok || data.error) {
-                // Inline error message (no alerts).
-                setTranslateStatus('error', data.error || 'Errore di traduzione');
-            } else {
-                // Handle bidirectional output
-                if (data.direction === 'tecsql_to_sql') {
-                    if (outputSql) outputSql.value = data.sql || '';
-                    setTranslateStatus('success', 'TecSQL → SQL completed');
-                } else if (data.direction === 'sql_to_tecsql') {
-                    if (outputSql) outputSql.value = data.tecsql || '';
-
-                    // Show partial translation warning
-                    if (data.partial_translation) {
-                        showPartialTranslationWarning(data.untranslated_fields);
-                    }
-
-                    setTranslateStatus('success', 'SQL → TecSQL completed');
-                }
-            }
+            showTranslation(res, data);
         } catch (e) {
             setTranslateStatus('error', 'Errore di comunicazione con il server');
         }
@@ -411,6 +567,103 @@ if (btnTranslateQuery) {
     });
 }
 
+// Risposta di /api/translate-query: output, stato e pannelli (scelta descrittore, avvisi)
+function showTranslation(res, data) {
+    // Handle descriptor disambiguation
+    if (data.ambiguous) {
+        setTranslateStatus('info', 'Multiple descriptors available. Choose one.');
+        showDescriptorChoice(data.table, data.candidates, data.fields_used);
+        return;
+    }
+
+    if (!res.ok || data.error) {
+        // Inline error message (no alerts).
+        setTranslateStatus('error', data.error || 'Errore di traduzione');
+    } else {
+        // Handle bidirectional output
+        if (data.direction === 'tecsql_to_sql') {
+            if (outputSql) outputSql.value = data.sql || '';
+            setTranslateStatus('success', 'TecSQL → SQL completed');
+            showIndexAdvice(data.index_advice);
+        } else if (data.direction === 'sql_to_tecsql') {
+            if (outputSql) outputSql.value = data.tecsql || '';
+
+            // Show partial translation warning
+            if (data.partial_translation) {
+                showPartialTranslationWarning(data.untranslated_fields);
+            }
+
+            setTranslateStatus('success', 'SQL → TecSQL completed');
+            showRememberedChoices(data.descriptor_choices);
+            showIndexAdvice(data.index_advice);
+        }
+    }
+}
+
+// --- Traduzione live (debounce, richieste superate annullate) ---
+// Il server traduce in modalita' incrementale: solo i rami UNION e le
+// subquery cambiati dall'ultima richiesta vengono ritradotti.
+const LIVE_TRANSLATE_DELAY = 300;
+const liveToggle = $('toggle-live-translate');
+let liveTimer = null;
+let liveAbort = null;
+
+function liveTranslateEnabled() {
+    return liveToggle?.checked ?? false;
+}
+
+function cancelLiveTranslate() {
+    clearTimeout(liveTimer);
+    if (liveAbort) liveAbort.abort();
+    liveAbort = null;
+}
+
+async function liveTranslate() {
+    const rawQuery = inputTecsql ? inputTecsql.value.trim() : '';
+    cancelLiveTranslate();
+    if (!rawQuery) return;
+    const controller = liveAbort = new AbortController();
+    try {
+        const res = await fetch(`${BASE}/api/translate-query`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                query: rawQuery,
+                strip_params: document.getElementById('toggle-strip-params')?.checked ?? false,
+                index_advice: indexAdviceEnabled(),
+                user: getUserId(),
+                incremental: true
+            }),
+            signal: controller.signal
+        });
+        const data = await res.json();
+        if (controller !== liveAbort) return;
+        hideDescriptorChoice();
+        hidePartialWarning();
+        hideIndexAdvice();
+        showTranslation(res, data);
+    } catch (e) {
+        if (e.name === 'AbortError') return;
+        setTranslateStatus('error', 'Errore di comunicazione con il server');
+    } finally {
+        if (liveAbort === controller) liveAbort = null;
+    }
+}
+
+if (inputTecsql) {
+    inputTecsql.addEventListener('input', () => {
+        if (!liveTranslateEnabled()) return;
+        clearTimeout(liveTimer);
+        liveTimer = setTimeout(liveTranslate, LIVE_TRANSLATE_DELAY);
+    });
+}
+if (liveToggle) {
+    liveToggle.addEventListener('change', () => {
+        if (liveTranslateEnabled()) liveTranslate();
+        else cancelLiveTranslate();
+    });
+}
+
 // --- Event: Swap Button ---
 const btnSwap = $('btn-swap');
 if (btnSwap) {
@@ -423,7 +676,108 @@ if (btnSwap) {
         clearTranslateStatus();
         hideDescriptorChoice();
         hidePartialWarning();
+        hideIndexAdvice();
+    });
+}
+
+// --- Dictionary from /api/connect ---
+// `cached`: copia IndexedDB inviata come known_version; con 'unchanged' il server non rimanda le righe
+function applyConnectResult(result, cached) {
+    if (result.unchanged && cached) {
+        dictionary = cached.data;
+        indexes = cached.indexes || [];
+        indexColumns = cached.index_columns || [];
+    } else {
+        dictionary = result.data;
+        indexes = result.indexes || [];
+        indexColumns = result.index_columns || [];
+        if (result.version) saveCachedDictionary(result);
+    }
+    dictionaryLazy = !!result.lazy;
+    // Copia indicizzata nel worker di ricerca (in modalita' lazy cerca il server)
+    searchClient.load(dictionaryLazy ? [] : dictionary);
+}
+
+function connectBody(creds, cached) {
+    return JSON.stringify(cached ? { ...creds, known_version: cached.version } : creds);
+}
+
+// --- Dictionary load job (avanzamento via Server-Sent Events) ---
+const LOAD_PHASES = {
+    queued: 'In coda',
+    connect: 'Connessione a Oracle',
+    fields: 'Lettura campi',
+    indexes: 'Lettura indici',
+    index_columns: 'Lettura colonne indici',
+    mappings: 'Costruzione mapping',
+    search_index: 'Indici di ricerca',
+    digest: 'Impronte del dizionario',
+    cache: 'Salvataggio in cache'
+};
+
+function describeLoadProgress(job) {
+    const detail = job.detail || {};
+    let text = LOAD_PHASES[job.phase] || job.phase;
+    if (job.phase === 'fields' && detail.rows !== undefined) {
+        text += `: ${detail.rows.toLocaleString('it-IT')}`;
+        if (detail.expected) text += ` / ${detail.expected.toLocaleString('it-IT')}`;
+        text += ' righe';
+    } else if (detail.indexes !== undefined) {
+        text += `: ${detail.indexes} indici`;
+    } else if (detail.index_columns !== undefined) {
+        text += `: ${detail.index_columns} colonne`;
+    }
+    return `${text}... (${Math.round((job.elapsed_ms || 0) / 1000)} s)`;
+}
+
+// Segue il job fino a done/failed. EventSource si riaggancia da solo dopo un
+// errore di rete (Last-Event-ID); chiudere la pagina non ferma il caricamento.
+function followLoadJob(jobId, onProgress) {
+    return new Promise(resolve => {
+        const source = new EventSource(`${BASE}/api/load-jobs/${encodeURIComponent(jobId)}/events`);
+        const finish = job => {
+            source.close();
+            resolve(job);
+        };
+        source.addEventListener('progress', e => onProgress(JSON.parse(e.data)));
+        source.addEventListener('done', e => finish(JSON.parse(e.data)));
+        source.addEventListener('failed', e => finish(JSON.parse(e.data)));
+        source.onerror = () => {
+            // CLOSED: job non piu' disponibile (es. server riavviato), niente riconnessione
+            if (source.readyState === EventSource.CLOSED) {
+                finish({ status: 'failed', message: 'Caricamento non piu\' disponibile sul server' });
+            }
+        };
+    });
+}
+
+// /api/connect come load job: un secondo Connetti (o un reload) sulla stessa
+// connessione si aggancia al caricamento in corso invece di avviarne un altro.
+async function connectWithProgress(creds, cached, onProgress) {
+    const res = await fetch(`${BASE}/api/connect`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: connectBody({ ...creds, job: true }, cached)
     });
+    const started = await res.json();
+    if (!started.job_id) return started;  // dizionario gia' in cache sul server
+
+    const job = await followLoadJob(started.job_id, onProgress);
+    if (job.status !== 'done') {
+        return { success: false, message: job.message || 'Caricamento non riuscito' };
+    }
+    // Dizionario ora in cache sul server: risposta immediata
+    const final = await fetch(`${BASE}/api/connect`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: connectBody(creds, cached)
+    });
+    return final.json();
+}
+
+function showLoadProgress(job) {
+    connStatus.className = 'status-box info';
+    connStatus.textContent = describeLoadProgress(job);
 }
 
 // --- Event: Connect ---
@@ -435,23 +789,17 @@ btnConnect.addEventListener('click', async () => {
     btnNextContainer.style.display = 'none';
 
     try {
-        const res = await fetch(`${BASE}/api/connect`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                host: $('conn-host').value,
-                port: $('conn-port').value,
-                sid: $('conn-sid').value,
-                username: $('conn-user').value,
-                password: $('conn-pass').value
-            })
-        });
-        const result = await res.json();
+        const cached = await loadCachedDictionary();
+        const result = await connectWithProgress({
+            host: $('conn-host').value,
+            port: $('conn-port').value,
+            sid: $('conn-sid').value,
+            username: $('conn-user').value,
+            password: $('conn-pass').value
+        }, cached, showLoadProgress);
 
         if (result.success) {
-            dictionary = result.data;
-            indexes = result.indexes || [];
-            indexColumns = result.index_columns || [];
+            applyConnectResult(result, cached);
             connStatus.className = 'status-box success';
             connStatus.textContent = result.message;
             btnConnect.classList.remove('btn-primary');
@@ -497,6 +845,8 @@ function goBack() {
     searchCard.classList.add('expanded');
     setResultsEnabled(false);
     dictionary = [];
+    dictionaryLazy = false;
+    searchClient.load([]);
     indexes = [];
     indexColumns = [];
     btnNextContainer.style.display = 'none';
@@ -508,82 +858,97 @@ function goBack() {
 btnBack.addEventListener('click', goBack);
 
 // --- Index Row Toggle ---
-function toggleIndexRow(indexKey, rowElement) {
-    const isExpanded = rowElement.classList.contains('expanded');
-    const detailRowId = 'detail-' + indexKey.replace(/[^a-zA-Z0-9]/g, '_');
-    const existingDetail = $(detailRowId);
-    
-    if (isExpanded) {
-        rowElement.classList.remove('expanded');
-        if (existingDetail) existingDetail.remove();
+// Righe espanse per chiave indice: il dettaglio viene ridisegnato con la riga
+const expandedIndexes = new Set();
+
+function toggleIndexRow(indexKey) {
+    if (expandedIndexes.has(indexKey)) {
+        expandedIndexes.delete(indexKey);
     } else {
-        rowElement.classList.add('expanded');
-        const cols = currentIndexColumns.filter(c => getIndexKey(c) === indexKey);
-        
-        const detailRow = document.createElement('tr');
-        detailRow.className = 'index-detail-row';
-        detailRow.id = detailRowId;
-        
-        let colsHtml = '';
-        if (cols.length > 0) {
-            colsHtml = `
-                <table>
-                    <thead><tr><th>COLONNA</th><th>POSIZIONE</th></tr></thead>
-                    <tbody>
-                        ${cols.map(c => `<tr><td>${c.COLUMN_NAME}</td><td>${c.COLUMN_POSITION}</td></tr>`).join('')}
-                    </tbody>
-                </table>
-            `;
-        } else {
-            colsHtml = '<em style="color:#888;">Nessuna colonna</em>';
-        }
-        
-        detailRow.innerHTML = `<td colspan="3"><div class="detail-content">${colsHtml}</div></td>`;
-        
-        detailRow.querySelectorAll('.detail-content td').forEach(td => {
-            td.addEventListener('click', (e) => {
-                e.stopPropagation();
-                copyCell(td);
-            });
-        });
-        
-        rowElement.after(detailRow);
+        expandedIndexes.add(indexKey);
     }
+    indexesTable.refresh();
 }
 
-// --- Render Functions ---
-function renderIndexes(data) {
-    currentIndexes = data;
-    indexesBody.innerHTML = '';
-    
-    if (data.length === 0) {
-        indexesBody.innerHTML = '<tr><td colspan="3" class="no-data">Nessun indice trovato per questa tabella</td></tr>';
-        return;
+function renderIndexDetailRow(index) {
+    const cols = index.columns || [];
+    const detailRow = document.createElement('tr');
+    detailRow.className = 'index-detail-row';
+
+    let colsHtml = '';
+    if (cols.length > 0) {
+        colsHtml = `
+            <table>
+                <thead><tr><th>COLONNA</th><th>POSIZIONE</th></tr></thead>
+                <tbody>
+                    ${cols.map(c => `<tr><td>${c.COLUMN_NAME}</td><td>${c.COLUMN_POSITION}</td></tr>`).join('')}
+                </tbody>
+            </table>
+        `;
+    } else {
+        colsHtml = '<em style="color:#888;">Nessuna colonna</em>';
     }
 
-    data.forEach((row) => {
-        const tr = document.createElement('tr');
-        const indexKey = getIndexKey(row);
-        tr.className = 'index-row';
-        tr.dataset.indexKey = indexKey;
-        tr.innerHTML = `
-            <td style="text-align:center; width:40px;">
-                <svg class="expand-icon" viewBox="0 0 24 24">
-                    <path d="M9 18l6-6-6-6" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"/>
-                </svg>
-            </td>
-            <td>${row.INDEX_NAME}</td>
-            <td>${row.UNIQUENESS}</td>
-        `;
-        tr.querySelector('td:first-child').addEventListener('click', (e) => {
+    detailRow.innerHTML = `<td colspan="3"><div class="detail-content">${colsHtml}</div></td>`;
+
+    detailRow.querySelectorAll('.detail-content td').forEach(td => {
+        td.addEventListener('click', (e) => {
             e.stopPropagation();
-            toggleIndexRow(indexKey, tr);
-        });
-        tr.querySelectorAll('td:not(:first-child)').forEach(td => {
-            td.addEventListener('click', () => copyCell(td));
+            copyCell(td);
         });
-        indexesBody.appendChild(tr);
     });
+    return detailRow;
+}
+
+// --- Render Functions ---
+// Tabelle virtualizzate: nel DOM solo le righe visibili (vedi virtual-table.js)
+const RESULT_COLUMNS = ['TABELLA_FISICA','CAMPO_FISICO','TABELLA_LOGICA','CAMPO_LOGICO','TIPO','AMPIEZZA','DECIMALI'];
+
+function renderIndexRow(row) {
+    const tr = document.createElement('tr');
+    const indexKey = row.key;
+    tr.className = 'index-row';
+    tr.dataset.indexKey = indexKey;
+    tr.innerHTML = `
+        <td style="text-align:center; width:40px;">
+            <svg class="expand-icon" viewBox="0 0 24 24">
+                <path d="M9 18l6-6-6-6" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"/>
+            </svg>
+        </td>
+        <td>${row.INDEX_NAME}</td>
+        <td>${row.UNIQUENESS}</td>
+    `;
+    tr.querySelector('td:first-child').addEventListener('click', (e) => {
+        e.stopPropagation();
+        toggleIndexRow(indexKey);
+    });
+    tr.querySelectorAll('td:not(:first-child)').forEach(td => {
+        td.addEventListener('click', () => copyCell(td));
+    });
+    if (!expandedIndexes.has(indexKey)) return tr;
+    tr.classList.add('expanded');
+    return [tr, renderIndexDetailRow(row)];
+}
+
+function renderResultRow(row) {
+    const tr = document.createElement('tr');
+    if (row.notFound) tr.className = 'not-found';
+    RESULT_COLUMNS.forEach(col => {
+        const td = document.createElement('td');
+        td.textContent = row[col] ?? '';
+        td.addEventListener('click', () => copyCell(td));
+        tr.appendChild(td);
+    });
+    return tr;
+}
+
+const indexesTable = new VirtualTable(indexesBody, { columns: 3, renderRow: renderIndexRow });
+const resultsTable = new VirtualTable(resultsBody, { columns: RESULT_COLUMNS.length, renderRow: renderResultRow });
+
+function renderIndexes(data) {
+    currentIndexes = data;
+    expandedIndexes.clear();
+    indexesTable.setItems(data, '<tr><td colspan="3" class="no-data">Nessun indice trovato per questa tabella</td></tr>');
 }
 
 function renderResults(data, keepSort = false) {
@@ -596,22 +961,10 @@ function renderResults(data, keepSort = false) {
         });
     }
 
-    resultsBody.innerHTML = '';
-    currentResults.forEach(row => {
-        const tr = document.createElement('tr');
-        if (row.notFound) tr.className = 'not-found';
-        const cols = ['TABELLA_FISICA','CAMPO_FISICO','TABELLA_LOGICA','CAMPO_LOGICO','TIPO','AMPIEZZA','DECIMALI'];
-        cols.forEach(col => {
-            const td = document.createElement('td');
-            td.textContent = row[col] ?? '';
-            td.addEventListener('click', () => copyCell(td));
-            tr.appendChild(td);
-        });
-        resultsBody.appendChild(tr);
-    });
+    resultsTable.setItems(currentResults);
 }
 
-function sortResults(col) {
+async function sortResults(col) {
     if (sortState.col === col) {
         sortState.asc = !sortState.asc;
     } else {
@@ -619,21 +972,13 @@ function sortResults(col) {
         sortState.asc = true;
     }
 
-    currentResults.sort((a, b) => {
-        let va = a[col] ?? '';
-        let vb = b[col] ?? '';
-        // Numeric sort for AMPIEZZA / DECIMALI
-        if (col === 'AMPIEZZA' || col === 'DECIMALI') {
-            va = parseFloat(va) || 0;
-            vb = parseFloat(vb) || 0;
-            return sortState.asc ? va - vb : vb - va;
-        }
-        va = String(va).toLowerCase();
-        vb = String(vb).toLowerCase();
-        if (va < vb) return sortState.asc ? -1 : 1;
-        if (va > vb) return sortState.asc ? 1 : -1;
-        return 0;
-    });
+    // Ordinamento nel worker (click ripetuti: vale solo l'ultimo)
+    const rows = currentResults;
+    const { asc } = sortState;
+    const numeric = col === 'AMPIEZZA' || col === 'DECIMALI';
+    const order = await searchClient.sortOrder(rows.map(r => r[col]), numeric, asc);
+    if (!order || rows !== currentResults) return;
+    currentResults = order.map(i => rows[i]);
 
     // Update header indicators
     document.querySelectorAll('#tab-fields thead th[data-col]').forEach(th => {
@@ -672,6 +1017,7 @@ function launchConfetti() {
 }
 
 function showEasterEgg() {
+    resultsTable.setItems([]);
     resultsBody.innerHTML = `
         <tr>
             <td colspan="7" class="easter-egg">
@@ -810,6 +1156,7 @@ function launchSnowfall() {
 }
 
 function showKseniiaEasterEgg() {
+    resultsTable.setItems([]);
     resultsBody.innerHTML = `
         <tr>
             <td colspan="7" class="easter-egg">
@@ -836,7 +1183,8 @@ function hideSuggestions() {
 }
 
 // --- Helper: Show Suggestions ---
-function showSuggestions(suggestions, searchInput) {
+// title: intestazione (default: nessun risultato esatto); scroll: porta la lista in vista
+function showSuggestions(suggestions, searchInput, title = null, scroll = true) {
     const suggestionsContainer = $('suggestions-container');
     const suggestionsList = $('suggestions-list');
     const suggestionsTitle = $('suggestions-title');
@@ -852,7 +1200,7 @@ function showSuggestions(suggestions, searchInput) {
     }
 
     // Update title
-    suggestionsTitle.textContent = `Non ho trovato un risultato esatto per "${searchInput}", prova con:`;
+    suggestionsTitle.textContent = title || `Non ho trovato un risultato esatto per "${searchInput}", prova con:`;
 
     // Render suggestions
     suggestions.forEach((suggestion) => {
@@ -905,9 +1253,40 @@ function showSuggestions(suggestions, searchInput) {
     suggestionsContainer.style.display = 'block';
 
     // Scroll into view
-    suggestionsContainer.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
+    if (scroll) suggestionsContainer.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
+}
+
+// --- Suggerimenti durante la digitazione (debounce, ricerche superate scartate) ---
+const TYPEAHEAD_DELAY = 150;
+const TYPEAHEAD_MIN_CHARS = 2;
+let typeaheadTimer = null;
+let typeaheadSeq = 0;
+
+function cancelTypeahead() {
+    clearTimeout(typeaheadTimer);
+    typeaheadSeq++;
+    searchClient.cancel('typeahead');
 }
 
+async function updateTypeahead() {
+    const seq = ++typeaheadSeq;
+    const tableInput = normalizeTableName($('input-table').value);
+    if (tableInput.length < TYPEAHEAD_MIN_CHARS) {
+        searchClient.cancel('typeahead');
+        hideSuggestions();
+        return;
+    }
+    const matches = await searchTables(tableInput, 10, 50, 'typeahead');
+    if (!matches || seq !== typeaheadSeq) return;
+    const items = [...matches.exact, ...matches.suggestions].slice(0, 10);
+    showSuggestions(items, tableInput, `Tabelle per "${tableInput}":`, false);
+}
+
+$('input-table').addEventListener('input', () => {
+    clearTimeout(typeaheadTimer);
+    typeaheadTimer = setTimeout(updateTypeahead, TYPEAHEAD_DELAY);
+});
+
 // --- Event: Close Suggestions ---
 const btnCloseSuggestions = $('btn-close-suggestions');
 if (btnCloseSuggestions) {
@@ -919,7 +1298,8 @@ btnTranslate.addEventListener('click', async () => {
     const tableInput = normalizeTableName($('input-table').value);
     const fieldsInput = $('input-fields').value.trim();
 
-    // Hide suggestions from previous search
+    // Hide suggestions from previous search (and pending typeahead)
+    cancelTypeahead();
     hideSuggestions();
 
     if (!tableInput) {
@@ -938,14 +1318,20 @@ btnTranslate.addEventListener('click', async () => {
     }
 
     // FUZZY SEARCH: Find best matches
-    const { exact, suggestions } = findBestTableMatches(dictionary, tableInput, 10, 50);
+    const matches = await searchTables(tableInput, 10, 50);
+    if (!matches) return;  // superata da una ricerca successiva
+    const { exact, suggestions } = matches;
 
     let tableRows = [];
 
     // Case 1: Exact match found
     if (exact.length > 0) {
         const firstExact = exact[0];
-        tableRows = dictionary.filter(r => r.TABELLA_FISICA === firstExact.fisico);
+        tableRows = await getTableRows(firstExact.fisico);
+        if (tableRows.length === 0) {
+            alert(`Campi della tabella "${firstExact.fisico}" non disponibili.`);
+            return;
+        }
     }
     // Case 2: No exact match, but suggestions exist
     else if (suggestions.length > 0) {
@@ -1003,19 +1389,7 @@ btnTranslate.addEventListener('click', async () => {
 
     renderResults(results);
 
-    const tableIndexes = indexes.filter(i => matchesTableEntry(i, currentTablePhysical));
-    const tableIndexColumns = indexColumns.filter(c => matchesTableEntry(c, currentTablePhysical));
-    const preferredOwner = pickIndexOwner(tableIndexes, tableIndexColumns);
-    const ownerFilteredIndexes = preferredOwner
-        ? tableIndexes.filter(i => normalizeTableName(i.TABLE_OWNER || '') === preferredOwner)
-        : tableIndexes;
-    const ownerFilteredColumns = preferredOwner
-        ? tableIndexColumns.filter(c => normalizeTableName(c.TABLE_OWNER || '') === preferredOwner)
-        : tableIndexColumns;
-
-    currentIndexes = dedupeIndexes(ownerFilteredIndexes);
-    currentIndexColumns = dedupeIndexColumns(ownerFilteredColumns);
-    renderIndexes(currentIndexes);
+    renderIndexes(await fetchTableIndexes(currentTablePhysical));
 
     setResultsEnabled(true);
     searchCard.classList.remove('expanded');
@@ -1028,11 +1402,12 @@ btnTranslate.addEventListener('click', async () => {
 // --- Event: Copy All Fields ---
 btnCopyFields.addEventListener('click', () => {
     if (currentResults.length === 0) return;
-    const cols = ['TABELLA_FISICA','CAMPO_FISICO','TABELLA_LOGICA','CAMPO_LOGICO','TIPO','AMPIEZZA','DECIMALI'];
-    let text = cols.join('\t') + '\n';
+    // Intero dataset (non solo le righe visibili), nell'ordine corrente
+    const lines = [RESULT_COLUMNS.join('\t')];
     currentResults.forEach(row => {
-        text += cols.map(c => row[c] ?? '').join('\t') + '\n';
+        lines.push(RESULT_COLUMNS.map(c => row[c] ?? '').join('\t'));
     });
+    const text = lines.join('\n') + '\n';
     navigator.clipboard.writeText(text).then(() => {
         const original = btnCopyFields.innerHTML;
         btnCopyFields.innerHTML = '<svg class="icon"><use href="#icon-copy"/></svg> Copiato!';
@@ -1040,6 +1415,15 @@ btnCopyFields.addEventListener('click', () => {
     });
 });
 
+// --- Event: Export table (XLSX generato dal server in streaming) ---
+if (btnExportFields) {
+    btnExportFields.addEventListener('click', () => {
+        if (!currentTablePhysical) return;
+        const params = new URLSearchParams({ format: 'xlsx', table: currentTablePhysical });
+        window.location.href = `${BASE}/api/export?${params}`;
+    });
+}
+
 // --- Event: Copy All Indexes ---
 btnCopyIndexes.addEventListener('click', () => {
     if (currentIndexes.length === 0) {
@@ -1051,7 +1435,7 @@ btnCopyIndexes.addEventListener('click', () => {
     
     currentIndexes.forEach(idx => {
         text += `INDICE: ${idx.INDEX_NAME} (${idx.UNIQUENESS})\n`;
-        const cols = currentIndexColumns.filter(c => getIndexKey(c) === getIndexKey(idx));
+        const cols = idx.columns;
         if (cols.length > 0) {
             text += 'COLONNE:\n';
             cols.forEach(c => {
@@ -1069,7 +1453,19 @@ btnCopyIndexes.addEventListener('click', () => {
 });
 
 // --- Descriptor Choice UI ---
-function showDescriptorChoice(table, candidates, fieldsUsed) {
+// Id del browser: le scelte di descrittore vengono ricordate per utente (e globalmente)
+const USER_KEY = 'jctnt_user';
+
+function getUserId() {
+    let id = localStorage.getItem(USER_KEY);
+    if (!id) {
+        id = window.crypto?.randomUUID ? crypto.randomUUID() : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+        localStorage.setItem(USER_KEY, id);
+    }
+    return id;
+}
+
+function descriptorChoiceContainer() {
     let container = $('descriptor-choice-container');
     if (!container) {
         container = document.createElement('div');
@@ -1078,6 +1474,44 @@ function showDescriptorChoice(table, candidates, fieldsUsed) {
         const statusBox = $('translate-status');
         statusBox.parentNode.insertBefore(container, statusBox.nextSibling);
     }
+    return container;
+}
+
+// Descrittori scelti in automatico (scelta ricordata): si possono cambiare
+function showRememberedChoices(choices) {
+    const remembered = (choices || []).filter(c => c.source === 'remembered');
+    if (remembered.length === 0) return;
+
+    const container = descriptorChoiceContainer();
+    container.innerHTML = `
+        <div class="descriptor-choice-header">
+            <svg class="icon"><use href="#icon-database"/></svg>
+            <span>Remembered descriptor choice${remembered.length > 1 ? 's' : ''}</span>
+            <button class="descriptor-choice-close" onclick="hideDescriptorChoice()">×</button>
+        </div>
+        <div class="descriptor-choice-list">
+            ${remembered.map((c, i) => `
+                <div class="descriptor-choice-item">
+                    <div><strong>${c.table}</strong> → <span class="descriptor-name">${c.descriptor}</span></div>
+                    <button class="btn btn-secondary btn-change-descriptor" data-index="${i}">
+                        Change
+                    </button>
+                </div>
+            `).join('')}
+        </div>
+    `;
+
+    container.style.display = 'block';
+    container.querySelectorAll('.btn-change-descriptor').forEach(btn => {
+        btn.addEventListener('click', (e) => {
+            const c = remembered[Number(e.currentTarget.dataset.index)];
+            showDescriptorChoice(c.table, c.candidates, c.fields_used);
+        });
+    });
+}
+
+function showDescriptorChoice(table, candidates, fieldsUsed) {
+    const container = descriptorChoiceContainer();
 
     container.innerHTML = `
         <div class="descriptor-choice-header">
@@ -1124,7 +1558,7 @@ async function handleDescriptorSelection(descriptor) {
         const res = await fetch(`${BASE}/api/translate-query`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ query: rawQuery, chosen_descriptor: descriptor, strip_params: document.getElementById('toggle-strip-params')?.checked ?? false })
+            body: JSON.stringify({ query: rawQuery, chosen_descriptor: descriptor, strip_params: document.getElementById('toggle-strip-params')?.checked ?? false, index_advice: indexAdviceEnabled(), user: getUserId() })
         });
         const data = await res.json();
 
@@ -1137,6 +1571,7 @@ async function handleDescriptorSelection(descriptor) {
             }
 
             setTranslateStatus('success', `Completed using ${descriptor}`);
+            showIndexAdvice(data.index_advice);
         }
     } catch (e) {
         setTranslateStatus('error', 'Server error');
@@ -1182,6 +1617,58 @@ function hidePartialWarning() {
     if (container) container.style.display = 'none';
 }
 
+// --- Index Advice ---
+function indexAdviceEnabled() {
+    return document.getElementById('toggle-index-advice')?.checked ?? false;
+}
+
+function showIndexAdvice(advice) {
+    if (!advice || !advice.tables) return;
+    let container = $('index-advice-container');
+    if (!container) {
+        container = document.createElement('div');
+        container.id = 'index-advice-container';
+        container.className = 'index-advice-container';
+
+        const translateStatus = $('translate-status');
+        if (translateStatus) {
+            translateStatus.parentNode.insertBefore(container, translateStatus.nextSibling);
+        }
+    }
+
+    const rows = advice.tables.map(t => {
+        const covered = Object.keys(t.covered || {});
+        const best = t.best_index
+            ? `${t.best_index.INDEX_NAME} (${t.best_index.matched_columns.join(', ')})`
+            : '—';
+        return `
+            <tr>
+                <td><code>${t.table}</code></td>
+                <td>${covered.map(c => `<code class="index-covered">${c}</code>`).join(' ') || '—'}</td>
+                <td>${(t.uncovered || []).map(c => `<code class="index-uncovered">${c}</code>`).join(' ') || '—'}</td>
+                <td>${best}</td>
+            </tr>`;
+    }).join('');
+
+    container.innerHTML = `
+        <div class="index-advice-header">
+            <span>Copertura indici (colonne WHERE / ON)</span>
+            <button class="partial-warning-close" onclick="hideIndexAdvice()">×</button>
+        </div>
+        <table class="index-advice-table">
+            <thead><tr><th>Tabella</th><th>Coperte</th><th>Non coperte</th><th>Indice migliore</th></tr></thead>
+            <tbody>${rows || '<tr><td colspan="4">Nessuna tabella riconosciuta</td></tr>'}</tbody>
+        </table>
+    `;
+
+    container.style.display = 'block';
+}
+
+function hideIndexAdvice() {
+    const container = $('index-advice-container');
+    if (container) container.style.display = 'none';
+}
+
 // --- Session Persistence (survives F5) ---
 const SESSION_KEY = 'jctnt_session';
 
@@ -1212,21 +1699,21 @@ async function tryAutoReconnect() {
     connStatus.textContent = 'Ripristino sessione...';
 
     try {
-        const credRes = await fetch(`${BASE}/api/connection-data`);
-        const creds = await credRes.json();
-        if (!creds.host) { clearSession(); return false; }
+        // Copia IndexedDB ancora valida sul server: nessun download, nessuna query Oracle
+        const cached = await loadCachedDictionary();
+        let result;
+        if (await isCachedDictionaryCurrent(BASE, cached)) {
+            result = { success: true, unchanged: true };
+        } else {
+            const credRes = await fetch(`${BASE}/api/connection-data`);
+            const creds = await credRes.json();
+            if (!creds.host) { clearSession(); return false; }
 
-        const res = await fetch(`${BASE}/api/connect`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify(creds)
-        });
-        const result = await res.json();
+            result = await connectWithProgress(creds, cached, showLoadProgress);
+        }
 
         if (result.success) {
-            dictionary = result.data;
-            indexes = result.indexes || [];
-            indexColumns = result.index_columns || [];
+            applyConnectResult(result, cached);
 
             pageConnection.classList.remove('active');
             pageTranslate.classList.add('active');
@@ -0,0 +1,91 @@
+/**
+ * Dictionary Cache Module
+ * Copia del dizionario in IndexedDB, etichettata con la versione del server
+ * (campo `version` di /api/connect). Al reload la copia viene rivalidata con
+ * /api/dictionary-version: si riscarica solo se la versione e' cambiata.
+ */
+
+const DICTIONARY_DB_NAME = 'jctnt';
+const DICTIONARY_DB_STORE = 'dictionary';
+const DICTIONARY_DB_KEY = 'current';   // una sola copia: l'ultimo dizionario usato
+
+let dictionaryDbPromise = null;
+
+function openDictionaryDb() {
+    if (!dictionaryDbPromise) {
+        dictionaryDbPromise = new Promise((resolve, reject) => {
+            if (!window.indexedDB) {
+                reject(new Error('IndexedDB non disponibile'));
+                return;
+            }
+            const req = indexedDB.open(DICTIONARY_DB_NAME, 1);
+            req.onupgradeneeded = () => req.result.createObjectStore(DICTIONARY_DB_STORE);
+            req.onsuccess = () => resolve(req.result);
+            req.onerror = () => reject(req.error);
+        });
+        // Apertura fallita (navigazione privata, quota): si riprova al prossimo uso
+        dictionaryDbPromise.catch(() => { dictionaryDbPromise = null; });
+    }
+    return dictionaryDbPromise;
+}
+
+async function dictionaryDbRequest(mode, action) {
+    const db = await openDictionaryDb();
+    return new Promise((resolve, reject) => {
+        const tx = db.transaction(DICTIONARY_DB_STORE, mode);
+        const req = action(tx.objectStore(DICTIONARY_DB_STORE));
+        tx.oncomplete = () => resolve(req.result);
+        tx.onerror = () => reject(tx.error);
+        tx.onabort = () => reject(tx.error);
+    });
+}
+
+/**
+ * Copia salvata: { version, connection_key, data, indexes, index_columns, saved }
+ * oppure null (assente o IndexedDB non disponibile).
+ */
+async function loadCachedDictionary() {
+    try {
+        const record = await dictionaryDbRequest('readonly', store => store.get(DICTIONARY_DB_KEY));
+        return record && record.version ? record : null;
+    } catch (e) {
+        return null;
+    }
+}
+
+async function saveCachedDictionary(result) {
+    try {
+        await dictionaryDbRequest('readwrite', store => store.put({
+            version: result.version,
+            connection_key: result.connection_key,
+            data: result.data,
+            indexes: result.indexes || [],
+            index_columns: result.index_columns || [],
+            saved: Date.now()
+        }, DICTIONARY_DB_KEY));
+    } catch (e) {
+        console.warn('Cache dizionario non salvata:', e);
+    }
+}
+
+async function clearCachedDictionary() {
+    try {
+        await dictionaryDbRequest('readwrite', store => store.delete(DICTIONARY_DB_KEY));
+    } catch (e) { /* niente da cancellare */ }
+}
+
+/**
+ * Controllo economico: la copia locale e' ancora quella caricata sul server?
+ * (stessa connessione e stessa versione, nessuna query Oracle)
+ */
+async function isCachedDictionaryCurrent(base, cached) {
+    if (!cached) return false;
+    try {
+        const res = await fetch(`${base}/api/dictionary-version`);
+        const current = await res.json();
+        return !current.lazy && current.version === cached.version &&
+            current.connection_key === cached.connection_key;
+    } catch (e) {
+        return false;
+    }
+}
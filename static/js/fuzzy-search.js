@@ -164,15 +164,24 @@ function findBestTableMatches(dictionary, searchInput, maxResults = 10, minScore
         }
     });
 
-    // Converti in array e ordina per score
-    const sortedTables = Array.from(tableScores.values())
-        .sort((a, b) => {
-            // Prima per score, poi per fieldsCount (più campi = più rilevante)
-            if (b.score !== a.score) return b.score - a.score;
-            return b.fieldsCount - a.fieldsCount;
-        });
-
-    // Separa exact matches da suggestions
+    return rankTableMatches(Array.from(tableScores.values()), maxResults);
+}
+
+/**
+ * Ordina le tabelle trovate e separa exact matches da suggestions
+ * (usata anche dal worker di ricerca, search-worker.js)
+ *
+ * @param {Array} matches - { fisico, logico, score, type, match, similarity, fieldsCount }
+ * @param {number} maxResults - Numero massimo di suggerimenti
+ * @returns {Object} { exact: [...], suggestions: [...] }
+ */
+function rankTableMatches(matches, maxResults = 10) {
+    // Prima per score, poi per fieldsCount (più campi = più rilevante)
+    const sortedTables = matches.sort((a, b) => {
+        if (b.score !== a.score) return b.score - a.score;
+        return b.fieldsCount - a.fieldsCount;
+    });
+
     const exact = sortedTables.filter(t => t.type === 'exact');
     const suggestions = sortedTables
         .filter(t => t.type !== 'exact')
@@ -181,6 +190,27 @@ function findBestTableMatches(dictionary, searchInput, maxResults = 10, minScore
     return { exact, suggestions };
 }
 
+/**
+ * Ordine (indici) dei valori di una colonna dei risultati
+ *
+ * @param {Array} values - Valori della colonna, nell'ordine attuale delle righe
+ * @param {boolean} numeric - Confronto numerico (AMPIEZZA / DECIMALI)
+ * @param {boolean} asc - Crescente
+ * @returns {Array} Indici delle righe nel nuovo ordine
+ */
+function sortedOrder(values, numeric, asc) {
+    const keys = values.map(v => numeric ? (parseFloat(v ?? '') || 0) : String(v ?? '').toLowerCase());
+    const order = keys.map((_, i) => i);
+    order.sort((a, b) => {
+        const va = keys[a];
+        const vb = keys[b];
+        if (va < vb) return asc ? -1 : 1;
+        if (va > vb) return asc ? 1 : -1;
+        return 0;
+    });
+    return order;
+}
+
 /**
  * Trova suggerimenti per campi (quando la tabella è nota)
  *
@@ -0,0 +1,105 @@
+/**
+ * Search Client
+ * Interfaccia del main thread verso search-worker.js: ogni richiesta e' un
+ * messaggio con id, la risposta risolve la Promise corrispondente.
+ *
+ * Le richieste con lo stesso `channel` si sostituiscono: la precedente viene
+ * annullata nel worker e la sua Promise risolta con null (risultato superato).
+ * Senza Web Worker (browser vecchi, errori di caricamento) le stesse funzioni
+ * di fuzzy-search.js girano sul main thread.
+ */
+
+// data-worker / data-fuzzy: URL (con hash) del worker e di fuzzy-search.js che importa
+const SEARCH_WORKER_URL = (() => {
+    const data = document.currentScript ? document.currentScript.dataset : {};
+    if (!data.worker) return null;
+    return data.fuzzy ? `${data.worker}?fuzzy=${encodeURIComponent(data.fuzzy)}` : data.worker;
+})();
+
+class SearchClient {
+    constructor(workerUrl) {
+        this.rows = [];
+        this.ready = false;
+        this.seq = 0;
+        this.pending = new Map();   // id → { resolve, channel }
+        this.latest = {};           // channel → id dell'ultima richiesta
+        this.worker = null;
+        if (workerUrl && window.Worker) {
+            try {
+                this.worker = new Worker(workerUrl);
+                this.worker.onmessage = e => this._settle(e.data.id, e.data.result);
+                this.worker.onerror = e => {
+                    console.warn('Search worker non disponibile, ricerca sul main thread:', e.message);
+                    this._disableWorker();
+                };
+            } catch (e) {
+                this.worker = null;
+            }
+        }
+    }
+
+    _disableWorker() {
+        if (this.worker) this.worker.terminate();
+        this.worker = null;
+        // Le richieste in attesa non avranno risposta
+        this.pending.forEach(p => p.resolve(null));
+        this.pending.clear();
+        this.latest = {};
+    }
+
+    _settle(id, result) {
+        const p = this.pending.get(id);
+        if (!p) return;
+        this.pending.delete(id);
+        if (p.channel && this.latest[p.channel] === id) delete this.latest[p.channel];
+        p.resolve(result);
+    }
+
+    _request(type, payload, channel = null) {
+        const id = ++this.seq;
+        if (channel) this.cancel(channel);
+        return new Promise(resolve => {
+            this.pending.set(id, { resolve, channel });
+            if (channel) this.latest[channel] = id;
+            this.worker.postMessage({ ...payload, type, id });
+        });
+    }
+
+    /** Annulla la richiesta in corso sul canale (la sua Promise risolve null). */
+    cancel(channel) {
+        const previous = this.latest[channel];
+        if (previous === undefined) return;
+        delete this.latest[channel];
+        if (this.worker) this.worker.postMessage({ type: 'cancel', id: previous });
+        this._settle(previous, null);
+    }
+
+    /** Nuovo dizionario (array vuoto: nessuna ricerca locale, es. modalita' lazy). */
+    load(rows) {
+        this.ready = !!rows && rows.length > 0;
+        this.rows = rows || [];   // riferimento (nessuna copia): serve se il worker cade
+        if (this.worker) this._request('load', { rows: rows || [] });
+    }
+
+    searchTables(query, maxResults = 10, minScore = 50, channel = 'search') {
+        if (!this.worker) {
+            return Promise.resolve(findBestTableMatches(this.rows, query, maxResults, minScore));
+        }
+        return this._request('search', { query, maxResults, minScore }, channel);
+    }
+
+    tableRows(fisico) {
+        if (!this.worker) {
+            return Promise.resolve(this.rows.filter(r => r.TABELLA_FISICA === fisico));
+        }
+        return this._request('table', { fisico });
+    }
+
+    /** Ordine (indici) dei valori di una colonna; null se superato da un ordinamento successivo. */
+    sortOrder(values, numeric, asc) {
+        if (!this.worker) return Promise.resolve(sortedOrder(values, numeric, asc));
+        return this._request('sort', { values, numeric, asc }, 'sort');
+    }
+}
+
+const searchClient = new SearchClient(SEARCH_WORKER_URL);
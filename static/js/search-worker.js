@@ -0,0 +1,101 @@
+/**
+ * Search Worker
+ * Copia indicizzata del dizionario (righe raggruppate per tabella fisica) in
+ * un Web Worker: ricerca tabelle, righe di una tabella e ordinamento dei
+ * risultati girano fuori dal main thread. Client: search-client.js.
+ *
+ * Messaggi: { type: 'load' | 'search' | 'table' | 'sort' | 'cancel', id, ... }
+ * Risposte: { id, result }
+ *
+ * ?fuzzy=<url>: fuzzy-search.js da importare (nome con hash, vedi static_assets.py)
+ */
+importScripts(new URLSearchParams(self.location.search).get('fuzzy') || 'fuzzy-search.js');
+
+// Tabelle per lo scoring a blocchi: fra un blocco e l'altro arrivano i 'cancel'
+const SEARCH_CHUNK = 500;
+
+let tables = [];               // [{ fisico, logico, fieldsCount }]
+let rowsByTable = new Map();   // fisico → righe
+const running = new Set();     // ricerche in corso
+const cancelled = new Set();
+
+function loadDictionary(rows) {
+    tables = [];
+    rowsByTable = new Map();
+    for (const row of rows || []) {
+        const fisico = row.TABELLA_FISICA || '';
+        if (!fisico) continue;
+        let list = rowsByTable.get(fisico);
+        if (!list) {
+            list = [];
+            rowsByTable.set(fisico, list);
+            // Come findBestTableMatches: il logico e' quello della prima riga
+            tables.push({ fisico, logico: row.TABELLA_LOGICA || '', fieldsCount: 0 });
+        }
+        list.push(row);
+    }
+    tables.forEach(t => { t.fieldsCount = rowsByTable.get(t.fisico).length; });
+    return tables.length;
+}
+
+function searchTables(msg) {
+    if (!msg.query) {
+        postMessage({ id: msg.id, result: { exact: [], suggestions: [] } });
+        return;
+    }
+    const list = tables;   // un 'load' durante la ricerca non cambia la lista a meta'
+    const matches = [];
+    let next = 0;
+    running.add(msg.id);
+
+    const step = () => {
+        if (cancelled.delete(msg.id)) {
+            running.delete(msg.id);
+            return;
+        }
+        const end = Math.min(next + SEARCH_CHUNK, list.length);
+        for (; next < end; next++) {
+            const t = list[next];
+            const scoreData = scoreTableMatch(t.fisico, t.logico, msg.query);
+            if (scoreData.score >= msg.minScore) {
+                matches.push({
+                    fisico: t.fisico,
+                    logico: t.logico,
+                    score: scoreData.score,
+                    type: scoreData.type,
+                    match: scoreData.match,
+                    similarity: scoreData.similarity || 0,
+                    fieldsCount: t.fieldsCount
+                });
+            }
+        }
+        if (next < list.length) {
+            setTimeout(step, 0);
+            return;
+        }
+        running.delete(msg.id);
+        postMessage({ id: msg.id, result: rankTableMatches(matches, msg.maxResults) });
+    };
+    step();
+}
+
+self.onmessage = (e) => {
+    const msg = e.data;
+    switch (msg.type) {
+        case 'load':
+            postMessage({ id: msg.id, result: loadDictionary(msg.rows) });
+            break;
+        case 'search':
+            searchTables(msg);
+            break;
+        case 'table':
+            postMessage({ id: msg.id, result: rowsByTable.get(msg.fisico) || [] });
+            break;
+        case 'sort':
+            postMessage({ id: msg.id, result: sortedOrder(msg.values, msg.numeric, msg.asc) });
+            break;
+        case 'cancel':
+            if (running.has(msg.id)) cancelled.add(msg.id);
+            break;
+    }
+};
@@ -0,0 +1,165 @@
+/**
+ * Virtual Table
+ * Rendering virtualizzato di un <tbody>: nel DOM esistono solo le righe
+ * visibili (piu' un margine), quelle sopra e sotto sono sostituite da due righe
+ * spaziatrici alte quanto le righe mancanti. Le altezze sono misurate al
+ * rendering (righe di dettaglio comprese), le altre stimate.
+ *
+ * Sotto VIRTUAL_MIN_ROWS elementi si renderizza tutto, come una tabella normale.
+ */
+
+const VIRTUAL_MIN_ROWS = 200;
+const VIRTUAL_OVERSCAN_PX = 600;
+
+class VirtualTable {
+    /**
+     * @param {HTMLElement} tbody - Corpo della tabella
+     * @param {Object} options
+     *   columns:   numero di colonne (colspan delle righe spaziatrici)
+     *   renderRow: (item, index) => <tr> oppure [<tr>, ...] (riga + dettaglio)
+     *   rowHeight: altezza stimata di una riga prima della prima misura (px)
+     */
+    constructor(tbody, { columns, renderRow, rowHeight = 38 }) {
+        this.tbody = tbody;
+        this.columns = columns;
+        this.renderRow = renderRow;
+        this.estimate = rowHeight;
+        this.calibrated = false;
+        this.container = tbody.closest('.table-container');
+        this.items = [];
+        this.heights = new Float64Array(0);
+        this.emptyHtml = '';
+        this.range = null;
+        this.frame = null;
+
+        const schedule = () => this._schedule();
+        if (this.container) {
+            this.container.addEventListener('scroll', schedule, { passive: true });
+            // Tab nascosta → visibile, ridimensionamenti: ricalcola le righe visibili
+            if (window.ResizeObserver) new ResizeObserver(schedule).observe(this.container);
+        }
+        window.addEventListener('scroll', schedule, { passive: true });
+        window.addEventListener('resize', schedule);
+    }
+
+    get virtual() {
+        return this.items.length >= VIRTUAL_MIN_ROWS;
+    }
+
+    /** Nuovi elementi (emptyHtml: contenuto del tbody se la lista e' vuota). */
+    setItems(items, emptyHtml = '') {
+        this.items = items || [];
+        this.emptyHtml = emptyHtml;
+        this.heights = new Float64Array(this.items.length).fill(this.estimate);
+        this.refresh();
+    }
+
+    /** Ridisegna le righe visibili (es. una riga espansa/chiusa). */
+    refresh() {
+        this.range = null;
+        this.render();
+    }
+
+    _schedule() {
+        if (!this.virtual || this.frame) return;
+        this.frame = requestAnimationFrame(() => {
+            this.frame = null;
+            this.render();
+        });
+    }
+
+    _sum(from, to) {
+        let total = 0;
+        for (let i = from; i < to; i++) total += this.heights[i];
+        return total;
+    }
+
+    _spacer(height) {
+        const tr = document.createElement('tr');
+        tr.className = 'virtual-spacer';
+        const td = document.createElement('td');
+        td.colSpan = this.columns;
+        td.style.height = `${height}px`;
+        tr.appendChild(td);
+        return tr;
+    }
+
+    // [start, end) degli elementi che intersecano l'area visibile (± overscan)
+    _visibleRange() {
+        const n = this.items.length;
+        const bodyTop = this.tbody.getBoundingClientRect().top;
+        let top = 0;
+        let bottom = window.innerHeight;
+        if (this.container) {
+            const rect = this.container.getBoundingClientRect();
+            top = Math.max(top, rect.top);
+            bottom = Math.min(bottom, rect.bottom);
+        }
+        const from = top - bodyTop - VIRTUAL_OVERSCAN_PX;
+        const to = Math.max(bottom, top) - bodyTop + VIRTUAL_OVERSCAN_PX;
+
+        let start = 0;
+        let y = 0;
+        while (start < n && y + this.heights[start] <= from) {
+            y += this.heights[start];
+            start++;
+        }
+        let end = start;
+        while (end < n && y < to) {
+            y += this.heights[end];
+            end++;
+        }
+        start = Math.min(start, n - 1);
+        return [start, Math.max(end, start + 1)];
+    }
+
+    render() {
+        const n = this.items.length;
+        if (n === 0) {
+            this.range = null;
+            this.tbody.innerHTML = this.emptyHtml;
+            return;
+        }
+
+        let [start, end] = [0, n];
+        if (this.virtual) {
+            [start, end] = this._visibleRange();
+            if (this.range && this.range[0] === start && this.range[1] === end) return;
+        }
+        this.range = [start, end];
+
+        const fragment = document.createDocumentFragment();
+        if (start > 0) fragment.appendChild(this._spacer(this._sum(0, start)));
+        const rendered = [];
+        for (let i = start; i < end; i++) {
+            const nodes = [].concat(this.renderRow(this.items[i], i));
+            nodes.forEach(node => fragment.appendChild(node));
+            rendered.push([i, nodes]);
+        }
+        if (end < n) fragment.appendChild(this._spacer(this._sum(end, n)));
+        this.tbody.replaceChildren(fragment);
+
+        // Altezze reali (solo a tabella visibile: in una tab nascosta valgono 0)
+        if (!this.virtual || this.tbody.offsetParent === null) return;
+        let measured = 0;
+        let total = 0;
+        rendered.forEach(([i, nodes]) => {
+            const height = nodes.reduce((sum, node) => sum + node.offsetHeight, 0);
+            if (height > 0) {
+                this.heights[i] = height;
+                measured++;
+                total += height;
+            }
+        });
+        if (!this.calibrated && measured > 0) {
+            // Prima misura: la stima vale per tutte le righe non ancora viste
+            this.calibrated = true;
+            const previous = this.estimate;
+            this.estimate = total / measured;
+            for (let i = 0; i < n; i++) {
+                if (this.heights[i] === previous && (i < start || i >= end)) this.heights[i] = this.estimate;
+            }
+            this.refresh();
+        }
+    }
+}
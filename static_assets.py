@@ -0,0 +1,168 @@
+"""
+Static assets: copie con hash del contenuto nel nome, precompresse, servite
+con cache immutabile.
+
+build() scrive in static/dist/ `js/app.<hash>.js` (+ `.gz` e, se il modulo
+brotli e' installato, `.br`) e il manifest `manifest.json` (nome sorgente →
+nome con hash). Il template usa asset_url('js/app.js'): finche' il file non
+cambia l'URL resta lo stesso e il browser non lo richiede piu' (Cache-Control
+immutable, un anno); a ogni deploy che lo modifica cambia l'hash e quindi l'URL.
+
+All'avvio ensure_built() ricalcola gli hash dei sorgenti (pochi ms) e
+ricostruisce solo se qualcosa e' cambiato: un deploy senza build non serve
+mai file vecchi. JCTNT_ASSET_PIPELINE=0 serve i file originali (sviluppo).
+"""
+import gzip
+import hashlib
+import json
+import os
+
+from flask import request, send_file, url_for
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dipendenza opzionale
+    brotli = None
+
+DIST_DIR = 'dist'
+MANIFEST_FILE = 'manifest.json'
+# Tipi espliciti: su Windows mimetypes legge il registro (.js a volte text/plain)
+MIMETYPES = {'.js': 'text/javascript', '.css': 'text/css'}
+ASSET_EXTENSIONS = tuple(MIMETYPES)
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# Varianti precompresse, in ordine di preferenza
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def hashed_name(filename, digest):
+    base, extension = os.path.splitext(filename)
+    return f'{base}.{digest}{extension}'
+
+
+def _write(path, data):
+    # Scrittura atomica: un altro processo che parte insieme non legge file a meta'
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class StaticAssets:
+
+    def __init__(self, static_folder, enabled=True):
+        self.static_folder = os.path.abspath(static_folder)
+        self.dist_folder = os.path.join(self.static_folder, DIST_DIR)
+        self.enabled = enabled
+        self.manifest = {}
+
+    def sources(self):
+        """Asset da versionare (percorsi relativi a static/, con '/')."""
+        found = []
+        for root, dirs, files in os.walk(self.static_folder):
+            dirs[:] = [d for d in dirs if os.path.join(root, d) != self.dist_folder]
+            for name in files:
+                if name.endswith(ASSET_EXTENSIONS):
+                    path = os.path.relpath(os.path.join(root, name), self.static_folder)
+                    found.append(path.replace(os.sep, '/'))
+        return sorted(found)
+
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.dist_folder, MANIFEST_FILE), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def build(self, prune=False):
+        """Scrive le copie con hash e le varianti compresse. Ritorna il manifest."""
+        manifest = {}
+        for filename in self.sources():
+            with open(os.path.join(self.static_folder, filename), 'rb') as f:
+                data = f.read()
+            target = hashed_name(filename, content_hash(data))
+            manifest[filename] = target
+            path = os.path.join(self.dist_folder, target)
+            if os.path.exists(path) and os.path.exists(path + '.gz'):
+                continue
+            _write(path, data)
+            _write(path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _write(path + '.br', brotli.compress(data, quality=11))
+        _write(os.path.join(self.dist_folder, MANIFEST_FILE),
+               json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+        if prune:
+            self._prune(manifest)
+        self.manifest = manifest
+        return manifest
+
+    def _prune(self, manifest):
+        """Elimina le copie di build precedenti (non piu' nel manifest)."""
+        keep = {os.path.normpath(os.path.join(self.dist_folder, target)) for target in manifest.values()}
+        for root, _, files in os.walk(self.dist_folder):
+            for name in files:
+                path = os.path.normpath(os.path.join(root, name))
+                original = path
+                for _, suffix in ENCODINGS:
+                    if path.endswith(suffix):
+                        original = path[:-len(suffix)]
+                if name != MANIFEST_FILE and original not in keep:
+                    os.remove(path)
+
+    def is_current(self, manifest):
+        """Il manifest corrisponde ai sorgenti attuali (e le copie esistono)?"""
+        sources = self.sources()
+        if sorted(manifest) != sources:
+            return False
+        for filename in sources:
+            with open(os.path.join(self.static_folder, filename), 'rb') as f:
+                if manifest[filename] != hashed_name(filename, content_hash(f.read())):
+                    return False
+            if not os.path.exists(os.path.join(self.dist_folder, manifest[filename])):
+                return False
+        return True
+
+    def ensure_built(self):
+        """Manifest aggiornato, ricostruendo se i sorgenti sono cambiati. True se ricostruito."""
+        if not self.enabled:
+            return False
+        manifest = self._read_manifest()
+        if self.is_current(manifest):
+            self.manifest = manifest
+            return False
+        self.build()
+        return True
+
+    # --- Flask ---
+    def url(self, filename):
+        """URL dell'asset: copia con hash se disponibile, altrimenti il file originale."""
+        target = self.manifest.get(filename)
+        if target is None:
+            return url_for('static', filename=filename)
+        return url_for('static', filename=f'{DIST_DIR}/{target}')
+
+    def response(self, filename):
+        """Copia con hash: variante br/gzip secondo Accept-Encoding, cache immutabile."""
+        # Solo i file del manifest corrente (niente manifest.json o percorsi arbitrari)
+        if filename not in self.manifest.values():
+            return None
+        path = os.path.join(self.dist_folder, *filename.split('/'))
+        if not os.path.isfile(path):
+            return None
+        mimetype = MIMETYPES.get(os.path.splitext(path)[1], 'application/octet-stream')
+        encoding = None
+        for name, suffix in ENCODINGS:
+            if request.accept_encodings[name] > 0 and os.path.isfile(path + suffix):
+                path, encoding = path + suffix, name
+                break
+        response = send_file(path, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+        response.headers.pop('Content-Disposition', None)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        return response
@@ -1,13 +1,22 @@
 import re
-import sqlparse
+import sys
+from functools import lru_cache
+
+from dictionary_store import DictionaryStore
+from search_index import CompletionTrie, FieldIndex
+from segment_cache import SegmentCache
 
 # --- Dynamic mapping (populated after DB connect) ---
+DICTIONARY_STORE = None  # shared DictionaryStore the maps below were built from
 TABLE_MAP = {}
 FIELD_MAP = {}
 PHYSICAL_TABLE_MAP = {}
 REVERSE_FIELD_MAP = {}  # physical_table → {physical_field → {descriptor → logical_field}}
 TABLE_ORIGINAL_CASE = {}   # normalized_key → original logical table name with $ (original case)
 FIELD_ORIGINAL_CASE = {}   # (normalized_table_key, normalized_field_key) → original logical field name
+FIELD_INDEX = FieldIndex()  # normalized field name (physical or logical) → [(physical_table, $Descriptor, LogicalField, physical_field)]
+DESCRIPTOR_TRIE = CompletionTrie()  # autocomplete over TABLE_ORIGINAL_CASE (field tries: _field_trie)
+SEGMENT_CACHE = SegmentCache()  # segmenti tradotti (modalita' incrementale), svuotata a ogni nuovo dizionario
 
 KEYWORDS = {
     'SELECT', 'FROM', 'WHERE', 'JOIN', 'LEFT', 'RIGHT', 'FULL', 'INNER', 'OUTER',
@@ -18,12 +27,41 @@ KEYWORDS = {
 
 TWO_CHAR_OPS = {'>=', '<=', '<>', '!=', '==', '||'}
 
+# --- Regex compilate una volta all'import ---
+_NEWLINES_RE = re.compile(r'[\r\n]+')
+_MULTI_SPACE_RE = re.compile(r'\s{2,}')
+_WHITESPACE_RE = re.compile(r'\s+')
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_QUALIFIED_FIELD_RE = re.compile(r'\b(\w+)\.(\w+)\b')
+_UNQUALIFIED_IDENT_RE = re.compile(r'(?<![.$])\b([A-Za-z][A-Za-z0-9_]+)\b')
+_TOP_LEVEL_SET_OP_RE = re.compile(r'(?i)\b(UNION\s+ALL|UNION|INTERSECT|MINUS|EXCEPT)\b|[()]')
+_INNERMOST_SUBQUERY_RE = re.compile(r'\(SELECT\b[^()]*\)', re.IGNORECASE)
+
+# Words never treated as unqualified field names in SQL → TecSQL
+_SQL_NON_FIELD_WORDS = frozenset({
+    'select', 'from', 'where', 'join', 'left', 'right', 'full', 'inner', 'outer',
+    'cross', 'on', 'order', 'by', 'group', 'having', 'as', 'and', 'or', 'not',
+    'in', 'exists', 'like', 'between', 'is', 'null', 'distinct', 'union',
+    'intersect', 'minus', 'except', 'limit', 'fetch', 'first', 'rows', 'only',
+    'offset', 'all', 'any', 'true', 'false', 'asc', 'desc', 'case', 'when',
+    'then', 'else', 'end', 'cast', 'coalesce', 'sum', 'count', 'avg', 'min',
+    'max', 'nvl', 'nvl2', 'decode', 'upper', 'lower', 'trim', 'substr',
+    'length', 'to_date', 'to_char', 'to_number', 'rownum', 'rowid',
+    'sysdate', 'dual', 'into', 'values', 'set', 'over', 'partition', 'row',
+})
+
+
+def _sqlparse():
+    # sqlparse serve solo per SQL → TecSQL: importato al primo uso (fast start)
+    import sqlparse
+    return sqlparse
+
 
 def normalize_query_text(query):
     # Normalize by removing newlines and trimming extra whitespace.
     text = '' if query is None else str(query)
-    text = re.sub(r'[\r\n]+', ' ', text)
-    text = re.sub(r'\s{2,}', ' ', text)
+    text = _NEWLINES_RE.sub(' ', text)
+    text = _MULTI_SPACE_RE.sub(' ', text)
     return text.strip()
 
 
@@ -143,13 +181,13 @@ def _normalize_table_key(logical_table):
     text = '' if logical_table is None else str(logical_table).strip()
     if text.startswith('$'):
         text = text[1:]
-    text = re.sub(r'\s+', '', text).lower()
+    text = _WHITESPACE_RE.sub('', text).lower()
     return f'${text}' if text else ''
 
 
 def _normalize_field_key(logical_field):
     text = '' if logical_field is None else str(logical_field).strip()
-    text = re.sub(r'\s+', '', text).lower()
+    text = _WHITESPACE_RE.sub('', text).lower()
     return text
 
 
@@ -160,6 +198,7 @@ def _extract_tables_and_aliases(stmt):
 
     Returns: {'tables': [...], 'alias_map': {'o': 'ORDERS_TBL', ...}}
     """
+    sqlparse = _sqlparse()
     tables = []
     alias_map = {}
     FROM_KW = {'FROM', 'JOIN', 'INNER', 'LEFT', 'RIGHT', 'FULL', 'CROSS'}
@@ -242,6 +281,7 @@ def _extract_fields_from_sql(sql_query):
             'alias_map': {'o': 'ORDERS_TBL', 'c': 'CUSTOMERS_TBL'}
         }
     """
+    sqlparse = _sqlparse()
     parsed = sqlparse.parse(sql_query)
     if not parsed:
         return {'tables': [], 'fields': {}, 'unqualified_fields': [], 'alias_map': {}}
@@ -265,8 +305,8 @@ def _extract_fields_from_sql(sql_query):
 
     # Scan the entire SQL for PREFIX.FIELD — covers SELECT, WHERE, ON, ORDER BY, etc.
     # First strip string literals to avoid false matches inside quoted values.
-    clean_sql = re.sub(r"'(?:[^']|'')*'", "''", sql_query)
-    for m in re.finditer(r'\b(\w+)\.(\w+)\b', clean_sql):
+    clean_sql = _STRING_LITERAL_RE.sub("''", sql_query)
+    for m in _QUALIFIED_FIELD_RE.finditer(clean_sql):
         prefix = m.group(1)
         field = m.group(2).upper()
         table = prefix_to_table.get(prefix.lower())
@@ -289,21 +329,10 @@ def _extract_fields_from_sql(sql_query):
     # Physical Oracle field names are typically lowercase/snake_case (e.g. bolla_ck),
     # while constants/variables passed to JAS are UPPERCASE (e.g. BOLLA_PASSATA_AL_JAS).
     # This lets us find field references in WHERE/HAVING/ON that have no table prefix.
-    _SQL_NON_FIELD_WORDS = {
-        'select', 'from', 'where', 'join', 'left', 'right', 'full', 'inner', 'outer',
-        'cross', 'on', 'order', 'by', 'group', 'having', 'as', 'and', 'or', 'not',
-        'in', 'exists', 'like', 'between', 'is', 'null', 'distinct', 'union',
-        'intersect', 'minus', 'except', 'limit', 'fetch', 'first', 'rows', 'only',
-        'offset', 'all', 'any', 'true', 'false', 'asc', 'desc', 'case', 'when',
-        'then', 'else', 'end', 'cast', 'coalesce', 'sum', 'count', 'avg', 'min',
-        'max', 'nvl', 'nvl2', 'decode', 'upper', 'lower', 'trim', 'substr',
-        'length', 'to_date', 'to_char', 'to_number', 'rownum', 'rowid',
-        'sysdate', 'dual', 'into', 'values', 'set', 'over', 'partition', 'row',
-    }
     already_unqualified = {u.lower() for u in unqualified}
     known_prefixes = set(prefix_to_table.keys())
 
-    for m in re.finditer(r'(?<![.$])\b([A-Za-z][A-Za-z0-9_]+)\b', clean_sql):
+    for m in _UNQUALIFIED_IDENT_RE.finditer(clean_sql):
         ident = m.group(1)
         ident_lower = ident.lower()
         if (ident_lower not in _SQL_NON_FIELD_WORDS
@@ -400,53 +429,287 @@ def _find_matching_descriptors(physical_table, used_fields):
     }
 
 
-def update_mappings(rows):
+def _iter_mapping_rows(rows, start=0, end=None):
+    """
+    Yield (logical_table, physical_table, logical_field, physical_field) from
+    either a DictionaryStore or a list of row dicts (legacy format).
+    """
+    if isinstance(rows, DictionaryStore):
+        return rows.iter_values('TABELLA_LOGICA', 'TABELLA_FISICA', 'CAMPO_LOGICO', 'CAMPO_FISICO',
+                                start=start, end=end)
+    return (
+        (row.get('TABELLA_LOGICA'), row.get('TABELLA_FISICA'),
+         row.get('CAMPO_LOGICO'), row.get('CAMPO_FISICO'))
+        for row in rows[start:end]
+    )
+
+
+def update_mappings(rows, start=0, end=None):
     # Build logical->physical maps from DB dictionary rows.
     # Now supports multiple descriptors per physical table.
-    TABLE_MAP.clear()
-    FIELD_MAP.clear()
-    PHYSICAL_TABLE_MAP.clear()
-    REVERSE_FIELD_MAP.clear()
-    TABLE_ORIGINAL_CASE.clear()
-    FIELD_ORIGINAL_CASE.clear()
-
-    for row in rows:
-        logical_table = row.get('TABELLA_LOGICA')
-        physical_table = row.get('TABELLA_FISICA')
-        logical_field = row.get('CAMPO_LOGICO')
-        physical_field = row.get('CAMPO_FISICO')
-
-        table_key = _normalize_table_key(logical_table)
+    # `rows` is the shared DictionaryStore (or a legacy list of dicts): map values
+    # reuse the store's interned strings and derived keys are interned once, so the
+    # maps add no duplicated strings on top of the store.
+    # The new maps are built aside and published at the end: translations running
+    # on other threads during a reload keep using the previous dictionary.
+    # start > 0 (lazy loading): `rows` is the store already mapped up to `start`
+    # and only rows start..end are indexed, into the published maps. Readers only
+    # look keys up in the top-level dicts, so new keys are added in place; inner
+    # dicts and lists (iterated by readers) are replaced by extended copies.
+    # Cached segments stay valid: lazy mode loads a query's descriptors before
+    # translating it.
+    global DICTIONARY_STORE, TABLE_MAP, FIELD_MAP, PHYSICAL_TABLE_MAP, REVERSE_FIELD_MAP
+    global TABLE_ORIGINAL_CASE, FIELD_ORIGINAL_CASE, FIELD_INDEX, DESCRIPTOR_TRIE
+
+    incremental = start > 0 and rows is DICTIONARY_STORE
+    if incremental:
+        table_map = TABLE_MAP
+        field_map = FIELD_MAP
+        physical_table_map = PHYSICAL_TABLE_MAP
+        reverse_field_map = REVERSE_FIELD_MAP
+        table_original_case = TABLE_ORIGINAL_CASE
+        field_original_case = FIELD_ORIGINAL_CASE
+        field_index = FIELD_INDEX
+        # Inner containers already replaced by a private copy in this call
+        owned = set()
+    else:
+        start = 0
+        table_map = {}
+        field_map = {}
+        physical_table_map = {}
+        reverse_field_map = {}
+        table_original_case = {}
+        field_original_case = {}
+        field_index = FieldIndex()
+        owned = None
+    tables_before = len(table_original_case)
+
+    # Normalizations are cached per distinct string: ~36k rows but only a few
+    # thousand distinct table names.
+    table_keys = {}
+    physical_keys = {}
+    field_keys = {}
+    physical_field_keys = {}
+
+    for logical_table, physical_table, logical_field, physical_field in _iter_mapping_rows(rows, start, end):
+        table_key = table_keys.get(logical_table)
+        if table_key is None:
+            table_key = table_keys[logical_table] = sys.intern(_normalize_table_key(logical_table))
         if not table_key or not physical_table:
             continue
 
         # Logical → Physical (unchanged)
-        TABLE_MAP.setdefault(table_key, physical_table)
+        table_map.setdefault(table_key, physical_table)
 
         # Original case storage (for SQL → TecSQL reverse translation)
-        TABLE_ORIGINAL_CASE.setdefault(table_key, '$' + str(logical_table).strip())
+        if table_key not in table_original_case:
+            table_original_case[table_key] = sys.intern('$' + str(logical_table).strip())
 
         # Physical → Logical (FIXED: store all descriptors in list)
-        physical_key = str(physical_table).strip().lower()
-        if physical_key not in PHYSICAL_TABLE_MAP:
-            PHYSICAL_TABLE_MAP[physical_key] = []
-        if table_key not in PHYSICAL_TABLE_MAP[physical_key]:
-            PHYSICAL_TABLE_MAP[physical_key].append(table_key)
+        physical_key = physical_keys.get(physical_table)
+        if physical_key is None:
+            physical_key = physical_keys[physical_table] = sys.intern(str(physical_table).strip().lower())
+        if physical_key not in physical_table_map:
+            physical_table_map[physical_key] = []
+        if table_key not in physical_table_map[physical_key]:
+            if owned is not None and ('physical', physical_key) not in owned:
+                owned.add(('physical', physical_key))
+                physical_table_map[physical_key] = list(physical_table_map[physical_key])
+            physical_table_map[physical_key].append(table_key)
 
         # Field maps (Logical → Physical)
-        field_key = _normalize_field_key(logical_field)
+        field_key = field_keys.get(logical_field)
+        if field_key is None:
+            field_key = field_keys[logical_field] = sys.intern(_normalize_field_key(logical_field))
         if field_key and physical_field:
-            FIELD_MAP.setdefault(table_key, {})
-            FIELD_MAP[table_key].setdefault(field_key, physical_field)
+            if owned is not None and ('fields', table_key) not in owned:
+                owned.add(('fields', table_key))
+                field_map[table_key] = dict(field_map.get(table_key, {}))
+            field_map.setdefault(table_key, {})
+            field_map[table_key].setdefault(field_key, physical_field)
 
             # Reverse field map (Physical → Logical for each descriptor)
-            REVERSE_FIELD_MAP.setdefault(physical_key, {})
-            physical_field_lower = str(physical_field).strip().lower()
-            REVERSE_FIELD_MAP[physical_key].setdefault(physical_field_lower, {})
-            REVERSE_FIELD_MAP[physical_key][physical_field_lower][table_key] = field_key
+            if owned is not None and ('reverse', physical_key) not in owned:
+                owned.add(('reverse', physical_key))
+                reverse_field_map[physical_key] = dict(reverse_field_map.get(physical_key, {}))
+            reverse_field_map.setdefault(physical_key, {})
+            physical_field_lower = physical_field_keys.get(physical_field)
+            if physical_field_lower is None:
+                physical_field_lower = physical_field_keys[physical_field] = \
+                    sys.intern(str(physical_field).strip().lower())
+            if owned is not None and ('reverse', physical_key, physical_field_lower) not in owned:
+                owned.add(('reverse', physical_key, physical_field_lower))
+                reverse_field_map[physical_key][physical_field_lower] = \
+                    dict(reverse_field_map[physical_key].get(physical_field_lower, {}))
+            reverse_field_map[physical_key].setdefault(physical_field_lower, {})
+            reverse_field_map[physical_key][physical_field_lower][table_key] = field_key
 
             # Original case storage for field names
-            FIELD_ORIGINAL_CASE.setdefault((table_key, field_key), str(logical_field).strip())
+            if (table_key, field_key) not in field_original_case:
+                stripped = str(logical_field).strip()
+                field_original_case[(table_key, field_key)] = \
+                    logical_field if stripped == logical_field else sys.intern(stripped)
+
+            # Global inverted index: "which tables/descriptors contain field X?"
+            posting = (physical_table, table_original_case[table_key],
+                       field_original_case[(table_key, field_key)], physical_field)
+            field_index.add(field_key, posting)
+            field_index.add(physical_field_lower, posting)
+
+    field_index.freeze()
+
+    if incremental and len(table_original_case) == tables_before:
+        descriptor_trie = DESCRIPTOR_TRIE  # nessun descrittore nuovo
+    else:
+        descriptor_trie = CompletionTrie()
+        for table_key, descriptor in table_original_case.items():
+            descriptor_trie.insert(table_key[1:], {
+                'text': descriptor, 'kind': 'descriptor', 'detail': table_map.get(table_key, '')
+            })
+        descriptor_trie.freeze()
+
+    DICTIONARY_STORE = rows if isinstance(rows, DictionaryStore) else None
+    TABLE_MAP = table_map
+    FIELD_MAP = field_map
+    PHYSICAL_TABLE_MAP = physical_table_map
+    REVERSE_FIELD_MAP = reverse_field_map
+    TABLE_ORIGINAL_CASE = table_original_case
+    FIELD_ORIGINAL_CASE = field_original_case
+    FIELD_INDEX = field_index
+    DESCRIPTOR_TRIE = descriptor_trie
+    _field_trie.cache_clear()
+    if not incremental:
+        SEGMENT_CACHE.clear()
+
+
+def find_fields(field_name, mode='exact', limit=50, max_distance=None):
+    """
+    Lookup globale di un campo (nome fisico o logico) su tutto lo schema.
+
+    Returns: [{'field': 'codice', 'distance': 0, 'postings': [
+                 {'TABELLA_FISICA': ..., 'TABELLA_LOGICA': '$..', 'CAMPO_LOGICO': ..., 'CAMPO_FISICO': ...}]}]
+    """
+    key = _normalize_field_key(field_name)
+    return [
+        {
+            'field': found,
+            'distance': distance,
+            'postings': [
+                {'TABELLA_FISICA': physical_table, 'TABELLA_LOGICA': descriptor,
+                 'CAMPO_LOGICO': logical_field, 'CAMPO_FISICO': physical_field}
+                for physical_table, descriptor, logical_field, physical_field in postings
+            ]
+        }
+        for found, distance, postings in FIELD_INDEX.lookup(key, mode, limit, max_distance)
+    ]
+
+
+# --- Autocomplete ---
+# Parola sotto il cursore: [qualificatore.]prefisso, con $ opzionale su entrambi
+_COMPLETION_WORD_RE = re.compile(r'(?:(\$?[A-Za-z_]\w*)\.)?(\$?\w*)$')
+
+
+@lru_cache(maxsize=128)
+def _field_trie(table_key, physical=False):
+    """
+    Trie dei campi di un descrittore, costruito al primo uso e tenuto in LRU
+    (svuotata da update_mappings). physical=True indicizza i nomi fisici di
+    tutti i descrittori della tabella, per gli alias su tabelle fisiche.
+    """
+    trie = CompletionTrie()
+    if physical:
+        seen = set()
+        for descriptor_key in PHYSICAL_TABLE_MAP.get(table_key, []):
+            for field_key, physical_field in FIELD_MAP.get(descriptor_key, {}).items():
+                key = physical_field.lower()
+                if key in seen:
+                    continue
+                seen.add(key)
+                trie.insert(key, {
+                    'text': physical_field, 'kind': 'field',
+                    'detail': FIELD_ORIGINAL_CASE.get((descriptor_key, field_key), '')
+                })
+    else:
+        for field_key, physical_field in FIELD_MAP.get(table_key, {}).items():
+            trie.insert(field_key, {
+                'text': FIELD_ORIGINAL_CASE.get((table_key, field_key), field_key),
+                'kind': 'field', 'detail': physical_field
+            })
+    return trie.freeze()
+
+
+def _qualified(entries, qualifier):
+    return [dict(entry, text=f'{qualifier}.{entry["text"]}') for entry in entries]
+
+
+def autocomplete(text_before_cursor, query=None, limit=20):
+    """
+    Completamenti TecSQL per la parola che termina al cursore.
+
+    - `$Desc`          → descrittori (e campi del descrittore base come `$Campo`)
+    - `$Desc.Ca`       → campi del descrittore
+    - `alias.Ca`       → campi della tabella dell'alias (alias letti da `query`,
+                         il testo completo, perche' il FROM e' di solito dopo il cursore)
+    - `pre`            → alias e descrittori
+
+    Returns: {'replace': n caratteri prima del cursore da sostituire,
+              'completions': [{'text', 'kind', 'detail'}]}
+    """
+    text = '' if text_before_cursor is None else str(text_before_cursor)
+    match = _COMPLETION_WORD_RE.search(text)
+    qualifier, prefix = match.group(1), match.group(2)
+    replace = len(match.group(0))
+    result = {'replace': replace, 'completions': []}
+    if not qualifier and not prefix:
+        return result
+
+    tokens = None
+
+    def scan_tokens():
+        nonlocal tokens
+        if tokens is None:
+            tokens = _tokenize(normalize_query_text(query if query is not None else text))
+        return tokens
+
+    field_prefix = _normalize_field_key(prefix.lstrip('$'))
+    completions = []
+
+    if qualifier:
+        table_key = None
+        physical = False
+        if qualifier.startswith('$'):
+            table_key = _normalize_table_key(qualifier)
+        else:
+            alias = _pre_scan_aliases(scan_tokens()).get(qualifier.lower())
+            if alias and alias['mode'] == 'physical' and alias['physical']:
+                table_key, physical = str(alias['physical']).strip().lower(), True
+            elif alias:
+                table_key = alias['logical_key']
+            elif _normalize_table_key(qualifier) in TABLE_MAP:
+                table_key = _normalize_table_key(qualifier)
+        if table_key:
+            completions = _qualified(_field_trie(table_key, physical).complete(field_prefix, limit), qualifier)
+    elif prefix.startswith('$'):
+        completions = DESCRIPTOR_TRIE.complete(_normalize_table_key(prefix)[1:], limit)
+        base_table_key, _ = _pre_scan_tables(scan_tokens())
+        if base_table_key and len(completions) < limit:
+            completions = completions + [
+                dict(entry, text='$' + entry['text'])
+                for entry in _field_trie(base_table_key).complete(field_prefix, limit - len(completions))
+            ]
+    else:
+        lower = prefix.lower()
+        completions = [
+            {'text': alias, 'kind': 'alias',
+             'detail': TABLE_ORIGINAL_CASE.get(info['logical_key']) or info['physical'] or ''}
+            for alias, info in sorted(_pre_scan_aliases(scan_tokens()).items())
+            if alias.startswith(lower) and alias != lower
+        ][:limit]
+        if len(completions) < limit:
+            completions += DESCRIPTOR_TRIE.complete(_normalize_table_key(prefix)[1:], limit - len(completions))
+
+    result['completions'] = completions
+    return result
 
 
 def _resolve_table(logical_table):
@@ -603,11 +866,13 @@ def _format_unqualified_field(physical_field, is_outer, context):
     return physical_field
 
 
-def _translate_subqueries_in_sql(sql, chosen_descriptor=None):
+def _translate_subqueries_in_sql(sql, chosen_descriptor=None, remembered=None, resolved=None, incremental=False):
     """
     Traduce le subquery (SELECT...) nella stringa SQL lavorando inside-out:
     prima le più interne (che non contengono parentesi), poi le più esterne.
     Usa placeholder per evitare interferenze regex durante il processo.
+    Le scelte di descrittore fatte nelle subquery si aggiungono a `resolved`.
+    `incremental`: subquery lette da / salvate in SEGMENT_CACHE.
 
     Ritorna il SQL con le subquery tradotte in TecSQL.
     """
@@ -616,8 +881,7 @@ def _translate_subqueries_in_sql(sql, chosen_descriptor=None):
 
     def replace_innermost(sql_text):
         # Trova (SELECT...senza parentesi annidate...) più interni
-        pattern = re.compile(r'\(SELECT\b[^()]*\)', re.IGNORECASE)
-        matches = list(pattern.finditer(sql_text))
+        matches = list(_INNERMOST_SUBQUERY_RE.finditer(sql_text))
         if not matches:
             return sql_text, False
 
@@ -626,9 +890,14 @@ def _translate_subqueries_in_sql(sql, chosen_descriptor=None):
             inner_with_parens = m.group(0)
             inner = inner_with_parens[1:-1].strip()  # rimuove parentesi esterne
 
-            result = translate_sql_to_tecsql(inner, chosen_descriptor)
+            if incremental:
+                result = _translate_sql_segment(inner, chosen_descriptor, remembered)
+            else:
+                result = translate_sql_to_tecsql(inner, chosen_descriptor, remembered)
             if result.get('success'):
                 translated_inner = result['tecsql']
+                if resolved is not None:
+                    resolved.extend(result.get('descriptor_choices', []))
             else:
                 translated_inner = inner  # lascia non tradotto in caso di errore
 
@@ -664,17 +933,14 @@ def _split_sql_at_top_level_unions(sql):
     depth = 0
     split_points = []
 
-    for m in re.finditer(
-        r'(?i)\b(UNION\s+ALL|UNION|INTERSECT|MINUS|EXCEPT)\b|[()]',
-        sql
-    ):
+    for m in _TOP_LEVEL_SET_OP_RE.finditer(sql):
         ch = m.group(0)
         if ch == '(':
             depth += 1
         elif ch == ')':
             depth -= 1
         elif depth == 0:
-            op = re.sub(r'\s+', ' ', ch).upper().strip()
+            op = _WHITESPACE_RE.sub(' ', ch).upper().strip()
             split_points.append((m.start(), m.end(), op))
 
     if not split_points:
@@ -692,10 +958,38 @@ def _split_sql_at_top_level_unions(sql):
     return parts, operators
 
 
-def translate_sql_to_tecsql(sql_query, chosen_descriptor=None):
+def descriptor_choice_key(physical_table, fields_used):
+    """Chiave di una scelta di descrittore: tabella fisica + insieme dei campi usati."""
+    return (str(physical_table).lower(), tuple(sorted({str(f).lower() for f in fields_used})))
+
+
+def _translate_sql_segment(sql, chosen_descriptor, remembered):
+    """
+    Segmento SQL (ramo UNION o subquery) tradotto con SEGMENT_CACHE. Si
+    memorizzano solo i successi senza tabelle ambigue: non dipendono da
+    chosen_descriptor ne' dalle scelte ricordate, valgono per ogni richiesta.
+    """
+    cached = SEGMENT_CACHE.get('sql', sql)
+    if cached is not None:
+        return cached
+    result = translate_sql_to_tecsql(sql, chosen_descriptor, remembered, incremental=True)
+    if result.get('success') and not result.get('descriptor_choices'):
+        SEGMENT_CACHE.put('sql', sql, result)
+    return result
+
+
+def translate_sql_to_tecsql(sql_query, chosen_descriptor=None, remembered=None, incremental=False):
     """
     Translate SQL (physical names) to TecSQL (logical names).
 
+    `remembered` maps descriptor_choice_key(table, fields) to a descriptor
+    chosen earlier: ambiguous tables resolve with it instead of asking again.
+    An explicit chosen_descriptor wins over a remembered one.
+
+    `incremental` (live translation): UNION branches and subqueries are
+    translated through SEGMENT_CACHE, so only the segments that changed
+    since the previous request are translated again.
+
     Returns:
         {
             'success': True/False,
@@ -703,6 +997,8 @@ def translate_sql_to_tecsql(sql_query, chosen_descriptor=None):
             'error': '...' (if failure),
             'ambiguous': True/False,
             'candidates': [...],
+            'descriptor_choices': [...] (ambiguous tables resolved: table,
+                fields_used, descriptor, candidates, source chosen/remembered),
             'partial_translation': True/False,
             'untranslated_fields': [...]
         }
@@ -716,22 +1012,28 @@ def translate_sql_to_tecsql(sql_query, chosen_descriptor=None):
     parts, operators = _split_sql_at_top_level_unions(normalized)
     if len(parts) > 1:
         translated_parts = []
+        resolved = []
         for part in parts:
-            result = translate_sql_to_tecsql(part, chosen_descriptor)
+            if incremental:
+                result = _translate_sql_segment(part, chosen_descriptor, remembered)
+            else:
+                result = translate_sql_to_tecsql(part, chosen_descriptor, remembered)
             if not result['success'] and not result.get('ambiguous'):
                 return result  # Propaga primo errore
             if result.get('ambiguous'):
                 return result  # Propaga richiesta di scelta descrittore
             translated_parts.append(result['tecsql'])
+            resolved.extend(result.get('descriptor_choices', []))
 
         combined = translated_parts[0]
         for op, part in zip(operators, translated_parts[1:]):
             combined = f'{combined} {op} {part}'
-        return {'success': True, 'tecsql': combined, 'descriptors_used': {},
+        return {'success': True, 'tecsql': combined, 'descriptors_used': {}, 'descriptor_choices': resolved,
                 'partial_translation': False, 'untranslated_fields': []}
 
     # Pre-processa subquery: traduce dentro-fuori (subquery più interne per prime)
-    normalized = _translate_subqueries_in_sql(normalized, chosen_descriptor)
+    resolved = []
+    normalized = _translate_subqueries_in_sql(normalized, chosen_descriptor, remembered, resolved, incremental)
 
     extraction = _extract_fields_from_sql(normalized)
     tables = extraction['tables']
@@ -765,8 +1067,21 @@ def translate_sql_to_tecsql(sql_query, chosen_descriptor=None):
             # Ambiguous - multiple exact matches
             # chosen_descriptor may arrive as display name ($CentroDiLavoro) or normalized key
             normalized_choice = _normalize_table_key(chosen_descriptor) if chosen_descriptor else None
+            source = 'chosen'
+            if not (normalized_choice and normalized_choice in matches['exact_matches']) and remembered:
+                # Choice remembered for the same table and fields
+                previous = remembered.get(descriptor_choice_key(table, used_fields))
+                normalized_choice = _normalize_table_key(previous) if previous else None
+                source = 'remembered'
             if normalized_choice and normalized_choice in matches['exact_matches']:
                 descriptor_choices[table] = normalized_choice
+                resolved.append({
+                    'table': table,
+                    'fields_used': used_fields,
+                    'descriptor': TABLE_ORIGINAL_CASE.get(normalized_choice, normalized_choice),
+                    'candidates': [TABLE_ORIGINAL_CASE.get(c, c) for c in matches['exact_matches']],
+                    'source': source
+                })
             else:
                 return {
                     'success': False,
@@ -873,6 +1188,7 @@ def translate_sql_to_tecsql(sql_query, chosen_descriptor=None):
         'success': True,
         'tecsql': tecsql,
         'descriptors_used': descriptor_choices,
+        'descriptor_choices': resolved,
         'partial_translation': len(untranslated_fields) > 0,
         'untranslated_fields': untranslated_fields
     }
@@ -1012,13 +1328,24 @@ def _strip_param_conditions(normalized_query):
     return _format_tokens(result)
 
 
-def translate_tecsql(normalized_query, strip_params=False):
+def _translate_tecsql_segment(text):
+    """Segmento TecSQL (ramo UNION o subquery) tradotto con SEGMENT_CACHE."""
+    cached = SEGMENT_CACHE.get('tecsql', text)
+    if cached is None:
+        cached = _translate_tecsql_single(text, incremental=True)
+        SEGMENT_CACHE.put('tecsql', text, cached)
+    return cached
+
+
+def translate_tecsql(normalized_query, strip_params=False, incremental=False):
     """
     Entry point pubblico. Gestisce UNION/INTERSECT/MINUS traducendo ogni
     SELECT indipendentemente e ricongiungedoli.
 
     strip_params: if True, removes WHERE/HAVING conditions that reference
                   parameter tokens before translating.
+    incremental: live translation, UNION branches and subqueries are read
+                 from / stored in SEGMENT_CACHE (only changed ones are translated).
     """
     if not normalized_query:
         raise ValueError('Query TecSql vuota')
@@ -1031,14 +1358,15 @@ def translate_tecsql(normalized_query, strip_params=False):
     tokens = _tokenize(normalized_query)
     parts, operators = _split_at_top_level_unions(tokens)
 
+    translate_part = _translate_tecsql_segment if incremental else _translate_tecsql_single
     if len(parts) == 1:
-        return _translate_tecsql_single(normalized_query)
+        return translate_part(normalized_query)
 
     # Traduce ogni SELECT indipendentemente e ricongiunge
     translated = []
     for part_tokens in parts:
         part_text = _format_tokens(part_tokens)
-        translated.append(_translate_tecsql_single(part_text))
+        translated.append(translate_part(part_text))
 
     result = translated[0]
     for op, part in zip(operators, translated[1:]):
@@ -1165,7 +1493,7 @@ def _pre_scan_aliases(tokens):
     return alias_map
 
 
-def _translate_tecsql_single(normalized_query):
+def _translate_tecsql_single(normalized_query, incremental=False):
     # Parse the query, track clause context, and translate logical names.
     if not normalized_query:
         raise ValueError('Query TecSql vuota')
@@ -1260,7 +1588,10 @@ def _translate_tecsql_single(normalized_query):
                     inner_tokens, close_idx = _collect_subquery_tokens(tokens, i)
                     inner_text = _format_tokens(inner_tokens)
                     # Translate recursively
-                    translated_inner = _translate_tecsql_single(inner_text)
+                    if incremental:
+                        translated_inner = _translate_tecsql_segment(inner_text)
+                    else:
+                        translated_inner = _translate_tecsql_single(inner_text)
                     output.append({'type': 'SYMBOL', 'text': '('})
                     output.append({'type': 'IDENT', 'text': translated_inner})
                     output.append({'type': 'SYMBOL', 'text': ')'})
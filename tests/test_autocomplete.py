@@ -0,0 +1,62 @@
+import os
+import sys
+import unittest
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'tools'))
+
+from dictionary_store import DictionaryStore  # noqa: E402
+from fake_dictionary import iter_rows  # noqa: E402
+from tecsql_translator import autocomplete, update_mappings  # noqa: E402
+
+
+class AutocompleteParityTest(unittest.TestCase):
+    """I trie di completamento restituiscono gli stessi nomi di un filtro lineare per prefisso."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.store = DictionaryStore()
+        for row in iter_rows(5400):
+            cls.store.add_db_row(row)
+        update_mappings(cls.store)
+        cls.descriptors = {}  # descrittore minuscolo → nome originale
+        cls.fields = {}       # descrittore minuscolo → {campo minuscolo: (campo, campo fisico)}
+        for record in cls.store.to_records():
+            key = record['TABELLA_LOGICA'].lower()
+            cls.descriptors.setdefault(key, record['TABELLA_LOGICA'])
+            cls.fields.setdefault(key, {}).setdefault(
+                record['CAMPO_LOGICO'].lower(), (record['CAMPO_LOGICO'], record['CAMPO_FISICO']))
+        cls.descriptor = cls.store.value(0, 'TABELLA_LOGICA')
+
+    @staticmethod
+    def by_prefix(names, prefix, limit):
+        return sorted((name for name in names if name.startswith(prefix)), key=lambda name: (len(name), name))[:limit]
+
+    def texts(self, text, query=None, limit=20):
+        return [entry['text'] for entry in autocomplete(text, query, limit)['completions']]
+
+    def test_descriptors(self):
+        for prefix in ('P', 'partner', 'Ordine1', 'c', self.descriptor):
+            expected = ['$' + self.descriptors[key]
+                        for key in self.by_prefix(self.descriptors, prefix.lower(), 20)]
+            self.assertEqual(self.texts('SELECT * FROM $' + prefix), expected, prefix)
+        self.assertEqual(self.texts('SELECT * FROM $zzz'), [])
+
+    def test_descriptor_fields(self):
+        fields = self.fields[self.descriptor.lower()]
+        for prefix in ('', 'c', 'Data', 'anno1'):
+            expected = [f'${self.descriptor}.{fields[key][0]}' for key in self.by_prefix(fields, prefix.lower(), 20)]
+            self.assertEqual(self.texts(f'SELECT ${self.descriptor}.{prefix}'), expected, prefix)
+
+    def test_alias_fields(self):
+        fields = self.fields[self.descriptor.lower()]
+        query = f'SELECT x.Co FROM ${self.descriptor} x'
+        expected = [f'x.{fields[key][0]}' for key in self.by_prefix(fields, 'co', 5)]
+        self.assertEqual(self.texts('SELECT x.Co', query, limit=5), expected)
+        completions = autocomplete('SELECT ri', f'SELECT ri FROM ${self.descriptor} riga')['completions']
+        self.assertEqual(completions[0], {'text': 'riga', 'kind': 'alias', 'detail': '$' + self.descriptor})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'tools'))
+
+from descriptor_choices import DescriptorChoices  # noqa: E402
+from dictionary_store import DictionaryStore  # noqa: E402
+from fake_dictionary import iter_rows  # noqa: E402
+from tecsql_translator import descriptor_choice_key, translate_sql_to_tecsql, update_mappings  # noqa: E402
+from traffic_capture import TrafficCapture  # noqa: E402
+
+# Tabelle fisiche con due descrittori nel dizionario sintetico da 3000 righe
+QUERY = 'SELECT o.mg_codice_0 FROM MG_ORDI0007 o'
+KEY = descriptor_choice_key('MG_ORDI0007', ['mg_codice_0'])
+
+
+class RememberedChoiceTranslationTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        store = DictionaryStore()
+        for row in iter_rows(3000):
+            store.add_db_row(row)
+        update_mappings(store)
+
+    def test_ambiguous_without_choice(self):
+        result = translate_sql_to_tecsql(QUERY)
+        self.assertTrue(result['ambiguous'])
+        self.assertEqual(sorted(result['candidates']), ['$MagazzinoCausale8', '$OrdineFase7'])
+
+    def test_remembered_choice_is_applied(self):
+        result = translate_sql_to_tecsql(QUERY, remembered={KEY: '$MagazzinoCausale8'})
+        self.assertEqual(result['tecsql'], 'SELECT o.Codice0 FROM $MagazzinoCausale8 o')
+        [choice] = result['descriptor_choices']
+        self.assertEqual((choice['descriptor'], choice['source']), ('$MagazzinoCausale8', 'remembered'))
+
+    def test_explicit_choice_wins(self):
+        result = translate_sql_to_tecsql(QUERY, '$OrdineFase7', {KEY: '$MagazzinoCausale8'})
+        self.assertEqual(result['tecsql'], 'SELECT o.Codice0 FROM $OrdineFase7 o')
+        self.assertEqual(result['descriptor_choices'][0]['source'], 'chosen')
+
+    def test_choice_for_other_fields_is_ignored(self):
+        other = descriptor_choice_key('MG_ORDI0007', ['mg_codice_0', 'mg_data_1'])
+        self.assertTrue(translate_sql_to_tecsql(QUERY, remembered={other: '$OrdineFase7'})['ambiguous'])
+
+
+class DescriptorChoicesTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = os.path.join(self._tmp.name, 'descriptor_choices.json')
+
+    def open(self, **options):
+        choices = DescriptorChoices(self.path, **options)
+        self.addCleanup(choices.flush)  # prima che la directory temporanea sparisca
+        return choices
+
+    def remember(self, choices, user, descriptor, table='MG_ORDI0007', fields=('mg_codice_0',)):
+        choices.remember(user, table, list(fields), descriptor)
+        time.sleep(0.002)  # last_used distinti
+
+    def test_user_choice_then_global_majority(self):
+        choices = self.open()
+        self.remember(choices, 'anna', '$OrdineFase7')
+        self.remember(choices, 'bruno', '$MagazzinoCausale8')
+        self.remember(choices, 'carla', '$MagazzinoCausale8')
+        # Ripetere la stessa scelta non aggiunge voti
+        for _ in range(3):
+            self.remember(choices, 'anna', '$OrdineFase7')
+        self.assertEqual(choices.for_user('anna')[KEY], '$OrdineFase7')
+        self.assertEqual(choices.for_user('nuovo')[KEY], '$MagazzinoCausale8')
+        self.assertEqual(choices.for_user(None)[KEY], '$MagazzinoCausale8')
+
+    def test_anonymous_choices_count_once(self):
+        choices = self.open()
+        self.remember(choices, 'anna', '$OrdineFase7')
+        self.remember(choices, 'bruno', '$OrdineFase7')
+        for _ in range(3):
+            self.remember(choices, None, '$MagazzinoCausale8')
+        self.assertEqual(choices.for_user(None)[KEY], '$OrdineFase7')
+
+    def test_for_user_keeps_only_tables_in_the_query(self):
+        choices = self.open()
+        self.remember(choices, 'anna', '$OrdineFase7')
+        self.remember(choices, 'anna', '$FaseLavoro24', table='PR_FASE0024', fields=())
+        self.assertEqual(set(choices.for_user('anna', QUERY)), {KEY})
+        self.assertEqual(len(choices.for_user('anna', 'SELECT * FROM schema.pr_fase0024')), 1)
+        self.assertEqual(len(choices.for_user('anna')), 2)
+
+    def test_reload_and_eviction(self):
+        choices = self.open(max_entries=2)
+        self.remember(choices, 'anna', '$OrdineFase7')
+        self.remember(choices, 'bruno', '$MagazzinoCausale8', table='PR_FASE0024', fields=())
+        self.remember(choices, 'carla', '$FaseLavoro24', table='VE_LAVO0048', fields=())
+        self.assertEqual(choices.for_user('anna'), {
+            descriptor_choice_key('PR_FASE0024', []): '$MagazzinoCausale8',
+            descriptor_choice_key('VE_LAVO0048', []): '$FaseLavoro24',
+        })
+        choices.flush()
+        self.assertEqual(self.open(max_entries=2).for_user('anna'), choices.for_user('anna'))
+
+
+class CaptureRememberedChoicesTest(unittest.TestCase):
+
+    def test_every_remembered_choice_is_captured(self):
+        with tempfile.TemporaryDirectory() as directory:
+            capture = TrafficCapture(os.path.join(directory, 'translate.jsonl'))
+            body = {'direction': 'sql_to_tecsql', 'tecsql': '...', 'descriptor_choices': [
+                {'table': 'A', 'fields_used': ['x'], 'descriptor': '$A1', 'candidates': [], 'source': 'remembered'},
+                {'table': 'B', 'fields_used': [], 'descriptor': '$B2', 'candidates': [], 'source': 'remembered'},
+                {'table': 'C', 'fields_used': [], 'descriptor': '$C1', 'candidates': [], 'source': 'chosen'},
+            ]}
+            capture.record({'query': 'SELECT 1', 'chosen_descriptor': '$C1'}, body, 200, 1.0, None)
+            with open(capture.path, 'r', encoding='utf-8') as f:
+                entry = json.loads(f.readline())
+        self.assertEqual(entry['options'], {'chosen_descriptor': '$C1', 'remembered_choices': [
+            {'table': 'A', 'fields_used': ['x'], 'descriptor': '$A1'},
+            {'table': 'B', 'fields_used': [], 'descriptor': '$B2'},
+        ]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import csv
+import io
+import os
+import sys
+import unittest
+import zipfile
+from xml.etree import ElementTree
+
+from werkzeug.datastructures import MultiDict
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'tools'))
+
+from dictionary_export import EXPORT_BATCH, iter_csv, iter_rows, iter_xlsx, parse_filters  # noqa: E402
+from dictionary_store import COLUMNS, DictionaryStore  # noqa: E402
+from fake_dictionary import iter_rows as fake_rows  # noqa: E402
+
+NS = {'x': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+
+SPECIAL_ROWS = [
+    ('MD_SPEC', 'md_a', 'Speciali', 'Virgola, "virgolette"', 'C', 10, 0),
+    ('MD_SPEC', 'md_b', 'Speciali', 'A capo\ne <tag> & più', 'C', None, None),
+    ('MD_SPEC', 'md_c', 'Speciali', 'Controllo\x01\x0bfine', 'N', 12.5, 2),
+]
+
+
+def read_sheet(data):
+    """Righe del foglio XLSX come liste di valori (numeri come float)."""
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        names = set(archive.namelist())
+        assert {'[Content_Types].xml', 'xl/workbook.xml', 'xl/worksheets/sheet1.xml'} <= names
+        root = ElementTree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+    rows = []
+    for row in root.iterfind('x:sheetData/x:row', NS):
+        values = []
+        for cell in row.iterfind('x:c', NS):
+            if cell.get('t') == 'inlineStr':
+                values.append(cell.find('x:is/x:t', NS).text or '')
+            else:
+                values.append(float(cell.find('x:v', NS).text))
+        rows.append(values)
+    return rows
+
+
+class DictionaryExportTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.store = DictionaryStore()
+        for row in list(fake_rows(4500)) + SPECIAL_ROWS:
+            cls.store.add_db_row(row)
+        cls.rows = list(cls.store.iter_values(*COLUMNS))
+
+    def test_csv(self):
+        chunks = list(iter_csv(iter_rows(self.store, {}), delimiter=';'))
+        self.assertGreater(len(chunks), len(self.rows) // EXPORT_BATCH)
+        text = b''.join(chunks).decode('utf-8')
+        self.assertTrue(text.startswith('\ufeff'))
+        parsed = list(csv.reader(io.StringIO(text[1:], newline=''), delimiter=';'))
+        self.assertEqual(parsed[0], list(COLUMNS))
+        self.assertEqual(parsed[1:], [[str(value) for value in row] for row in self.rows])
+
+    def test_xlsx(self):
+        chunks = list(iter_xlsx(iter_rows(self.store, {})))
+        self.assertGreater(len(chunks), 1)
+        sheet = read_sheet(b''.join(chunks))
+        self.assertEqual(sheet[0], list(COLUMNS))
+        self.assertEqual(len(sheet), len(self.rows) + 1)
+        self.assertEqual(sheet[1], [self.rows[0][0], self.rows[0][1], self.rows[0][2], self.rows[0][3],
+                                    self.rows[0][4], float(self.rows[0][5]), float(self.rows[0][6])])
+        self.assertEqual(sheet[-3][3], 'Virgola, "virgolette"')
+        self.assertEqual(sheet[-2][3:], ['A capo\ne <tag> & più', 'C', '', ''])
+        # Caratteri non ammessi in XML rimossi, il file resta leggibile
+        self.assertEqual(sheet[-1][3:], ['Controllofine', 'N', 12.5, 2.0])
+
+    def test_filters_and_skip(self):
+        filters = parse_filters(MultiDict([('descriptor', 'speciali'), ('type', 'c, X')]))
+        self.assertEqual(filters, {'TABELLA_LOGICA': {'speciali'}, 'TIPO': {'c', 'x'}})
+        self.assertEqual(list(iter_rows(self.store, filters)), self.rows[-3:-1])
+        self.assertEqual(list(iter_rows(self.store, {}, skip=4499)), self.rows[4499:])
+        sheet = read_sheet(b''.join(iter_xlsx(iter_rows(self.store, filters))))
+        self.assertEqual([row[3] for row in sheet[1:]], ['Virgola, "virgolette"', 'A capo\ne <tag> & più'])
+
+
+if __name__ == '__main__':
+    unittest.main()
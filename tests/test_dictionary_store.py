@@ -0,0 +1,77 @@
+import json
+import os
+import sys
+import unittest
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'tools'))
+
+from dictionary_store import COLUMNS, DictionaryStore  # noqa: E402
+from fake_dictionary import iter_rows  # noqa: E402
+
+
+def legacy_record(row):
+    """Riga del cursore nel vecchio formato di api_connect (lista di dict)."""
+    return {
+        'TABELLA_FISICA': row[0] or '',
+        'CAMPO_FISICO': row[1] or '',
+        'TABELLA_LOGICA': row[2] or '',
+        'CAMPO_LOGICO': row[3] or '',
+        'TIPO': row[4] or '',
+        'AMPIEZZA': row[5] if row[5] is not None else '',
+        'DECIMALI': row[6] if row[6] is not None else ''
+    }
+
+
+class DictionaryStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rows = list(iter_rows(3600))
+        # Valori NULL come arrivano da Oracle
+        self.rows.append(('MD_NULL', None, 'NullDescriptor', None, None, None, None))
+        self.rows.append(('MD_NULL', 'md_zero', 'NullDescriptor', 'Zero', 'N', 0, 0))
+        self.store = DictionaryStore()
+        for row in self.rows:
+            self.store.add_db_row(row)
+
+    def test_records_match_legacy_layout(self):
+        records = self.store.to_records()
+        self.assertEqual(records, [legacy_record(row) for row in self.rows])
+        self.assertEqual(list(records[0]), list(COLUMNS))
+        # Stesso JSON della risposta di /api/connect
+        self.assertEqual(json.dumps(records), json.dumps([legacy_record(row) for row in self.rows]))
+
+    def test_round_trip_from_records(self):
+        records = self.store.to_records()
+        self.assertEqual(DictionaryStore.from_rows(records).to_records(), records)
+
+    def test_values_are_interned(self):
+        first = self.store.value(0, 'TABELLA_FISICA')
+        same_table = [row_id for row_id in range(len(self.store))
+                      if self.store.value(row_id, 'TABELLA_FISICA') == first]
+        self.assertGreater(len(same_table), 1)
+        for row_id in same_table:
+            self.assertIs(self.store.value(row_id, 'TABELLA_FISICA'), first)
+        self.assertLess(self.store.distinct_values, len(self.store) * len(COLUMNS) / 4)
+
+    def test_numbers_are_not_collapsed(self):
+        store = DictionaryStore()
+        store.append(('T', 'a', '$T', 'A', 'N', 1, True))
+        store.append(('T', 'b', '$T', 'B', 'N', 1.0, 1))
+        self.assertEqual([store.value(0, 'AMPIEZZA'), store.value(0, 'DECIMALI')], [1, True])
+        self.assertIs(type(store.value(1, 'AMPIEZZA')), float)
+        self.assertIs(type(store.value(1, 'DECIMALI')), int)
+
+    def test_iter_values_and_rows_where(self):
+        columns = ('TABELLA_FISICA', 'CAMPO_LOGICO')
+        expected = [(row[0], row[3] or '') for row in self.rows]
+        self.assertEqual(list(self.store.iter_values(*columns)), expected)
+        self.assertEqual(list(self.store.iter_values(*columns, start=100, end=150)), expected[100:150])
+        self.assertEqual(list(self.store.iter_values(*columns, start=3590)), expected[3590:])
+        self.assertEqual(self.store.rows_where('TABELLA_FISICA', 'MD_NULL'), [3600, 3601])
+        self.assertEqual(self.store.rows_where('TABELLA_FISICA', 'ASSENTE'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
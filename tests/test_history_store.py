@@ -0,0 +1,82 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from history_store import HistoryStore  # noqa: E402
+
+
+class HistoryStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = os.path.join(self._tmp.name, 'history.json')
+
+    def open(self, **options):
+        options.setdefault('compact_every', 1000)
+        return HistoryStore(self.path, key_fields=('name',), sort_field='name', flush_interval=0.01, **options)
+
+    def hits(self, store):
+        return {entry['name']: entry['hits'] for entry in store.items()}
+
+    def test_log_replay(self):
+        store = self.open()
+        for name in ('b', 'a', 'b', 'c', 'b'):
+            store.add({'name': name, 'detail': name.upper()})
+        store.flush()
+        self.assertFalse(os.path.exists(self.path))
+        with open(store.log_path, 'a', encoding='utf-8') as f:
+            f.write('{"name": "tronc')  # riga troncata da un arresto brusco
+
+        reopened = self.open()
+        self.assertEqual(self.hits(reopened), {'a': 1, 'b': 3, 'c': 1})
+        self.assertEqual([entry['name'] for entry in reopened.items()], ['a', 'b', 'c'])
+        self.assertEqual(reopened.get(name='c')['detail'], 'C')
+
+    def test_compaction(self):
+        store = self.open(compact_every=5)
+        for index in range(12):
+            store.add({'name': f'n{index % 4}'})
+        store.flush()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        self.assertEqual([entry['name'] for entry in saved], ['n0', 'n1', 'n2', 'n3'])
+        self.assertEqual(os.path.getsize(store.log_path), 0)
+        self.assertEqual(self.hits(self.open()), {'n0': 3, 'n1': 3, 'n2': 3, 'n3': 3})
+
+    def test_eviction_keeps_most_recent(self):
+        evicted = []
+        store = self.open(max_entries=3, on_evict=evicted.append)
+        for name in ('a', 'b', 'c', 'a', 'd'):
+            store.add({'name': name})
+            time.sleep(0.002)
+        self.assertEqual(sorted(self.hits(store)), ['a', 'c', 'd'])
+        self.assertEqual([entry['name'] for entry in evicted], ['b'])
+        store.compact()
+        self.assertEqual(self.hits(self.open(max_entries=3)), {'a': 2, 'c': 1, 'd': 1})
+
+    def test_processes_sharing_files_keep_every_hit(self):
+        first, second = self.open(), self.open()
+        for _ in range(7):
+            first.add({'name': 'x'})
+        for _ in range(4):
+            second.add({'name': 'x'})
+            second.add({'name': 'y'})
+        first.flush()
+        second.flush()
+        first.compact()
+        third = self.open()
+        third.add({'name': 'x'})
+        second.compact()
+        third.compact()
+        self.assertEqual(self.hits(self.open()), {'x': 12, 'y': 4})
+        self.assertEqual(self.hits(third), {'x': 12, 'y': 4})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'tools'))
+
+from dictionary_store import DictionaryStore  # noqa: E402
+from fake_dictionary import iter_rows  # noqa: E402
+from schema_digest import SchemaDigest, diff, load_snapshot, save_snapshot  # noqa: E402
+
+
+def digest_of(rows):
+    store = DictionaryStore()
+    for row in rows:
+        store.add_db_row(row)
+    return SchemaDigest.from_store(store)
+
+
+class SchemaDiffTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.rows = list(iter_rows(3600))
+        cls.base = digest_of(cls.rows)
+
+    def test_identical(self):
+        result = diff(self.base, digest_of(reversed(self.rows)))
+        self.assertTrue(result['identical'])
+        self.assertEqual(result['tables_changed'], 0)
+        self.assertEqual(result['changed_descriptors'], [])
+
+    def test_changed_fields(self):
+        first = self.rows[0]
+        rows = [(first[:4] + ('N',) + first[5:])] + self.rows[1:]
+        # Secondo campo logico sullo stesso campo fisico
+        rows.append(first[:3] + ('Alias',) + first[4:])
+        result = diff(self.base, digest_of(rows))
+        self.assertFalse(result['identical'])
+        self.assertEqual(result['tables_changed'], 1)
+        [changed] = result['changed_descriptors']
+        self.assertEqual((changed['descriptor'], changed['table']), (first[2], first[0]))
+        self.assertEqual([field['CAMPO_LOGICO'] for field in changed['added_fields']], ['Alias'])
+        self.assertEqual(changed['removed_fields'], [])
+        [field] = changed['changed_fields']
+        self.assertEqual((field['CAMPO_LOGICO'], field['CAMPO_FISICO']), (first[3], first[1]))
+        self.assertEqual((field['from']['TIPO'], field['to']['TIPO']), (first[4], 'N'))
+
+    def test_added_removed_and_moved_descriptors(self):
+        removed = self.rows[1][2]
+        moved = self.rows[2][2]
+        rows = [row for row in self.rows if row[2] != removed]
+        rows = [('MD_NUOVA',) + row[1:] if row[2] == moved else row for row in rows]
+        rows.append(('MD_AGGIUNTA', 'md_codice', 'Aggiunta', 'Codice', 'C', 10, 0))
+        result = diff(self.base, digest_of(rows))
+        self.assertEqual([entry['descriptor'] for entry in result['added_descriptors']], ['Aggiunta'])
+        self.assertEqual([entry['descriptor'] for entry in result['removed_descriptors']], [removed])
+        [changed] = result['changed_descriptors']
+        self.assertEqual((changed['descriptor'], changed['table'], changed['previous_table']),
+                         (moved, 'MD_NUOVA', self.rows[2][0]))
+
+    def test_reads_fields_only_for_changed_tables(self):
+        first = self.rows[0]
+        new = digest_of([(first[:5] + (99,) + first[6:])] + self.rows[1:])
+        read = []
+        fields = new.fields
+        new.fields = lambda descriptor: read.append(descriptor) or fields(descriptor)
+        diff(self.base, new)
+        self.assertEqual(set(read), {first[2]})
+
+    def test_snapshot_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'snapshot.json')
+            save_snapshot(self.base, path, {'source': 'test'})
+            loaded = load_snapshot(path)
+        self.assertEqual(loaded.version, self.base.version)
+        self.assertEqual(loaded.meta, {'source': 'test'})
+        self.assertEqual(loaded.fields(self.rows[0][2]), self.base.fields(self.rows[0][2]))
+        self.assertTrue(diff(loaded, self.base)['identical'])
+
+
+if __name__ == '__main__':
+    unittest.main()
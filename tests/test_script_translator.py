@@ -0,0 +1,75 @@
+import collections
+import io
+import os
+import sys
+import tracemalloc
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from script_translator import StatementSplitter, iter_statements  # noqa: E402
+
+
+class StatementSplitterMemoryTest(unittest.TestCase):
+    """La memoria resta limitata anche su input senza a capo (picco misurato con tracemalloc)."""
+
+    def feed(self, splitter, chunks):
+        """Alimenta lo splitter; ritorna (numero di statement, ultimi 10, picco di memoria in byte)."""
+        last = collections.deque(maxlen=10)
+        count = 0
+        tracemalloc.start()
+        try:
+            for chunk in chunks + [None]:
+                statements = splitter.feed(chunk) if chunk is not None else splitter.finish()
+                count += len(statements)
+                last.extend(statements)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return count, list(last), peak
+
+    def test_many_statements_on_one_line(self):
+        count, statements, peak = self.feed(StatementSplitter(), ['SELECT a FROM t; ' * 10] * 2000)
+        self.assertEqual(count, 20000)
+        self.assertEqual(statements[-1], (1, 'SELECT a FROM t'))
+        # 340 KB di input su una riga
+        self.assertLess(peak, 100 * 1024)
+
+    def test_oversized_statement_without_newlines(self):
+        chunks = ['x' * 1000] * 2000 + ['; SELECT 1']
+        _, statements, peak = self.feed(StatementSplitter(max_chars=1000), chunks)
+        self.assertEqual(statements, [(1, None), (1, 'SELECT 1')])
+        # 2 MB di input senza a capo
+        self.assertLess(peak, 100 * 1024)
+
+    def test_long_comment_without_newlines(self):
+        chunks = ['SELECT /* '] + ['c' * 1000] * 2000 + [' */ 1; SELECT 2']
+        _, statements, peak = self.feed(StatementSplitter(max_chars=1000), chunks)
+        self.assertEqual(statements, [(1, 'SELECT   1'), (1, 'SELECT 2')])
+        self.assertLess(peak, 100 * 1024)
+
+    def test_stream(self):
+        script = b'SELECT 1; SELECT 2;' * 50000 + b'\n/\nSELECT 3\n/\n'
+        statements = list(iter_statements(io.BytesIO(script), chunk_size=4096))
+        self.assertEqual(len(statements), 100001)
+        self.assertEqual(statements[-1], (3, 'SELECT 3'))
+
+
+class StatementSplitterSlashLineTest(unittest.TestCase):
+
+    def split(self, text, chunk=1):
+        splitter = StatementSplitter()
+        statements = []
+        for start in range(0, len(text), chunk):
+            statements += splitter.feed(text[start:start + chunk])
+        return statements + splitter.finish()
+
+    def test_slash_line_split_across_chunks(self):
+        text = 'SELECT 1\n   /   \nSELECT 2\nx /\nSELECT 3'
+        expected = [(1, 'SELECT 1'), (3, 'SELECT 2\nx /\nSELECT 3')]
+        for chunk in (1, 2, 3, 100):
+            self.assertEqual(self.split(text, chunk), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
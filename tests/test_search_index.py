@@ -0,0 +1,148 @@
+import os
+import sys
+import unittest
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'tools'))
+
+from dictionary_store import DictionaryStore  # noqa: E402
+from fake_dictionary import iter_rows  # noqa: E402
+from search_index import TableSearchIndex, normalize_search_input, score_table_match  # noqa: E402
+from tecsql_translator import find_fields, update_mappings  # noqa: E402
+
+
+def find_best_table_matches(records, search_input, max_results=10, min_score=50):
+    """Scansione lineare come findBestTableMatches (static/js/fuzzy-search.js)."""
+    query = normalize_search_input(search_input)
+    if not query:
+        return {'exact': [], 'suggestions': []}
+    tables = {}
+    for row_id, record in enumerate(records):
+        fisico = record['TABELLA_FISICA'] or ''
+        logico = record['TABELLA_LOGICA'] or ''
+        if not fisico:
+            continue
+        if fisico in tables:
+            tables[fisico][1]['fieldsCount'] += 1
+            continue
+        score_data = score_table_match(fisico, logico, query)
+        if score_data['score'] >= min_score:
+            tables[fisico] = (row_id, {
+                'fisico': fisico, 'logico': logico, 'score': score_data['score'],
+                'type': score_data['type'], 'match': score_data.get('match'),
+                'similarity': score_data.get('similarity', 0), 'fieldsCount': 1
+            })
+    ranked = [entry for _, entry in sorted(tables.values(), key=lambda item: (
+        -item[1]['score'], -item[1]['fieldsCount'], item[0]))]
+    return {'exact': [entry for entry in ranked if entry['type'] == 'exact'],
+            'suggestions': [entry for entry in ranked if entry['type'] != 'exact'][:max_results]}
+
+
+class TableSearchIndexParityTest(unittest.TestCase):
+    """L'indice restituisce gli stessi risultati della scansione lineare del client."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.store = DictionaryStore()
+        for row in iter_rows(5400):
+            cls.store.add_db_row(row)
+        cls.records = cls.store.to_records()
+        cls.index = TableSearchIndex(cls.store)
+
+    def assert_same(self, query, max_results=10, min_score=50):
+        self.assertEqual(self.index.search(query, max_results, min_score),
+                         find_best_table_matches(self.records, query, max_results, min_score), query)
+
+    def test_exact_and_prefix(self):
+        record = self.records[0]
+        for query in (record['TABELLA_FISICA'], record['TABELLA_LOGICA'].upper(),
+                      record['TABELLA_FISICA'][:4], record['TABELLA_LOGICA'][:6], 'md', 'M'):
+            self.assert_same(query)
+
+    def test_contains_and_whitespace(self):
+        record = self.records[40]
+        for query in (record['TABELLA_LOGICA'][3:9], ' ' + record['TABELLA_FISICA'][2:7] + ' ',
+                      'cliente', 'Fase 1', 'e'):
+            self.assert_same(query)
+
+    def test_fuzzy(self):
+        record = self.records[123]
+        logico = record['TABELLA_LOGICA']
+        for query in (logico[:-2] + 'xx', logico[1:], logico[:3] + logico[4:], 'artcolo', 'fornitre'):
+            self.assert_same(query)
+            self.assert_same(query, max_results=50, min_score=20)
+
+    def test_no_results(self):
+        for query in ('', '   ', 'zzzzqqqq'):
+            self.assert_same(query)
+
+
+def edit_distance(a, b):
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+class FieldIndexParityTest(unittest.TestCase):
+    """find_fields restituisce gli stessi campi di una scansione di tutte le righe."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.store = DictionaryStore()
+        for row in iter_rows(5400):
+            cls.store.add_db_row(row)
+        update_mappings(cls.store)
+        # nome campo (logico o fisico, minuscolo) → postings
+        cls.postings = {}
+        for record in cls.store.to_records():
+            posting = (record['TABELLA_FISICA'], '$' + record['TABELLA_LOGICA'],
+                       record['CAMPO_LOGICO'], record['CAMPO_FISICO'])
+            for key in (record['CAMPO_LOGICO'].lower(), record['CAMPO_FISICO'].lower()):
+                cls.postings.setdefault(key, set()).add(posting)
+
+    def scan(self, name, mode, limit=50, max_distance=None):
+        name = name.lower()
+        if mode == 'exact':
+            found = [(name, 0)] if name in self.postings else []
+        elif mode == 'prefix':
+            found = sorted(((key, len(key) - len(name)) for key in self.postings if key.startswith(name)),
+                           key=lambda item: (item[1], item[0]))
+        else:
+            if max_distance is None:
+                max_distance = max(1, len(name) // 4)
+            found = sorted(((key, edit_distance(name, key)) for key in self.postings),
+                           key=lambda item: (item[1], item[0]))
+            found = [item for item in found if item[1] <= max_distance]
+        return [(key, distance, self.postings[key]) for key, distance in found[:limit]]
+
+    def assert_same(self, name, mode, limit=50, max_distance=None):
+        result = [
+            (entry['field'], entry['distance'],
+             {(p['TABELLA_FISICA'], p['TABELLA_LOGICA'], p['CAMPO_LOGICO'], p['CAMPO_FISICO'])
+              for p in entry['postings']})
+            for entry in find_fields(name, mode, limit, max_distance)
+        ]
+        self.assertEqual(result, self.scan(name, mode, limit, max_distance), (name, mode))
+
+    def test_exact(self):
+        for name in ('Codice0', 'md_data_2', 'CODICE0', 'assente'):
+            self.assert_same(name, 'exact')
+
+    def test_prefix(self):
+        for name in ('cod', 'Descrizione1', 'md_', 'x'):
+            self.assert_same(name, 'prefix')
+        self.assert_same('d', 'prefix', limit=5)
+
+    def test_fuzzy(self):
+        for name in ('codce0', 'Descrizone12', 'md_dta_2'):
+            self.assert_same(name, 'fuzzy')
+        self.assert_same('importo', 'fuzzy', max_distance=3)
+
+
+if __name__ == '__main__':
+    unittest.main()
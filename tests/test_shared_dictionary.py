@@ -0,0 +1,96 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'tools'))
+
+from dictionary_store import DictionaryStore  # noqa: E402
+from fake_dictionary import iter_rows  # noqa: E402
+from shared_dictionary import SharedDictionary, SharedDictionaryStore, encode_store  # noqa: E402
+
+
+def make_store(count=1800):
+    store = DictionaryStore()
+    for row in iter_rows(count):
+        store.add_db_row(row)
+    store.add_db_row(('MD_MISTI', 'md_è', 'Misti', 'Perciò€', 'N', 1.5, None))
+    return store
+
+
+class SharedSegmentTest(unittest.TestCase):
+
+    def test_encode_and_attach_round_trip(self):
+        store = make_store()
+        meta = {'indexes': [{'INDEX_NAME': 'IX_1'}], 'connection_key': 'h:1521/s'}
+        shared = SharedDictionaryStore(encode_store(store, meta))
+        self.assertEqual(shared.meta, meta)
+        self.assertEqual(len(shared), len(store))
+        self.assertEqual(shared.to_records(), store.to_records())
+        self.assertEqual(list(shared.iter_values('CAMPO_LOGICO', 'AMPIEZZA', start=10, end=40)),
+                         list(store.iter_values('CAMPO_LOGICO', 'AMPIEZZA', start=10, end=40)))
+        self.assertEqual(shared.rows_where('TABELLA_FISICA', 'MD_MISTI'), [len(store) - 1])
+        self.assertEqual(shared.row(len(store) - 1)['AMPIEZZA'], 1.5)
+
+    def test_read_only(self):
+        shared = SharedDictionaryStore(encode_store(make_store(36), {}))
+        with self.assertRaises(TypeError):
+            shared.append(('T', 'f', 'D', 'F', 'C', 1, 0))
+
+    def test_invalid_segment(self):
+        with self.assertRaises(ValueError):
+            SharedDictionaryStore(b'XXXX' + bytes(64))
+
+
+class SharedDictionaryTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.directory = self._tmp.name
+
+    def test_publish_and_attach(self):
+        store = make_store()
+        writer = SharedDictionary(self.directory, keep_versions=2)
+        reader = SharedDictionary(self.directory)
+        self.assertEqual(reader.attach(), (None, None))
+
+        versions = [writer.publish(store, {'n': index}) for index in range(3)]
+        attached, version = reader.attach()
+        self.assertEqual(version, versions[-1])
+        self.assertEqual(reader.current_version(), versions[-1])
+        self.assertIsNone(reader.version)
+        self.assertEqual(attached.meta, {'n': 2, 'version': versions[-1]})
+        self.assertEqual(attached.to_records(), store.to_records())
+        files = [name for name in os.listdir(self.directory) if name.endswith('.bin')]
+        self.assertEqual(len(files), 2)
+
+    def test_watch_retries_until_activated(self):
+        writer = SharedDictionary(self.directory)
+        reader = SharedDictionary(self.directory)
+        version = writer.publish(make_store(36), {})
+        calls = []
+        activated = threading.Event()
+
+        def on_version(store):
+            calls.append(len(store))
+            if len(calls) < 3:
+                raise RuntimeError('attivazione fallita')
+            activated.set()
+
+        reader.watch(on_version, interval=0.01)
+        self.assertTrue(activated.wait(5))
+        deadline = time.time() + 5
+        while reader.version != version and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(reader.version, version)
+        time.sleep(0.05)
+        self.assertEqual(calls, [37, 37, 37])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'tools'))
+
+from dictionary_store import DictionaryStore  # noqa: E402
+from fake_dictionary import iter_rows  # noqa: E402
+from tecsql_translator import translate_sql_to_tecsql, translate_tecsql, update_mappings  # noqa: E402
+from translation_guard import QueryLimits, TranslationLimit, TranslatorPool  # noqa: E402
+
+# Traduzione SQL → TecSQL di qualche secondo (ben oltre il timeout del pool di test)
+SLOW_SQL = 'SELECT * FROM MD_PART0000 WHERE ' + ' OR '.join(f'md_codice_0 = {i}' for i in range(20000))
+
+
+class QueryLimitsTest(unittest.TestCase):
+
+    def assert_rejected(self, limits, query, status, limit):
+        with self.assertRaises(TranslationLimit) as raised:
+            limits.check(query)
+        self.assertEqual((raised.exception.status, raised.exception.limit), (status, limit))
+
+    def test_chars(self):
+        limits = QueryLimits(max_chars=20)
+        limits.check('x' * 20)
+        self.assert_rejected(limits, 'x' * 21, 413, 'chars')
+
+    def test_tokens(self):
+        limits = QueryLimits(max_tokens=6)
+        limits.check("SELECT a, 'b c d e' FROM t")
+        self.assert_rejected(limits, 'SELECT a, b, c FROM t', 422, 'tokens')
+
+    def test_depth(self):
+        limits = QueryLimits(max_depth=3)
+        limits.check("SELECT ((( 1 ))) + ')))(((((' FROM t")
+        self.assert_rejected(limits, 'SELECT (((( 1 ))))', 422, 'depth')
+
+    def test_zero_disables(self):
+        QueryLimits(max_chars=0, max_tokens=0, max_depth=0).check('(' * 1000 + 'x ' * 50000)
+
+
+class TranslatorPoolTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.store = DictionaryStore()
+        for row in iter_rows(360):
+            cls.store.add_db_row(row)
+        update_mappings(cls.store)
+        cls.pool = TranslatorPool(processes=1, timeout=0.3, queue_wait=10)
+        cls.pool.prepare(cls.store)
+
+    def test_translates_like_the_server(self):
+        tecsql = 'SELECT $PartnerCliente0.Codice0 FROM $PartnerCliente0 WHERE $PartnerCliente0.Data2 > 1'
+        self.assertEqual(self.pool.translate('tecsql', tecsql, False, False), translate_tecsql(tecsql))
+        sql = 'SELECT md_codice_0 FROM MD_PART0000'
+        self.assertEqual(self.pool.translate('sql', sql, None, None, False), translate_sql_to_tecsql(sql))
+
+    def test_timeout_replaces_the_worker(self):
+        timeouts, restarts = self.pool.timeouts, self.pool.restarts
+        with self.assertRaises(TranslationLimit) as raised:
+            self.pool.translate('sql', SLOW_SQL, None, None, False)
+        self.assertEqual((raised.exception.status, raised.exception.limit), (422, 'time'))
+        self.assertEqual((self.pool.timeouts, self.pool.restarts), (timeouts + 1, restarts + 1))
+        # Il worker sostituito copia il dizionario e torna disponibile
+        self.assertTrue(self.pool.translate('sql', 'SELECT * FROM MD_PART0000', None, None, False)['success'])
+
+    def test_busy_when_no_worker_is_free(self):
+        pool = TranslatorPool(processes=1, timeout=0.3, queue_wait=10)
+        pool.prepare(self.store)
+        pool.translate('sql', 'SELECT * FROM MD_PART0000', None, None, False)  # worker pronto
+        pool.queue_wait = 0.05
+        slow = threading.Thread(target=lambda: self.assertRaises(
+            TranslationLimit, pool.translate, 'sql', SLOW_SQL, None, None, False))
+        slow.start()
+        try:
+            time.sleep(0.1)  # il thread ha preso l'unico worker, occupato per 0.3 s
+            with self.assertRaises(TranslationLimit) as raised:
+                pool.translate('tecsql', 'SELECT * FROM $PartnerCliente0', False, False)
+            self.assertEqual((raised.exception.status, raised.exception.limit), (503, 'busy'))
+        finally:
+            slow.join()
+
+    def test_from_env(self):
+        with mock.patch.dict(os.environ, {'JCTNT_THREADS': '2'}):
+            os.environ.pop('JCTNT_TRANSLATE_TIMEOUT', None)
+            self.assertEqual(TranslatorPool.from_env().timeout, 10)
+            os.environ['JCTNT_TRANSLATE_TIMEOUT'] = '0'
+            self.assertIsNone(TranslatorPool.from_env())
+
+    def test_rows_added_after_prepare(self):
+        self.store.add_db_row(('MD_AGGIUNTA', 'md_codice', 'Aggiunta', 'Codice', 'C', 10, 0))
+        self.assertEqual(self.pool.translate('tecsql', 'SELECT $Aggiunta.Codice FROM $Aggiunta', False, False),
+                         'SELECT MD_AGGIUNTA.md_codice FROM MD_AGGIUNTA')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import random
+import sys
+import unittest
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'tools'))
+
+import tecsql_translator  # noqa: E402
+from dictionary_store import DictionaryStore  # noqa: E402
+from fake_dictionary import iter_rows  # noqa: E402
+from tecsql_translator import autocomplete, find_fields, translate_tecsql, update_mappings  # noqa: E402
+
+
+def snapshot():
+    """Stato pubblicato delle mappe del traduttore."""
+    t = tecsql_translator
+    return {
+        'TABLE_MAP': t.TABLE_MAP,
+        'FIELD_MAP': t.FIELD_MAP,
+        'PHYSICAL_TABLE_MAP': {key: sorted(value) for key, value in t.PHYSICAL_TABLE_MAP.items()},
+        'REVERSE_FIELD_MAP': t.REVERSE_FIELD_MAP,
+        'TABLE_ORIGINAL_CASE': t.TABLE_ORIGINAL_CASE,
+        'FIELD_ORIGINAL_CASE': t.FIELD_ORIGINAL_CASE,
+        # prefix(''): tutte le chiavi dell'indice dei prefissi, in ordine
+        'FIELD_INDEX': [(key, sorted(t.FIELD_INDEX.postings(key))) for key, _ in t.FIELD_INDEX.prefix('')],
+    }
+
+
+class IncrementalMappingsTest(unittest.TestCase):
+    """Le righe aggiunte in modalita' lazy producono le stesse mappe di un caricamento completo."""
+
+    def test_incremental_matches_full_rebuild(self):
+        rows_by_descriptor = {}
+        for row in iter_rows(3600):
+            rows_by_descriptor.setdefault(row[2], []).append(row)
+        names = sorted(rows_by_descriptor)
+        random.Random(7).shuffle(names)
+
+        # Come load_tables: una riga segnaposto per descrittore, poi i campi a blocchi
+        store = DictionaryStore()
+        for name in names:
+            store.add_db_row((rows_by_descriptor[name][0][0], '', name, '', '', None, None))
+        update_mappings(store)
+        for batch in range(0, len(names), 7):
+            start = len(store)
+            for name in names[batch:batch + 7]:
+                for row in rows_by_descriptor[name]:
+                    store.add_db_row(row)
+            previous_map = tecsql_translator.FIELD_MAP
+            update_mappings(store, start, len(store))
+            self.assertIs(tecsql_translator.FIELD_MAP, previous_map)
+
+        incremental = snapshot()
+        queries = [f'SELECT ${name}.Codice0 FROM ${name}' for name in names[:20]]
+        translations = [translate_tecsql(query) for query in queries]
+        completions = autocomplete(f'SELECT ${names[0][:5]}')['completions']
+        fuzzy = find_fields('codce1', 'fuzzy')
+
+        update_mappings(store)
+        self.assertEqual(snapshot(), incremental)
+        self.assertEqual([translate_tecsql(query) for query in queries], translations)
+        self.assertEqual(autocomplete(f'SELECT ${names[0][:5]}')['completions'], completions)
+        self.assertEqual(find_fields('codce1', 'fuzzy'), fuzzy)
+
+
+if __name__ == '__main__':
+    unittest.main()
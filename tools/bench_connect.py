@@ -0,0 +1,197 @@
+"""
+Benchmark del percorso completo di /api/connect con una sorgente del
+dizionario simulata (fake_oracle.SimulatedSource, nessun Oracle): tempo e
+picco di memoria per fase, a 36k / 360k / 1M campi.
+
+Fasi (le stesse dei load job):
+    connect        apertura della connessione
+    fields         FW_TABLE_FIELDS: fetch (attesa della sorgente: latenza
+                   simulata e righe) + shaping (DictionaryStore.add_db_row)
+    indexes, index_columns
+    mappings       update_mappings (mappe del traduttore)
+    search_index   TableSearchIndex + IndexCatalog
+    digest         impronte del dizionario e versione per il browser
+    cache          cache del dizionario, storico connessioni
+    serialize      body della risposta (righe come record) e JSON
+
+I tempi vengono da un'esecuzione senza tracemalloc (che rallenta ogni
+allocazione), la memoria da una seconda con tracemalloc: per ogni fase il
+picco oltre la memoria gia' allocata al suo inizio. Il pool dei worker di
+traduzione e' disattivato (JCTNT_TRANSLATE_TIMEOUT=0 se non impostato,
+invece del default 10): la copia delle mappe nei worker gira in background
+e falserebbe le fasi.
+
+Uso:
+    python tools/bench_connect.py                          # 36k, 360k, 1M
+    python tools/bench_connect.py --rows 36000 --fetch-latency 0.05
+    python tools/bench_connect.py --rows 360000 --no-memory
+"""
+import argparse
+import atexit
+import contextlib
+import gc
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.join(TOOLS_DIR, '..')
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, TOOLS_DIR)
+
+DEFAULT_ROWS = (36000, 360000, 1000000)
+PHASES = ('connect', 'fields', 'indexes', 'index_columns', 'mappings', 'search_index', 'digest', 'cache',
+          'serialize')
+MB = 1024 * 1024
+
+
+class PhaseRecorder:
+    """progress() per fetch_dictionary / store_dictionary: durata, attesa della sorgente e picco per fase."""
+
+    def __init__(self, memory):
+        self.memory = memory
+        self.phases = {}
+        self.phase = None
+        self.started = 0.0
+        self.base = 0
+        self.source_ms = 0.0
+
+    def __call__(self, phase, **detail):
+        if phase != self.phase:
+            self._close()
+            self.phase = phase
+            self.started = time.perf_counter()
+            if self.memory:
+                self.base = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+
+    def _close(self):
+        if self.phase is None:
+            return
+        entry = self.phases.setdefault(self.phase, {'ms': 0.0, 'source_ms': 0.0, 'peak': 0})
+        entry['ms'] += (time.perf_counter() - self.started) * 1000
+        entry['source_ms'] += self.source_ms
+        self.source_ms = 0.0
+        if self.memory:
+            entry['peak'] = max(entry['peak'], tracemalloc.get_traced_memory()[1] - self.base)
+
+    def finish(self):
+        self._close()
+        self.phase = None
+
+
+class TimedSource:
+    """Sorgente che conta nel recorder il tempo passato ad attendere i batch."""
+
+    def __init__(self, source, recorder):
+        self.source = source
+        self.recorder = recorder
+
+    def describe(self):
+        return self.source.describe()
+
+    def connect(self):
+        return self.source.connect()
+
+    def fetch(self, conn, sql):
+        batches = self.source.fetch(conn, sql)
+        while True:
+            started = time.perf_counter()
+            batch = next(batches, None)
+            self.recorder.source_ms += (time.perf_counter() - started) * 1000
+            if batch is None:
+                return
+            yield batch
+
+    def close(self, conn):
+        self.source.close(conn)
+
+
+def _reset(jctnt):
+    """Scarta il dizionario del giro precedente (niente memoria residua fra le misure)."""
+    from dictionary_store import DictionaryStore
+    jctnt.update_mappings(DictionaryStore())
+    for key in jctnt.dictionary_cache:
+        jctnt.dictionary_cache[key] = None
+    jctnt.dictionary_digests.clear()
+    gc.collect()
+
+
+def run_connect(jctnt, rows, options, memory):
+    """Un /api/connect completo (senza cache) su `rows` campi simulati. Ritorna (fasi, ms, byte JSON)."""
+    import fake_oracle
+    _reset(jctnt)
+    recorder = PhaseRecorder(memory)
+    source = TimedSource(fake_oracle.SimulatedSource(rows, options.latency, options.fetch_latency,
+                                                     options.batch_size), recorder)
+    conn_data, connection_key = jctnt.parse_connect_request(
+        {'host': 'simulated', 'port': '1521', 'sid': 'BENCH', 'username': f'bench{rows}', 'password': 'x'})
+
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        store, indexes, index_columns = jctnt.fetch_dictionary(conn_data, progress=recorder, source=source)
+        body = jctnt.store_dictionary(conn_data, connection_key, store, indexes, index_columns,
+                                      progress=recorder)
+        with jctnt.app.app_context():
+            size = len(jctnt.jsonify(body).get_data())
+        del body
+        recorder.finish()
+    finally:
+        if memory:
+            tracemalloc.stop()
+    return recorder.phases, (time.perf_counter() - started) * 1000, size
+
+
+def report(rows, timed, total_ms, size, measured):
+    print(f'\n--- {rows:,} campi: {total_ms / 1000:.2f} s, risposta {size / MB:.1f} MB ---')
+    print(f'{"fase":<14} {"ms":>10} {"fetch ms":>10} {"shaping ms":>11} {"picco MB":>9}')
+    for phase in PHASES:
+        if phase not in timed:
+            continue
+        entry = timed[phase]
+        fetch_ms = entry['source_ms']
+        shaping = f'{entry["ms"] - fetch_ms:>11.1f}' if fetch_ms else f'{"":>11}'
+        fetch = f'{fetch_ms:>10.1f}' if fetch_ms else f'{"":>10}'
+        peak = f'{measured[phase]["peak"] / MB:>9.1f}' if measured and phase in measured else f'{"-":>9}'
+        print(f'{phase:<14} {entry["ms"]:>10.1f} {fetch} {shaping} {peak}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, action='append', help='campi del dizionario (ripetibile)')
+    parser.add_argument('--latency', type=float, default=0.0, help='secondi per connect ed execute')
+    parser.add_argument('--fetch-latency', type=float, default=0.0, help='secondi per round trip di fetch')
+    parser.add_argument('--batch-size', type=int, default=None, help='righe per fetch (default FETCH_BATCH)')
+    parser.add_argument('--no-memory', action='store_true', help='solo tempi (niente giro con tracemalloc)')
+    options = parser.parse_args()
+
+    # Data/ (connessione, storici) in una directory temporanea, rimossa dopo il flush degli storici
+    workdir = tempfile.mkdtemp(prefix='jctnt-bench-')
+    atexit.register(shutil.rmtree, workdir, True)
+    os.chdir(workdir)
+    os.environ.setdefault('JCTNT_TRANSLATE_TIMEOUT', '0')
+
+    import app as jctnt
+    from dictionary_source import FETCH_BATCH
+    options.batch_size = options.batch_size or FETCH_BATCH
+
+    print(f'Latenza {options.latency:g} s, fetch {options.fetch_latency:g} s per {options.batch_size} righe')
+    for rows in options.rows or DEFAULT_ROWS:
+        # Log [INFO] dell'app soppressi: solo la tabella delle fasi
+        with contextlib.redirect_stdout(io.StringIO()):
+            timed, total_ms, size = run_connect(jctnt, rows, options, memory=False)
+            measured = None
+            if not options.no_memory:
+                measured = run_connect(jctnt, rows, options, memory=True)[0]
+        report(rows, timed, total_ms, size, measured)
+    _reset(jctnt)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Confronto memoria: vecchio layout (lista di dict da 7 chiavi) vs DictionaryStore
+colonnare, con e senza le mappe del traduttore. In piu' la memoria che l'app
+trattiene dopo /api/connect (Oracle simulato) e una seconda /api/connect
+servita dalla cache: store, mappe, indici di ricerca, impronte e JSON della
+risposta in cache.
+
+Uso:
+    python tools/bench_dictionary_memory.py            # 36k e 360k righe
+    python tools/bench_dictionary_memory.py 100000
+"""
+import atexit
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import tecsql_translator  # noqa: E402
+from dictionary_store import COLUMNS, DictionaryStore  # noqa: E402
+from fake_dictionary import iter_rows  # noqa: E402
+
+
+def _measure(build):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+
+def _legacy_rows(count):
+    return [dict(zip(COLUMNS, row)) for row in iter_rows(count)]
+
+
+def _store_rows(count):
+    store = DictionaryStore()
+    for row in iter_rows(count):
+        store.add_db_row(row)
+    return store
+
+
+def _with_mappings(build):
+    def run():
+        rows = build()
+        tecsql_translator.update_mappings(rows)
+        return rows
+    return run
+
+
+def _app():
+    """Modulo app in una directory temporanea (Data/ fuori dal repository), pool dei worker spento."""
+    workdir = tempfile.mkdtemp(prefix='jctnt-memory-')
+    atexit.register(shutil.rmtree, workdir, True)
+    os.chdir(workdir)
+    os.environ.setdefault('JCTNT_TRANSLATE_TIMEOUT', '0')
+    import app
+    return app
+
+
+def run_connect(count):
+    """Memoria trattenuta dall'app dopo una /api/connect completa e una dalla cache."""
+    import fake_oracle
+    jctnt = _app()
+    fake_oracle.install(rows=count)
+    client = jctnt.app.test_client()
+    request = {'host': 'simulated', 'port': 1521, 'sid': 'MEM', 'username': f'mem{count}', 'password': 'x'}
+    gc.collect()
+    tracemalloc.start()
+    client.post('/api/connect', json=request)
+    cached = client.post('/api/connect', json=request)
+    size = len(cached.get_data())
+    del cached
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    response = jctnt.dictionary_cache['response']
+    cached_json = len(response[2]) if response else 0
+    print(f'  {"app dopo connect":<20} {current / 1024 / 1024:8.1f} MB  '
+          f'(JSON in cache {cached_json / 1024 / 1024:.1f} MB, risposta {size / 1024 / 1024:.1f} MB)')
+    jctnt.activate_dictionary(DictionaryStore(), [], [], None)
+    jctnt.dictionary_cache['data'] = None
+    gc.collect()
+
+
+def run(count):
+    print(f'--- {count:,} righe ---')
+    results = {}
+    for label, build in (
+        ('legacy dati', lambda: _legacy_rows(count)),
+        ('store dati', lambda: _store_rows(count)),
+        ('legacy dati+mappe', _with_mappings(lambda: _legacy_rows(count))),
+        ('store dati+mappe', _with_mappings(lambda: _store_rows(count))),
+    ):
+        rows, current, elapsed = _measure(build)
+        results[label] = current
+        print(f'  {label:<20} {current / 1024 / 1024:8.1f} MB  {elapsed:6.2f} s')
+        del rows
+        tecsql_translator.update_mappings([])
+
+    for kind in ('dati', 'dati+mappe'):
+        legacy = results[f'legacy {kind}']
+        store = results[f'store {kind}']
+        print(f'  riduzione {kind:<11} {100 * (1 - store / legacy):5.1f} %')
+    run_connect(count)
+
+
+if __name__ == '__main__':
+    counts = [int(arg) for arg in sys.argv[1:]] or [36_000, 360_000]
+    for count in counts:
+        run(count)
@@ -0,0 +1,176 @@
+"""
+Benchmark modalita' di servizio: waitress (thread) vs async_server.
+
+Con un Oracle finto (tools/fake_oracle.py) lancia N caricamenti del
+dizionario contemporanei (username diversi → niente cache) mentre alcuni
+client chiamano /api/translate-query in loop, e misura la latenza delle
+traduzioni durante i caricamenti.
+
+Uso:
+    python tools/bench_serving.py                      # entrambe le modalita'
+    python tools/bench_serving.py --mode async --loads 6 --fetch-time 8
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.join(TOOLS_DIR, '..')
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, TOOLS_DIR)
+
+PREFIX = '/JCTNT'
+
+
+def _serve(options):
+    """Processo server (invocato dal benchmark stesso con --serve)."""
+    import fake_oracle
+    fake_oracle.install(options.rows, options.latency, options.fetch_time)
+    if options.serve == 'waitress':
+        from waitress import serve
+        import app
+        serve(app.app, host='127.0.0.1', port=options.port, threads=options.threads)
+    else:
+        from aiohttp import web
+        import async_server
+        server = async_server.AsyncServer(options.load_concurrency, options.translate_workers, options.threads)
+        web.run_app(server.make_app(), host='127.0.0.1', port=options.port, print=None)
+
+
+def _request(port, method, path, body=None, timeout=300):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    try:
+        payload = json.dumps(body) if body is not None else None
+        conn.request(method, PREFIX + path, body=payload, headers={'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        data = response.read()
+        return response.status, data
+    finally:
+        conn.close()
+
+
+def _wait_ready(port, deadline=60):
+    started = time.time()
+    while time.time() - started < deadline:
+        try:
+            _request(port, 'GET', '/api/connection-data', timeout=2)
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('server non avviato')
+
+
+def _connect_body(username):
+    return {'host': 'fake', 'port': '1521', 'sid': 'BENCH', 'username': username, 'password': 'x'}
+
+
+def _translate_query(rows):
+    from fake_dictionary import iter_rows
+    physical, _, logical, field = next(iter_rows(rows))[:4]
+    return f'SELECT ${logical}.{field} FROM ${logical} WHERE ${logical}.{field} = 1'
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run_mode(mode, options):
+    port = options.port
+    command = [
+        sys.executable, os.path.abspath(__file__), '--serve', mode, '--port', str(port),
+        '--rows', str(options.rows), '--latency', str(options.latency),
+        '--fetch-time', str(options.fetch_time), '--threads', str(options.threads),
+        '--load-concurrency', str(options.load_concurrency),
+        '--translate-workers', str(options.translate_workers),
+    ]
+    with tempfile.TemporaryDirectory() as workdir:
+        server = subprocess.Popen(command, cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            _wait_ready(port)
+            # Primo caricamento: il traduttore ha bisogno del dizionario
+            _request(port, 'POST', '/api/connect', _connect_body('warmup'))
+            query = {'query': _translate_query(options.rows)}
+
+            latencies = []
+            errors = []
+            load_times = []
+            stop = threading.Event()
+
+            def translator():
+                while not stop.is_set():
+                    started = time.perf_counter()
+                    try:
+                        status, data = _request(port, 'POST', '/api/translate-query', query, timeout=120)
+                    except OSError as exc:
+                        errors.append(str(exc))
+                        continue
+                    latencies.append(time.perf_counter() - started)
+                    if status != 200:
+                        errors.append(data[:200])
+
+            def loader(index):
+                started = time.perf_counter()
+                _request(port, 'POST', '/api/connect', _connect_body(f'user{index}'))
+                load_times.append(time.perf_counter() - started)
+
+            clients = [threading.Thread(target=translator) for _ in range(options.clients)]
+            loaders = [threading.Thread(target=loader, args=(i,)) for i in range(options.loads)]
+            bench_started = time.perf_counter()
+            for thread in loaders + clients:
+                thread.start()
+            for thread in loaders:
+                thread.join()
+            stop.set()
+            for thread in clients:
+                thread.join()
+            elapsed = time.perf_counter() - bench_started
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f'--- {mode} ---')
+    print(f'  caricamenti: {options.loads} in {max(load_times or [0]):.1f} s '
+          f'(medio {sum(load_times) / max(len(load_times), 1):.1f} s)')
+    print(f'  traduzioni durante i caricamenti: {len(latencies)} '
+          f'({len(latencies) / elapsed:.1f}/s), errori {len(errors)}')
+    for error in sorted(set(map(str, errors)))[:3]:
+        print(f'    errore: {error}')
+    print(f'  latenza ms  p50 {_percentile(latencies, 50) * 1000:8.1f}  '
+          f'p95 {_percentile(latencies, 95) * 1000:8.1f}  '
+          f'p99 {_percentile(latencies, 99) * 1000:8.1f}  '
+          f'max {max(latencies or [0]) * 1000:8.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=('waitress', 'async', 'both'), default='both')
+    parser.add_argument('--port', type=int, default=5077)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--latency', type=float, default=0.05, help='round trip Oracle finto (s)')
+    parser.add_argument('--fetch-time', type=float, default=6.0, help='durata fetch FW_TABLE_FIELDS (s)')
+    parser.add_argument('--loads', type=int, default=4, help='caricamenti contemporanei')
+    parser.add_argument('--clients', type=int, default=4, help='client di traduzione')
+    parser.add_argument('--threads', type=int, default=4, help='thread waitress / executor WSGI async')
+    parser.add_argument('--load-concurrency', type=int, default=2)
+    parser.add_argument('--translate-workers', type=int, default=4)
+    parser.add_argument('--serve', choices=('waitress', 'async'), help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.serve:
+        _serve(options)
+        return
+    for mode in (('waitress', 'async') if options.mode == 'both' else (options.mode,)):
+        run_mode(mode, options)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Build degli asset statici: copie con hash del contenuto in static/dist/,
+varianti .gz e .br (se brotli e' installato) e manifest.json.
+
+L'app lo fa gia' all'avvio se i sorgenti sono cambiati; questo script serve
+al deploy (build anticipata, --prune per eliminare le copie delle build
+precedenti, utile dopo che i client hanno ricaricato la pagina).
+
+Uso:
+    python tools/build_assets.py [--prune]
+"""
+import argparse
+import os
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, ROOT_DIR)
+
+import static_assets  # noqa: E402
+
+
+def _size(path):
+    return os.path.getsize(path) if os.path.exists(path) else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--static', default=os.path.join(ROOT_DIR, 'static'), help='cartella static')
+    parser.add_argument('--prune', action='store_true', help='elimina le copie non piu\' nel manifest')
+    options = parser.parse_args()
+
+    assets = static_assets.StaticAssets(options.static)
+    manifest = assets.build(prune=options.prune)
+    if static_assets.brotli is None:
+        print('[WARN] Modulo brotli non installato: solo varianti .gz (pip install brotli)')
+    print(f'{"asset":<28} {"file":<40} {"byte":>9} {"gzip":>8} {"br":>8}')
+    for source, target in sorted(manifest.items()):
+        path = os.path.join(assets.dist_folder, target)
+        sizes = [_size(path), _size(path + '.gz'), _size(path + '.br')]
+        print(f'{source:<28} {target:<40} ' + ' '.join(
+            f'{"-" if size is None else size:>{width}}' for size, width in zip(sizes, (9, 8, 8))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Generatore di un dizionario FW_TABLES sintetico per benchmark locali
+(nessun Oracle necessario).
+
+Le righe hanno la stessa forma di quelle lette da api_connect; ogni stringa
+viene creata ex novo per riga, come fa il driver oracledb, cosi' le misure
+di memoria sono confrontabili con il caso reale.
+"""
+import random
+
+FIELD_TYPES = ('C', 'N', 'D', 'M', 'B')
+PREFIXES = ('MD', 'GD', 'SI', 'FW', 'CO', 'MG', 'PR', 'VE')
+WORDS = (
+    'Articolo', 'Documento', 'Riga', 'Cliente', 'Fornitore', 'Ordine', 'Magazzino',
+    'Lotto', 'Listino', 'Prezzo', 'Causale', 'Deposito', 'Commessa', 'Fase',
+    'Ciclo', 'Distinta', 'Risorsa', 'Centro', 'Lavoro', 'Business', 'Partner',
+)
+FIELD_WORDS = (
+    'codice', 'descrizione', 'data', 'quantita', 'importo', 'stato', 'tipo',
+    'numero', 'anno', 'utente', 'note', 'valore', 'sconto', 'unita', 'misura',
+)
+
+ROWS_PER_DESCRIPTOR = 18
+
+
+def _fresh(text):
+    # Copia della stringa (nuovo oggetto, non condiviso con l'originale)
+    return (text + ' ')[:-1]
+
+
+def _descriptor(rng, index):
+    words = rng.sample(WORDS, 2)
+    physical = f'{rng.choice(PREFIXES)}_{words[0][:4].upper()}{index:04d}'
+    logical = f'{words[0]}{words[1]}{index}'
+    return physical, logical
+
+
+def generate_rows(count, seed=42):
+    """
+    Ritorna una lista di tuple (ordine COLUMNS di dictionary_store) con `count`
+    righe. Circa un descrittore su dieci condivide la tabella fisica con il
+    precedente (come MD_ARTI → Articolo / ArticoloConfiguratore).
+    """
+    return list(iter_rows(count, seed))
+
+
+def iter_rows(count, seed=42):
+    rng = random.Random(seed)
+    descriptor_count = max(1, count // ROWS_PER_DESCRIPTOR)
+    descriptors = []
+    for index in range(descriptor_count):
+        physical, logical = _descriptor(rng, index)
+        if descriptors and rng.random() < 0.1:
+            physical = descriptors[-1][0]
+        descriptors.append((physical, logical))
+
+    for row_index in range(count):
+        physical, logical = descriptors[row_index % descriptor_count]
+        field_no = row_index // descriptor_count
+        word = FIELD_WORDS[field_no % len(FIELD_WORDS)]
+        # Stringhe nuove per ogni riga, come le restituisce il cursore
+        yield (
+            _fresh(physical),
+            f'{physical[:2].lower()}_{word}_{field_no}',
+            _fresh(logical),
+            f'{word.capitalize()}{field_no}',
+            FIELD_TYPES[field_no % len(FIELD_TYPES)],
+            10 + field_no % 40,
+            field_no % 3,
+        )
+
+
+def generate_records(count, seed=42):
+    """Stesse righe nel vecchio formato lista di dict."""
+    from dictionary_store import COLUMNS
+    return [dict(zip(COLUMNS, row)) for row in iter_rows(count, seed)]
@@ -0,0 +1,260 @@
+"""
+Oracle finto per benchmark locali: sostituisce oracledb.connect /
+oracledb.connect_async con connessioni che restituiscono il dizionario
+sintetico di fake_dictionary, con latenze configurabili.
+
+Uso:
+    python tools/fake_oracle.py [--rows N] [--latency S] [--fetch-time S] -- app.py [args]
+    python tools/fake_oracle.py --rows 36000 -- async_server.py --port 5001
+    python tools/fake_oracle.py --snapshot Data/snapshots/prod.json -- app.py
+
+Con --snapshot le righe di FW_TABLE_FIELDS sono quelle di uno snapshot del
+dizionario reale (POST /api/schema-snapshot) invece di quelle sintetiche.
+
+oppure da codice: `import fake_oracle; fake_oracle.install(rows=36000)`.
+
+SimulatedSource e' invece una sorgente del dizionario (dictionary_source.py)
+che non passa da oracledb: la usa tools/bench_connect.py.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import runpy
+import sys
+import threading
+import time
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import oracledb  # noqa: E402
+from dictionary_source import FETCH_BATCH  # noqa: E402
+from fake_dictionary import iter_rows  # noqa: E402
+
+BATCH_SIZE = 1000
+
+
+def _dictionary_rows(count):
+    if _Settings.snapshot_rows is not None:
+        return iter(_Settings.snapshot_rows)
+    return iter_rows(count)
+
+
+def load_snapshot_rows(path):
+    """Righe FW_TABLES/FW_TABLE_FIELDS (ordine COLUMNS) da uno snapshot di schema_digest."""
+    with open(path, 'r', encoding='utf-8') as f:
+        snapshot = json.load(f)
+    return [
+        (entry['table'], field[1], descriptor, field[0], *field[2:])
+        for descriptor, entry in snapshot['descriptors'].items()
+        for field in entry['fields']
+    ]
+
+
+def _result_rows(query, count, params=None):
+    text = query.upper()
+    if 'FW_TABLE_FIELDS' in text and 'COUNT(' in text:
+        # Solo i nomi (lazy_dictionary.QUERY_TABLES)
+        counts = {}
+        for row in _dictionary_rows(count):
+            counts[(row[0], row[2])] = counts.get((row[0], row[2]), 0) + 1
+        return [(physical, logical, n) for (physical, logical), n in counts.items()]
+    if 'FW_TABLE_FIELDS' in text:
+        if params:
+            wanted = set(params.values())
+            return [row for row in _dictionary_rows(count) if row[2] in wanted]
+        return list(_dictionary_rows(count))
+    if 'ALL_IND_COLUMNS' in text:
+        return [('OWN', r[0], 'OWN', r[0] + '_PK', r[1], 1) for r in _dictionary_rows(count) if r[1].endswith('_0')]
+    if 'ALL_INDEXES' in text:
+        return sorted({('OWN', r[0], r[0] + '_PK', 'UNIQUE', 'OWN') for r in _dictionary_rows(count)})
+    return []
+
+
+class _Settings:
+    rows = 36000
+    latency = 0.0      # secondi per connect ed execute (round trip)
+    fetch_time = 0.0   # secondi totali per trasferire le righe di FW_TABLE_FIELDS
+    snapshot_rows = None  # righe da uno snapshot (load_snapshot_rows) al posto di quelle sintetiche
+
+
+def _fetch_delay(rows):
+    # Tempo di rete per batch, proporzionale alla quota di righe del dizionario
+    return _Settings.fetch_time * BATCH_SIZE / max(_Settings.rows, 1) if rows else 0.0
+
+
+def _cancelled_error():
+    return oracledb.DatabaseError(types.SimpleNamespace(message='ORA-01013: user requested cancel of current operation'))
+
+
+class FakeCursor:
+    arraysize = 100
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._rows = []
+
+    def execute(self, query, params=None, **kwargs):
+        self._conn.wait(_Settings.latency)
+        self._rows = _result_rows(query, _Settings.rows, params)
+        return self
+
+    def __iter__(self):
+        delay = _fetch_delay(self._rows)
+        for start in range(0, len(self._rows), BATCH_SIZE):
+            if delay:
+                self._conn.wait(delay)
+            yield from self._rows[start:start + BATCH_SIZE]
+
+    def fetchmany(self, size=None):
+        size = size or self.arraysize
+        batch, self._rows = self._rows[:size], self._rows[size:]
+        if batch and _Settings.fetch_time:
+            self._conn.wait(_Settings.fetch_time * len(batch) / max(_Settings.rows, 1))
+        return batch
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    call_timeout = 0
+
+    def __init__(self):
+        self._cancelled = threading.Event()
+
+    def wait(self, seconds):
+        # Come una chiamata di rete: cancel() da un altro thread la interrompe
+        if self._cancelled.wait(seconds):
+            self._cancelled.clear()
+            raise _cancelled_error()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        pass
+
+
+class FakeAsyncCursor:
+
+    def __init__(self):
+        self._rows = []
+
+    async def execute(self, query, params=None, **kwargs):
+        await asyncio.sleep(_Settings.latency)
+        self._rows = _result_rows(query, _Settings.rows, params)
+
+    async def fetchmany(self, size=BATCH_SIZE):
+        batch, self._rows = self._rows[:size], self._rows[size:]
+        if batch:
+            delay = _Settings.fetch_time * len(batch) / max(_Settings.rows, 1)
+            if delay:
+                await asyncio.sleep(delay)
+        return batch
+
+    def close(self):
+        pass
+
+
+class FakeAsyncConnection:
+    call_timeout = 0
+
+    def cursor(self):
+        return FakeAsyncCursor()
+
+    async def close(self):
+        pass
+
+
+class SimulatedSource:
+    """
+    Sorgente del dizionario simulata: `rows` campi sintetici (o le righe di
+    uno snapshot), `latency` secondi per connect ed execute, `fetch_latency`
+    secondi per ogni round trip di `batch_size` righe. Le righe dei campi
+    sono generate batch per batch, come arriverebbero dalla rete.
+    """
+
+    def __init__(self, rows=36000, latency=0.0, fetch_latency=0.0, batch_size=FETCH_BATCH, snapshot=None):
+        self.snapshot_rows = load_snapshot_rows(snapshot) if snapshot else None
+        self.rows = len(self.snapshot_rows) if self.snapshot_rows is not None else rows
+        self.latency = latency
+        self.fetch_latency = fetch_latency
+        self.batch_size = batch_size
+
+    def describe(self):
+        return f'simulato ({self.rows} campi)'
+
+    def connect(self):
+        time.sleep(self.latency)
+        return FakeConnection()
+
+    def _result(self, sql):
+        if 'FW_TABLE_FIELDS' in sql.upper():
+            return iter(self.snapshot_rows) if self.snapshot_rows is not None else iter_rows(self.rows)
+        previous = _Settings.snapshot_rows
+        _Settings.snapshot_rows = self.snapshot_rows
+        try:
+            return iter(_result_rows(sql, self.rows))
+        finally:
+            _Settings.snapshot_rows = previous
+
+    def fetch(self, conn, sql):
+        conn.wait(self.latency)
+        result = self._result(sql)
+        while True:
+            batch = list(itertools.islice(result, self.batch_size))
+            if not batch:
+                return
+            conn.wait(self.fetch_latency)
+            yield batch
+
+    def close(self, conn):
+        conn.close()
+
+
+def install(rows=36000, latency=0.0, fetch_time=0.0, snapshot=None):
+    """Sostituisce le funzioni di connessione di oracledb (solo nel processo corrente)."""
+    _Settings.snapshot_rows = load_snapshot_rows(snapshot) if snapshot else None
+    if _Settings.snapshot_rows is not None:
+        rows = len(_Settings.snapshot_rows)
+    _Settings.rows = rows
+    _Settings.latency = latency
+    _Settings.fetch_time = fetch_time
+
+    def connect(**kwargs):
+        time.sleep(latency)
+        return FakeConnection()
+
+    async def connect_async(**kwargs):
+        await asyncio.sleep(latency)
+        return FakeAsyncConnection()
+
+    oracledb.connect = connect
+    oracledb.connect_async = connect_async
+    oracledb.init_oracle_client = lambda **kwargs: None
+    oracledb.is_thin_mode = lambda: True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=36000)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--fetch-time', type=float, default=0.0)
+    parser.add_argument('--snapshot', help='snapshot del dizionario (Data/snapshots/*.json)')
+    parser.add_argument('script')
+    parser.add_argument('args', nargs=argparse.REMAINDER)
+    options = parser.parse_args()
+
+    install(options.rows, options.latency, options.fetch_time, options.snapshot)
+    sys.argv = [options.script] + options.args
+    runpy.run_path(options.script, run_name='__main__')
+
+
+if __name__ == '__main__':
+    main()
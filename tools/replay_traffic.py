@@ -0,0 +1,316 @@
+"""
+Replay del traffico di traduzione catturato (JCTNT_CAPTURE_FILE).
+
+Rigioca le richieste di /api/translate-query registrate da traffic_capture
+con concorrenza e ritmo configurabili, e riporta throughput, latenze
+p50/p95/p99, errori e output diversi da quelli registrati (o da un run
+precedente salvato con --save).
+
+Senza --url avvia un server locale (waitress) con l'Oracle finto: il
+dizionario e' quello di uno snapshot (--snapshot, POST /api/schema-snapshot
+sull'ambiente catturato) oppure quello sintetico (--rows).
+
+Uso:
+    python tools/replay_traffic.py Data/capture/translate.jsonl --snapshot Data/snapshots/prod.json
+    python tools/replay_traffic.py Data/capture/translate.jsonl --concurrency 8 --rate 200 --save run1.jsonl
+    python tools/replay_traffic.py Data/capture/translate.jsonl --baseline run1.jsonl
+    python tools/replay_traffic.py Data/capture/translate.jsonl --url http://127.0.0.1:5000/JCTNT
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.join(TOOLS_DIR, '..')
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, TOOLS_DIR)
+
+from traffic_capture import translate_output  # noqa: E402
+
+PREFIX = '/JCTNT'
+
+
+# --- Cattura ---
+def capture_files(path):
+    """File della cattura dal piu' vecchio: path.N .. path.1, path (RotatingFileHandler)."""
+    rotated = []
+    index = 1
+    while os.path.exists(f'{path}.{index}'):
+        rotated.append(f'{path}.{index}')
+        index += 1
+    return list(reversed(rotated)) + ([path] if os.path.exists(path) else [])
+
+
+def load_capture(paths, rotated=True, limit=0):
+    entries = []
+    for path in paths:
+        for filename in (capture_files(path) if rotated else [path]):
+            with open(filename, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue  # riga troncata (processo interrotto durante la scrittura)
+                    if limit and len(entries) >= limit:
+                        return entries
+    return entries
+
+
+def _payload(entry):
+    return dict(entry.get('options') or {}, query=entry.get('query', ''))
+
+
+# --- Client HTTP ---
+class _Client:
+    """Connessione keep-alive (una per thread)."""
+
+    def __init__(self, url, timeout=120):
+        parts = urlsplit(url)
+        self.host = parts.hostname or '127.0.0.1'
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self._conn = None
+
+    def request(self, method, path, body=None):
+        for attempt in (0, 1):
+            if self._conn is None:
+                self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                payload = json.dumps(body) if body is not None else None
+                self._conn.request(method, self.prefix + path, body=payload,
+                                   headers={'Content-Type': 'application/json'})
+                response = self._conn.getresponse()
+                return response.status, response.read()
+            except (OSError, http.client.HTTPException):
+                self.close()
+                if attempt:
+                    raise
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+# --- Server locale con dizionario di fixture ---
+def _serve(options):
+    """Processo server (invocato dal replay stesso con --serve)."""
+    import fake_oracle
+    fake_oracle.install(options.rows, snapshot=options.snapshot)
+    from waitress import serve
+    import app
+    serve(app.app, host='127.0.0.1', port=options.port, threads=options.threads)
+
+
+def _wait_ready(client, deadline=60):
+    started = time.time()
+    while time.time() - started < deadline:
+        try:
+            client.request('GET', '/api/connection-data')
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('server non avviato')
+
+
+def start_local_server(options, workdir):
+    command = [
+        sys.executable, os.path.abspath(__file__), '--serve', '--port', str(options.port),
+        '--rows', str(options.rows), '--threads', str(options.threads),
+    ]
+    if options.snapshot:
+        command += ['--snapshot', os.path.abspath(options.snapshot)]
+    server = subprocess.Popen(command, cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    client = _Client(f'http://127.0.0.1:{options.port}{PREFIX}')
+    try:
+        _wait_ready(client)
+        status, data = client.request('POST', '/api/connect', {
+            'host': 'fixture', 'port': '1521', 'sid': 'REPLAY', 'username': 'replay', 'password': 'x'})
+        if status != 200:
+            raise RuntimeError(f'caricamento dizionario fallito: {data[:200]!r}')
+    except Exception:
+        server.terminate()
+        server.wait()
+        raise
+    finally:
+        client.close()
+    return server
+
+
+# --- Replay ---
+def replay(url, entries, concurrency=4, rate=0.0):
+    """
+    Rigioca le richieste. rate > 0: richieste al secondo complessive (partenze
+    programmate, come il traffico reale); 0 = il piu' veloce possibile.
+
+    Returns: (risultati in ordine di cattura, durata in secondi)
+    """
+    results = [None] * len(entries)
+    cursor = iter(range(len(entries)))
+    cursor_lock = threading.Lock()
+    started = time.perf_counter()
+
+    def worker():
+        client = _Client(url)
+        try:
+            while True:
+                with cursor_lock:
+                    index = next(cursor, None)
+                if index is None:
+                    return
+                if rate > 0:
+                    delay = started + index / rate - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                request_started = time.perf_counter()
+                try:
+                    status, data = client.request('POST', '/api/translate-query', _payload(entries[index]))
+                    body = json.loads(data)
+                    output = translate_output(body) if isinstance(body, dict) else {'error': 'risposta non JSON'}
+                except (OSError, http.client.HTTPException, ValueError) as exc:
+                    status, output = 0, {'error': f'{type(exc).__name__}: {exc}'}
+                results[index] = {
+                    'index': index,
+                    'status': status,
+                    'latency_ms': round((time.perf_counter() - request_started) * 1000, 3),
+                    'output': output,
+                }
+        finally:
+            client.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(max(1, concurrency))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - started
+
+
+def mismatches(results, expected):
+    """Indici con output diverso dall'atteso (lista di dict 'output' o None se non disponibile)."""
+    return [result['index'] for result, reference in zip(results, expected)
+            if reference is not None and result['output'] != reference]
+
+
+def load_run(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_run(path, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+
+def report(entries, results, elapsed, expected, reference_name, current_version, show=5):
+    latencies = [result['latency_ms'] / 1000 for result in results]
+    failures = [result for result in results if result['status'] == 0 or result['status'] >= 500]
+    rejected = sum(1 for result in results if 400 <= result['status'] < 500)
+
+    print(f'  richieste: {len(results)} in {elapsed:.2f} s ({len(results) / max(elapsed, 1e-9):.1f}/s)')
+    print(f'  latenza ms  p50 {_percentile(latencies, 50) * 1000:8.1f}  '
+          f'p95 {_percentile(latencies, 95) * 1000:8.1f}  '
+          f'p99 {_percentile(latencies, 99) * 1000:8.1f}  '
+          f'max {max(latencies or [0]) * 1000:8.1f}')
+    print(f'  errori di rete/server: {len(failures)}   risposte 4xx: {rejected}')
+    for result in failures[:3]:
+        print(f'    errore #{result["index"]}: {result["output"].get("error")}')
+
+    captured_versions = {entry.get('dictionary_version') for entry in entries} - {None}
+    if current_version and captured_versions and captured_versions != {current_version}:
+        print(f'  attenzione: dizionario {current_version[:12]} diverso da quello della cattura '
+              f'({", ".join(sorted(version[:12] for version in captured_versions))})')
+
+    different = mismatches(results, expected)
+    print(f'  output diversi da {reference_name}: {len(different)}')
+    for index in different[:show]:
+        print(f'    #{index}: {entries[index].get("query", "")[:120]!r}')
+        print(f'       atteso  {json.dumps(expected[index], ensure_ascii=False)[:200]}')
+        print(f'       ottenuto {json.dumps(results[index]["output"], ensure_ascii=False)[:200]}')
+    return different
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('captures', nargs='*', help='file di cattura (i ruotati .1 .. .N sono inclusi)')
+    parser.add_argument('--url', help='istanza esistente (es. http://127.0.0.1:5000/JCTNT)')
+    parser.add_argument('--snapshot', help='dizionario di fixture per il server locale')
+    parser.add_argument('--rows', type=int, default=36000, help='righe sintetiche senza --snapshot')
+    parser.add_argument('--port', type=int, default=5078)
+    parser.add_argument('--threads', type=int, default=8, help='thread waitress del server locale')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=0.0, help='richieste/s (0 = senza limite)')
+    parser.add_argument('--limit', type=int, default=0, help='solo le prime N richieste')
+    parser.add_argument('--no-rotated', action='store_true', help='ignora i file ruotati')
+    parser.add_argument('--save', help='salva i risultati (JSON lines) per un confronto successivo')
+    parser.add_argument('--baseline', help='confronta con un run salvato invece che con la cattura')
+    parser.add_argument('--show', type=int, default=5, help='differenze da mostrare')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.serve:
+        _serve(options)
+        return
+    if not options.captures:
+        parser.error('indicare almeno un file di cattura')
+
+    entries = load_capture(options.captures, not options.no_rotated, options.limit)
+    if not entries:
+        print('cattura vuota')
+        return 1
+    if options.baseline:
+        baseline = {run['index']: run['output'] for run in load_run(options.baseline)}
+        expected = [baseline.get(index) for index in range(len(entries))]
+        reference_name = options.baseline
+    else:
+        expected = [entry.get('output') for entry in entries]
+        reference_name = 'cattura'
+
+    with tempfile.TemporaryDirectory() as workdir:
+        server = None
+        url = options.url
+        if not url:
+            server = start_local_server(options, workdir)
+            url = f'http://127.0.0.1:{options.port}{PREFIX}'
+        try:
+            client = _Client(url)
+            try:
+                status, data = client.request('GET', '/api/schema-sources')
+                current_version = json.loads(data).get('current_version') if status == 200 else None
+            finally:
+                client.close()
+            print(f'--- replay di {len(entries)} richieste su {url} '
+                  f'(concorrenza {options.concurrency}, rate {options.rate or "max"}) ---')
+            results, elapsed = replay(url, entries, options.concurrency, options.rate)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    different = report(entries, results, elapsed, expected, reference_name, current_version, options.show)
+    if options.save:
+        save_run(options.save, results)
+    return 1 if different else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
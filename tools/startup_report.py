@@ -0,0 +1,68 @@
+"""
+Tempi di avvio: dettaglio degli import di app.py (python -X importtime) e
+tempo fino alla prima risposta della pagina iniziale, con e senza fast start.
+
+Uso:
+    python tools/startup_report.py
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+FIRST_RESPONSE = (
+    'import time; started = time.perf_counter(); import app; '
+    'imported = time.perf_counter(); '
+    'status = app.app.test_client().get(app.APP_PREFIX + "/").status_code; '
+    'print(f"{(imported - started) * 1000:.0f} {(time.perf_counter() - started) * 1000:.0f} {status}")'
+)
+
+
+def _run(code, fast_start, extra_args=()):
+    env = dict(os.environ, JCTNT_FAST_START='1' if fast_start else '0', PYTHONPATH=ROOT_DIR)
+    with tempfile.TemporaryDirectory() as workdir:
+        return subprocess.run(
+            [sys.executable, *extra_args, '-c', code],
+            cwd=workdir, env=env, capture_output=True, text=True
+        )
+
+
+def import_breakdown(fast_start=True, top=12):
+    """[(modulo, ms cumulativi)] degli import diretti di app.py."""
+    result = _run('import app', fast_start, ('-X', 'importtime'))
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):
+            # Modulo di primo livello: i figli raccolti finora sono suoi
+            if name.strip() == 'app':
+                modules.append(('app (totale)', int(cumulative) / 1000))
+                break
+            modules = []
+        elif not name.startswith('    '):
+            # Profondita' 1 = import fatti direttamente da app.py
+            modules.append((name.strip(), int(cumulative) / 1000))
+    return sorted(modules, key=lambda item: -item[1])[:top]
+
+
+def main():
+    for fast_start in (True, False):
+        label = 'fast start' if fast_start else 'avvio completo (JCTNT_FAST_START=0)'
+        print(f'--- {label} ---')
+        for name, ms in import_breakdown(fast_start):
+            print(f'  {name:<28} {ms:8.1f} ms')
+        result = _run(FIRST_RESPONSE, fast_start)
+        output = result.stdout.strip().splitlines()
+        if not output:
+            print(result.stderr)
+            continue
+        imported, first_response, status = output[-1].split()
+        print(f'  import app: {imported} ms, prima risposta "/": {first_response} ms (HTTP {status})')
+
+
+if __name__ == '__main__':
+    main()
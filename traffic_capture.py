@@ -0,0 +1,71 @@
+"""
+Traffic capture: registra le richieste di /api/translate-query (query,
+direzione, opzioni, versione del dizionario, esito) in un file JSON lines a
+rotazione, da rigiocare con tools/replay_traffic.py.
+
+Attivazione: JCTNT_CAPTURE_FILE=Data/capture/translate.jsonl
+(JCTNT_CAPTURE_MAX_BYTES, default 10 MB per file; JCTNT_CAPTURE_BACKUPS,
+default 5 file ruotati .1 .. .5).
+"""
+import json
+import logging
+import os
+import time
+from logging.handlers import RotatingFileHandler
+
+CAPTURED_OPTIONS = ('chosen_descriptor', 'remembered_choices', 'strip_params', 'index_advice', 'incremental')
+
+
+def translate_output(body):
+    """Parte della risposta da confrontare fra due esecuzioni."""
+    if 'error' in body:
+        return {'error': body['error']}
+    if body.get('ambiguous'):
+        return {'ambiguous': sorted(body.get('candidates') or [])}
+    return {'sql': body['sql']} if 'sql' in body else {'tecsql': body.get('tecsql')}
+
+
+class TrafficCapture:
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backups=5):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # RotatingFileHandler: rotazione e scritture serializzate fra thread
+        self._logger = logging.getLogger(f'jctnt.capture.{path}')
+        self._logger.setLevel(logging.INFO)
+        self._logger.propagate = False
+        if not self._logger.handlers:
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self._logger.addHandler(handler)
+        self.path = path
+
+    @classmethod
+    def from_env(cls):
+        path = os.environ.get('JCTNT_CAPTURE_FILE', '')
+        if not path:
+            return None
+        return cls(path,
+                   max_bytes=int(os.environ.get('JCTNT_CAPTURE_MAX_BYTES', 10 * 1024 * 1024)),
+                   backups=int(os.environ.get('JCTNT_CAPTURE_BACKUPS', 5)))
+
+    def record(self, data, body, status, elapsed_ms, dictionary_version):
+        options = {name: data[name] for name in CAPTURED_OPTIONS if name in data}
+        # Scelte di descrittore ricordate dal server (tutte): nel replay passano
+        # nella richiesta, indipendenti dallo stato del server rigiocato
+        remembered = [{'table': c['table'], 'fields_used': c['fields_used'], 'descriptor': c['descriptor']}
+                      for c in body.get('descriptor_choices', []) if c['source'] == 'remembered']
+        if remembered and 'remembered_choices' not in options:
+            options['remembered_choices'] = remembered
+        entry = {
+            'ts': round(time.time(), 3),
+            'query': data.get('query', ''),
+            'direction': body.get('direction'),
+            'options': options,
+            'dictionary_version': dictionary_version,
+            'status': status,
+            'elapsed_ms': round(elapsed_ms, 3),
+            'output': translate_output(body),
+        }
+        self._logger.info(json.dumps(entry, ensure_ascii=False))
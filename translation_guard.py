@@ -0,0 +1,329 @@
+"""
+Translation guard: limiti sulle query da tradurre e tempo massimo per traduzione.
+
+- QueryLimits: caratteri, token e profondita' delle parentesi, controllati
+  prima di tradurre (costo lineare); oltre il limite la richiesta viene
+  rifiutata con un errore chiaro invece di occupare un thread.
+- TranslatorPool: la traduzione gira in processi worker (questo file eseguito
+  come script) con un tempo massimo; allo scadere il worker viene terminato e
+  sostituito, la richiesta riceve un errore. Ogni worker ha la sua copia delle
+  mappe del traduttore, sincronizzata con il dizionario attivo (righe nuove in
+  modalita' lazy, tutto al cambio di dizionario).
+
+Configurazione via env:
+    JCTNT_MAX_QUERY_CHARS       caratteri massimi di una query (default 100000)
+    JCTNT_MAX_QUERY_TOKENS      token massimi (default 20000)
+    JCTNT_MAX_QUERY_DEPTH       parentesi annidate massime (default 50)
+    JCTNT_TRANSLATE_TIMEOUT     secondi massimi per traduzione (default 10); 0 =
+                                traduzione nel processo del server senza limite
+    JCTNT_TRANSLATE_PROCESSES   processi worker (default JCTNT_THREADS, al
+                                massimo il numero di CPU)
+    JCTNT_TRANSLATE_QUEUE_WAIT  secondi di attesa di un worker libero, poi 503
+                                (default 1)
+"""
+import itertools
+import os
+import pickle
+import queue
+import re
+import subprocess
+import sys
+import threading
+import time
+import weakref
+
+SYNC_TIMEOUT = 300         # secondi per copiare il dizionario in un worker
+MAPPING_COLUMNS = ('TABELLA_FISICA', 'CAMPO_FISICO', 'TABELLA_LOGICA', 'CAMPO_LOGICO')
+
+_TOKEN_RE = re.compile(r"'(?:[^']|'')*'|[\w$#]+|[^\w\s]")
+_PAREN_RE = re.compile(r"'(?:[^']|'')*'|[()]")
+
+
+class TranslationLimit(Exception):
+    """Query rifiutata o traduzione interrotta: `status` HTTP, `limit` violato."""
+
+    def __init__(self, message, status, limit):
+        super().__init__(message)
+        self.status = status
+        self.limit = limit
+
+
+# --- Limiti statici ---
+class QueryLimits:
+
+    def __init__(self, max_chars=100000, max_tokens=20000, max_depth=50):
+        self.max_chars = max_chars
+        self.max_tokens = max_tokens
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_env(cls):
+        return cls(max_chars=int(os.environ.get('JCTNT_MAX_QUERY_CHARS', 100000)),
+                   max_tokens=int(os.environ.get('JCTNT_MAX_QUERY_TOKENS', 20000)),
+                   max_depth=int(os.environ.get('JCTNT_MAX_QUERY_DEPTH', 50)))
+
+    def check(self, query):
+        """TranslationLimit se la query supera uno dei limiti (0 = limite disattivato)."""
+        if self.max_chars and len(query) > self.max_chars:
+            raise TranslationLimit(f'Query troppo lunga: {len(query)} caratteri (massimo {self.max_chars})',
+                                   413, 'chars')
+        if self.max_tokens:
+            # Conteggio interrotto appena oltre il limite
+            tokens = sum(1 for _ in itertools.islice(_TOKEN_RE.finditer(query), self.max_tokens + 1))
+            if tokens > self.max_tokens:
+                raise TranslationLimit(f'Query troppo complessa: oltre {self.max_tokens} token', 422, 'tokens')
+        if self.max_depth:
+            depth = 0
+            for match in _PAREN_RE.finditer(query):
+                paren = match.group()
+                if paren == '(':
+                    depth += 1
+                    if depth > self.max_depth:
+                        raise TranslationLimit(f'Query troppo annidata: oltre {self.max_depth} livelli di parentesi',
+                                               422, 'depth')
+                elif paren == ')':
+                    depth = max(0, depth - 1)
+
+
+# --- Worker ---
+class _WorkerDied(Exception):
+    pass
+
+
+class _Worker:
+    """Processo worker: messaggi pickle su stdin, risposte su stdout (lette da un thread)."""
+
+    def __init__(self):
+        self.process = subprocess.Popen([sys.executable, os.path.abspath(__file__)],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.responses = queue.Queue()
+        self.store_ref = None     # dizionario di cui il worker ha le mappe (weakref)
+        self.synced = 0           # righe di quel dizionario gia' copiate
+        threading.Thread(target=self._read, name='translate-worker-reader', daemon=True).start()
+
+    def _read(self):
+        try:
+            while True:
+                self.responses.put(pickle.load(self.process.stdout))
+        except Exception:
+            self.responses.put(('dead', None))
+
+    def call(self, message, timeout):
+        """Invia un messaggio e attende la risposta; None allo scadere del timeout."""
+        try:
+            pickle.dump(message, self.process.stdin, pickle.HIGHEST_PROTOCOL)
+            self.process.stdin.flush()
+        except OSError:
+            raise _WorkerDied()
+        try:
+            status, result = self.responses.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if status == 'dead':
+            raise _WorkerDied()
+        if status == 'error':
+            raise RuntimeError(result)
+        return (result,)
+
+    def sync(self, store):
+        """Copia nel worker le righe di `store` che ancora non ha."""
+        if store is None:
+            return
+        if self.store_ref is None or self.store_ref() is not store:
+            self._expect(self.call(('reset',), SYNC_TIMEOUT))
+            self.store_ref = weakref.ref(store)
+            self.synced = 0
+        count = len(store)
+        if self.synced < count:
+            rows = list(itertools.islice(store.iter_values(*MAPPING_COLUMNS), self.synced, count))
+            self._expect(self.call(('rows', rows), SYNC_TIMEOUT))
+            self.synced = count
+
+    @staticmethod
+    def _expect(reply):
+        if reply is None:
+            raise _WorkerDied()
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.wait(5)
+        except Exception:
+            pass
+        for pipe in (self.process.stdin, self.process.stdout):
+            try:
+                pipe.close()
+            except Exception:
+                pass
+
+
+class TranslatorPool:
+    """
+    translate(kind, *args): translate_tecsql ('tecsql') o translate_sql_to_tecsql
+    ('sql') in un worker, con le mappe del dizionario passato a prepare().
+
+    Un worker riceve richieste solo dopo aver copiato il dizionario attivo: la
+    copia completa (nuovo dizionario, worker riavviato) gira in background; sul
+    percorso della richiesta restano solo le righe aggiunte nel frattempo in
+    modalita' lazy. L'attesa di un worker libero (queue_wait) e' separata dal
+    tempo massimo di traduzione (timeout).
+    """
+
+    def __init__(self, processes=2, timeout=10.0, queue_wait=1.0):
+        self.processes = max(1, processes)
+        self.timeout = timeout
+        self.queue_wait = queue_wait
+        self._store = None        # dizionario attivo (prepare)
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+        self.translations = 0
+        self.timeouts = 0
+        self.restarts = 0
+
+    @classmethod
+    def from_env(cls):
+        timeout = float(os.environ.get('JCTNT_TRANSLATE_TIMEOUT', 10))
+        if timeout <= 0:
+            return None
+        # Default: un worker per thread del server, al massimo uno per CPU
+        threads = int(os.environ.get('JCTNT_THREADS', 8))
+        processes = int(os.environ.get('JCTNT_TRANSLATE_PROCESSES', min(threads, os.cpu_count() or 1)))
+        return cls(processes=processes, timeout=timeout,
+                   queue_wait=float(os.environ.get('JCTNT_TRANSLATE_QUEUE_WAIT', 1)))
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for _ in range(self.processes):
+            self._checkin(_Worker())
+
+    def prepare(self, store):
+        """Nuovo dizionario: i worker liberi ne copiano le mappe in background."""
+        self._store = store
+
+        def run():
+            self._ensure_started()
+            workers = []
+            try:
+                while True:
+                    workers.append(self._idle.get_nowait())
+            except queue.Empty:
+                pass
+            for worker in workers:
+                self._checkin(worker)
+
+        threading.Thread(target=run, name='translate-worker-sync', daemon=True).start()
+
+    @staticmethod
+    def _ready(worker, store):
+        return store is None or (worker.store_ref is not None and worker.store_ref() is store)
+
+    def _checkin(self, worker):
+        """Worker libero: fra gli idle se ha le mappe del dizionario attivo, altrimenti prima le copia."""
+        if self._ready(worker, self._store):
+            self._idle.put(worker)
+        else:
+            threading.Thread(target=self._sync, args=(worker,), name='translate-worker-sync', daemon=True).start()
+
+    def _sync(self, worker):
+        try:
+            worker.sync(self._store)
+        except Exception:
+            self._replace(worker)
+            return
+        self._checkin(worker)  # dizionario cambiato durante la copia: ricomincia
+
+    def _replace(self, worker):
+        """Worker terminato o bloccato: ne parte un altro (sincronizzato) in background."""
+        worker.kill()
+        self.restarts += 1
+
+        def run():
+            try:
+                fresh = _Worker()
+            except Exception as e:
+                print(f"[WARN] Worker di traduzione non avviato: {e}")
+                return
+            self._checkin(fresh)
+
+        threading.Thread(target=run, name='translate-worker-restart', daemon=True).start()
+
+    def _acquire(self):
+        """(worker, dizionario): worker libero con le mappe del dizionario attivo, entro queue_wait secondi."""
+        deadline = time.monotonic() + self.queue_wait
+        while True:
+            try:
+                worker = self._idle.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                raise TranslationLimit('Traduttore occupato: riprovare fra poco', 503, 'busy')
+            store = self._store
+            if self._ready(worker, store):
+                return worker, store
+            self._checkin(worker)  # preso mentre cambiava il dizionario
+
+    def translate(self, kind, *args):
+        self._ensure_started()
+        worker, store = self._acquire()
+        try:
+            worker.sync(store)  # solo righe lazy nuove: la copia completa e' gia' fatta
+            reply = worker.call(('translate', kind, args), self.timeout)
+        except _WorkerDied:
+            self._replace(worker)
+            raise TranslationLimit('Traduzione interrotta: worker terminato inaspettatamente', 500, 'worker')
+        except Exception:
+            self._checkin(worker)
+            raise
+        if reply is None:
+            self.timeouts += 1
+            self._replace(worker)
+            raise TranslationLimit(f'Traduzione interrotta dopo {self.timeout:g} s: query troppo complessa',
+                                   422, 'time')
+        self.translations += 1
+        self._checkin(worker)
+        return reply[0]
+
+
+def worker_main():
+    """Loop del processo worker (stdout riservato alle risposte, print su stderr)."""
+    from dictionary_store import DictionaryStore
+    from tecsql_translator import translate_sql_to_tecsql, translate_tecsql, update_mappings
+
+    replies = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    requests = sys.stdin.buffer
+    translators = {'tecsql': translate_tecsql, 'sql': translate_sql_to_tecsql}
+    store = DictionaryStore()
+
+    while True:
+        try:
+            message = pickle.load(requests)
+        except EOFError:
+            return
+        try:
+            if message[0] == 'reset':
+                store = DictionaryStore()
+                update_mappings(store)
+                reply = ('ok', 0)
+            elif message[0] == 'rows':
+                start = len(store)
+                for row in message[1]:
+                    store.append(row + ('', '', ''))
+                update_mappings(store, start)
+                reply = ('ok', len(store))
+            else:
+                _, kind, args = message
+                reply = ('ok', translators[kind](*args))
+        except Exception as e:
+            reply = ('error', str(e))
+        try:
+            pickle.dump(reply, replies, pickle.HIGHEST_PROTOCOL)
+            replies.flush()
+        except OSError:
+            return  # server terminato: nessuno legge piu' le risposte
+
+
+if __name__ == '__main__':
+    worker_main()